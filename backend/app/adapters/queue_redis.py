@@ -4,7 +4,7 @@ Redis adapter for queue and pub/sub operations.
 This module provides integration with Redis for caching, queuing, and pub/sub.
 """
 
-from typing import Any, Dict, List, Optional, AsyncIterator
+from typing import Any, Dict, List, Optional, AsyncIterator, Tuple
 import json
 import asyncio
 from redis import asyncio as aioredis
@@ -15,6 +15,15 @@ from ..core.observability import get_logger, with_tracing
 
 logger = get_logger(__name__)
 
+# PUBLISH plus a capped, expiring history list in one round trip
+_PUBLISH_WITH_HISTORY_LUA = """
+redis.call('PUBLISH', KEYS[1], ARGV[1])
+redis.call('LPUSH', KEYS[2], ARGV[1])
+redis.call('LTRIM', KEYS[2], 0, tonumber(ARGV[2]) - 1)
+redis.call('EXPIRE', KEYS[2], tonumber(ARGV[3]))
+return 1
+"""
+
 
 class RedisAdapter:
     """Adapter for Redis operations."""
@@ -33,6 +42,7 @@ class RedisAdapter:
         self.redis: Optional[aioredis.Redis] = None
         self.pubsub: Optional[aioredis.client.PubSub] = None
         self._connected = False
+        self._publish_with_history_script = None
     
     async def connect(self) -> None:
         """Connect to Redis."""
@@ -227,13 +237,62 @@ class RedisAdapter:
         await self.ensure_connected()
         
         try:
-            if not isinstance(message, str):
+            if not isinstance(message, (str, bytes)):
                 message = json.dumps(message)
             return await self.redis.publish(channel, message)
         except RedisError as e:
             logger.error(f"Redis PUBLISH error: {str(e)}")
             return 0
     
+    async def load_scripts(self) -> None:
+        """Register the Lua scripts and load them on the server ahead of first use."""
+        await self.ensure_connected()
+        
+        try:
+            self._publish_with_history_script = self.redis.register_script(_PUBLISH_WITH_HISTORY_LUA)
+            await self.redis.script_load(_PUBLISH_WITH_HISTORY_LUA)
+        except RedisError as e:
+            logger.error(f"Redis SCRIPT LOAD error: {str(e)}")
+    
+    async def publish_with_history(
+        self,
+        channel: str,
+        history_key: str,
+        message: Any,
+        max_len: int,
+        ttl: int
+    ) -> bool:
+        """Publish a message and keep it in a capped history list, in one EVALSHA."""
+        await self.ensure_connected()
+        
+        if self._publish_with_history_script is None:
+            self._publish_with_history_script = self.redis.register_script(_PUBLISH_WITH_HISTORY_LUA)
+        
+        try:
+            if not isinstance(message, (str, bytes)):
+                message = json.dumps(message)
+            await self._publish_with_history_script(keys=[channel, history_key], args=[message, max_len, ttl])
+            return True
+        except RedisError as e:
+            logger.error(f"Redis publish with history error: {str(e)}")
+            return False
+    
+    async def publish_batch(self, messages: List[Tuple[str, Any]]) -> int:
+        """Publish (channel, message) pairs in one non-transactional pipeline."""
+        await self.ensure_connected()
+        
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for channel, message in messages:
+                    if not isinstance(message, (str, bytes)):
+                        message = json.dumps(message)
+                    pipe.publish(channel, message)
+                results = await pipe.execute()
+            return sum(results)
+        except RedisError as e:
+            logger.error(f"Redis PUBLISH pipeline error: {str(e)}")
+            return 0
+    
     async def subscribe(self, *channels: str) -> AsyncIterator[Dict[str, Any]]:
         """Subscribe to channels and yield messages."""
         await self.ensure_connected()
@@ -276,6 +335,10 @@ class RedisAdapter:
                 for pattern in patterns:
                     await self.pubsub.punsubscribe(pattern)
     
+    def create_pubsub_reader(self) -> "RedisPubSubReader":
+        """Create a pub/sub reader on its own connection to the same server."""
+        return RedisPubSubReader(self.redis_url)
+    
     # Atomic operations
     async def incr(self, key: str) -> int:
         """Increment value."""
@@ -369,4 +432,69 @@ class RedisAdapter:
 
 
 # Global Redis adapter instance
-redis_adapter = RedisAdapter() 
\ No newline at end of file
+redis_adapter = RedisAdapter() 
+
+
+class RedisPubSubReader:
+    """Dedicated pub/sub connection for hot read loops.
+    
+    The client does not decode responses, so channels and payloads arrive as
+    bytes and skip a UTF-8 decode per message. Channels can be added and
+    removed while listen() is running.
+    """
+    
+    def __init__(self, redis_url: str):
+        self.redis_url = redis_url
+        self.redis: Optional[aioredis.Redis] = None
+        self.pubsub: Optional[aioredis.client.PubSub] = None
+    
+    async def connect(self) -> None:
+        """Open the reader's connection."""
+        if self.pubsub:
+            return
+        
+        # A pub/sub reader only ever needs one connection
+        self.redis = await aioredis.from_url(self.redis_url, decode_responses=False, max_connections=1)
+        self.pubsub = self.redis.pubsub()
+    
+    async def close(self) -> None:
+        """Close the reader's connection."""
+        if self.pubsub:
+            await self.pubsub.close()
+            self.pubsub = None
+        
+        if self.redis:
+            await self.redis.close()
+            self.redis = None
+    
+    async def add_subscriptions(self, *channels: str) -> bool:
+        """Subscribe to more channels."""
+        try:
+            await self.connect()
+            await self.pubsub.subscribe(*channels)
+            return True
+        except RedisError as e:
+            logger.error(f"Redis SUBSCRIBE error: {str(e)}")
+            return False
+    
+    async def remove_subscriptions(self, *channels: str) -> None:
+        """Unsubscribe from channels."""
+        if not self.pubsub:
+            return
+        
+        try:
+            await self.pubsub.unsubscribe(*channels)
+        except RedisError as e:
+            logger.error(f"Redis UNSUBSCRIBE error: {str(e)}")
+    
+    async def listen(self) -> AsyncIterator[Dict[str, Any]]:
+        """Yield messages as they arrive; returns once no subscriptions are left."""
+        while self.pubsub and self.pubsub.subscribed:
+            try:
+                message = await self.pubsub.get_message(ignore_subscribe_messages=True, timeout=None)
+            except RedisError as e:
+                logger.error(f"Redis pub/sub read error: {str(e)}")
+                await asyncio.sleep(1.0)
+                continue
+            if message and message["type"] == "message":
+                yield message
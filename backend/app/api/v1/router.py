@@ -6,7 +6,8 @@ This module defines all the API endpoints for the intelligent router system.
 
 from typing import Dict, Any, List, Optional
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, HTTPException, status, Response, Query
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
+import json
 import time
 from datetime import datetime
 
@@ -277,13 +278,10 @@ async def websocket_endpoint(
                             "message_id": message_id
                         })
                         
-                        # Publish token event
-                        await event_bus.publish(Event(
-                            type=EventType.TOKEN_GENERATED,
-                            payload={"token": token},
-                            request_id=message_id,
-                            session_id=session_id
-                        ))
+                        # Publish token event (coalesced, without waiting on handlers)
+                        await event_bus.publish_token(session_id, message_id, token, wait=False)
+                    
+                    await event_bus.flush_coalesced(session_id, message_id, wait=False)
                 else:
                     # Non-streaming response, send as single token
                     await websocket.send_json({
@@ -748,12 +746,13 @@ async def get_router_analytics_dashboard(
 async def export_learning_data(
     user: CurrentUser,
     router_chain: RouterChainDep,
-    export_format: str = Query("json", description="Export format: json or csv"),
+    export_format: str = Query("json", description="Export format: json, ndjson or csv"),
 ) -> Response:
     """
     Export learning data for analysis or backup.
     
-    Supports JSON and CSV formats.
+    Supports JSON, newline-delimited JSON and CSV formats. The ndjson and
+    csv formats stream one decision at a time.
     Requires appropriate permissions.
     """
     try:
@@ -768,53 +767,60 @@ async def export_learning_data(
                 detail="Learning router not available"
             )
         
-        # Export learning data
-        learning_data = learning_router.export_learning_data()
-        
         if export_format.lower() == "json":
             return JSONResponse(
-                content=learning_data,
+                content=learning_router.export_learning_data(),
                 headers={"Content-Disposition": f"attachment; filename=learning_data_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.json"}
             )
+        elif export_format.lower() == "ndjson":
+            return StreamingResponse(
+                (json.dumps(decision) + "\n" for decision in learning_router.iter_decisions()),
+                media_type="application/x-ndjson",
+                headers={"Content-Disposition": f"attachment; filename=learning_data_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.ndjson"}
+            )
         elif export_format.lower() == "csv":
             # Convert to CSV format (simplified version)
             import csv
             import io
             
-            output = io.StringIO()
-            writer = csv.writer(output)
-            
-            # Write headers
-            writer.writerow([
-                'decision_id', 'session_id', 'timestamp', 'selected_agent',
-                'routing_method', 'confidence', 'success', 'user_satisfaction'
-            ])
-            
-            # Write decision data
-            for decision in learning_data.get('decision_history', []):
+            def csv_rows():
+                output = io.StringIO()
+                writer = csv.writer(output)
+                
+                # Write headers
                 writer.writerow([
-                    decision.get('decision_id', ''),
-                    decision.get('session_id', ''),
-                    decision.get('timestamp', ''),
-                    decision.get('selected_agent', ''),
-                    decision.get('routing_method', ''),
-                    decision.get('confidence', ''),
-                    decision.get('success', ''),
-                    decision.get('user_satisfaction', '')
+                    'decision_id', 'session_id', 'timestamp', 'selected_agent',
+                    'routing_method', 'confidence', 'success', 'user_satisfaction'
                 ])
+                yield output.getvalue()
+                output.seek(0)
+                output.truncate(0)
+                
+                # Write decision data one row at a time
+                for decision in learning_router.iter_decisions():
+                    writer.writerow([
+                        decision.get('decision_id', ''),
+                        decision.get('session_id', ''),
+                        decision.get('timestamp', ''),
+                        decision.get('selected_agent', ''),
+                        decision.get('routing_method', ''),
+                        decision.get('confidence', ''),
+                        decision.get('success', ''),
+                        decision.get('user_satisfaction', '')
+                    ])
+                    yield output.getvalue()
+                    output.seek(0)
+                    output.truncate(0)
             
-            csv_content = output.getvalue()
-            output.close()
-            
-            return Response(
-                content=csv_content,
+            return StreamingResponse(
+                csv_rows(),
                 media_type="text/csv",
                 headers={"Content-Disposition": f"attachment; filename=learning_data_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.csv"}
             )
         else:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Supported formats: json, csv"
+                detail="Supported formats: json, ndjson, csv"
             )
         
     except HTTPException:
@@ -6,7 +6,8 @@ router performance, cache efficiency, and system health.
 """
 
 import time
-from typing import Dict, Any, Optional
+from collections import defaultdict
+from typing import Dict, Any, List, Optional
 from datetime import datetime
 from prometheus_client import (
     Counter, Histogram, Gauge, Info, CollectorRegistry,
@@ -251,6 +252,46 @@ class MetricsCollector:
         except Exception as e:
             logger.error(f"Error recording router metrics: {e}")
     
+    def record_router_requests_batch(self, events: List[Dict[str, Any]]):
+        """Record a batch of router requests; each event holds record_router_request kwargs.
+        
+        Events are grouped by label set first, so each labelled child is looked
+        up once per batch and the request counter is incremented once per group.
+        """
+        if not self.enabled:
+            return
+        
+        try:
+            request_counts: Dict[tuple, int] = defaultdict(int)
+            durations: Dict[tuple, List[float]] = defaultdict(list)
+            confidences: Dict[tuple, List[float]] = defaultdict(list)
+            for event in events:
+                method = event["method"]
+                agent_type = event["agent_type"]
+                request_counts[(method, agent_type, event.get("status", "success"))] += 1
+                durations[(method, agent_type)].append(event["duration"])
+                confidences[(agent_type, event["routing_method"])].append(event["confidence"])
+            
+            for (method, agent_type, status), count in request_counts.items():
+                router_requests_total.labels(
+                    method=method,
+                    agent_type=agent_type,
+                    status=status
+                ).inc(count)
+            
+            for (method, agent_type), values in durations.items():
+                histogram = router_request_duration_seconds.labels(method=method, agent_type=agent_type)
+                for value in values:
+                    histogram.observe(value)
+            
+            for (agent_type, routing_method), values in confidences.items():
+                histogram = router_confidence_score.labels(agent_type=agent_type, routing_method=routing_method)
+                for value in values:
+                    histogram.observe(value)
+            
+        except Exception as e:
+            logger.error(f"Error recording router metrics: {e}")
+    
     def record_learning_decision(
         self, 
         agent_type: str, 
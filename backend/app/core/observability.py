@@ -52,6 +52,7 @@ from .settings import settings
 request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
 user_id_var: ContextVar[Optional[str]] = ContextVar("user_id", default=None)
 trace_id_var: ContextVar[Optional[str]] = ContextVar("trace_id", default=None)
+session_id_var: ContextVar[Optional[str]] = ContextVar("session_id", default=None)
 
 
 class AlertSeverity(Enum):
@@ -18,6 +18,15 @@ from ..core.config import settings
 logger = get_logger(__name__)
 
 
+def _exceeds_word_count(text: str, limit: int) -> bool:
+    """Return True if ``text`` has more than ``limit`` whitespace-separated words.
+
+    ``maxsplit`` bounds the split to ``limit + 1`` pieces, so long queries are
+    never fully tokenized just to be counted.
+    """
+    return len(text.split(maxsplit=limit)) > limit
+
+
 class AgentFramework(Enum):
     """Supported agent frameworks."""
     CUSTOM = "custom"
@@ -288,6 +297,7 @@ class HybridRAGAgent(BaseAgent):
         self.rag_top_k = 5
         self.similarity_threshold = 0.7
         self.use_query_decomposition = True
+        self.decomposition_word_threshold = 10
     
     async def initialize(self) -> None:
         """Initialize the hybrid agent."""
@@ -321,7 +331,9 @@ class HybridRAGAgent(BaseAgent):
     async def _get_rag_context(self, query: str) -> Dict[str, Any]:
         """Get relevant context from RAG system."""
         try:
-            if self.use_query_decomposition and len(query.split()) > 10:
+            if self.use_query_decomposition and _exceeds_word_count(
+                query, self.decomposition_word_threshold
+            ):
                 # Use query decomposition for complex queries
                 return await self.rag_system.query_with_decomposition(query)
             else:
@@ -5,14 +5,18 @@ This module implements the learning capabilities for the router chain,
 tracking routing decisions and optimizing based on performance metrics.
 """
 
-from typing import Dict, List, Optional, Any
+from typing import Deque, Dict, Iterable, Iterator, List, Optional, Any, FrozenSet, Set, Tuple
 from dataclasses import dataclass, field
-from datetime import datetime, timedelta
-from collections import defaultdict, deque
+from operator import attrgetter
+from datetime import datetime
+from collections import Counter, OrderedDict, deque
 import asyncio
-import statistics
+import bisect
+import time
 from enum import Enum
 
+import numpy as np
+
 from app.core.observability import get_logger, with_tracing
 from app.core.router_cache import cache_routing_decision, cache_performance_metrics
 from app.core.metrics import metrics_collector
@@ -22,6 +26,21 @@ from app.domain.router_chain import RouterNode, RouterChain
 
 logger = get_logger(__name__)
 
+# Stable integer codes for agent types in the NumPy decision columns
+_AGENT_TYPES = tuple(AgentType)
+_AGENT_CODES = {agent: code for code, agent in enumerate(_AGENT_TYPES)}
+
+# Enum values and lookups cached once, so hot paths do a dict hit instead of
+# going through the Enum machinery
+_AGENT_VALUE = {agent: agent.value for agent in AgentType}
+_AGENT_BY_VALUE = {agent.value: agent for agent in AgentType}
+_ROUTE_METHOD_VALUE = {method: method.value for method in RoutingMethod}
+
+
+def _tokenize(text: str) -> FrozenSet[str]:
+    """Split a query into the lowercase word set used for similarity."""
+    return frozenset(text.lower().split())
+
 
 class FeedbackType(str, Enum):
     """Types of feedback for routing decisions."""
@@ -43,8 +62,10 @@ class RoutingDecision:
     routing_method: RoutingMethod
     confidence: float
     latency_ms: float
-    timestamp: datetime
+    timestamp: float  # Unix epoch seconds
     metadata: Dict[str, Any] = field(default_factory=dict)
+    tokens: FrozenSet[str] = field(default_factory=frozenset)  # Lowercased query words
+    seq: int = -1  # Position in the learning history, assigned when indexed
     
     # Performance metrics
     success: Optional[bool] = None
@@ -54,6 +75,70 @@ class RoutingDecision:
     feedback: Dict[FeedbackType, Any] = field(default_factory=dict)
 
 
+@dataclass
+class LearningWindowBucket:
+    """Decision counters for one hour of the learning window."""
+    decisions: int = 0
+    successful: int = 0
+    satisfaction_sum: float = 0.0
+    satisfaction_count: int = 0
+    agent_distribution: Counter = field(default_factory=Counter)
+
+
+@dataclass(slots=True)
+class AgentAggregate:
+    """Running performance aggregates for one agent type."""
+    total_requests: int = 0
+    successful_requests: int = 0
+    escalations: int = 0
+    confidence_sum: float = 0.0
+    satisfaction_sum: float = 0.0
+    satisfaction_count: int = 0
+    resolution_time_sum: float = 0.0
+    resolution_time_count: int = 0
+    
+    @property
+    def success_rate(self) -> float:
+        """Calculate success rate."""
+        return self.successful_requests / self.total_requests if self.total_requests > 0 else 0.0
+    
+    @property
+    def avg_confidence(self) -> float:
+        """Calculate average confidence."""
+        return self.confidence_sum / self.total_requests if self.total_requests > 0 else 0.0
+    
+    @property
+    def avg_satisfaction(self) -> float:
+        """Calculate average user satisfaction."""
+        return self.satisfaction_sum / self.satisfaction_count if self.satisfaction_count > 0 else 0.0
+    
+    @property
+    def avg_resolution_time(self) -> float:
+        """Calculate average resolution time."""
+        return self.resolution_time_sum / self.resolution_time_count if self.resolution_time_count > 0 else 0.0
+    
+    @property
+    def escalation_rate(self) -> float:
+        """Calculate escalation rate."""
+        return self.escalations / self.total_requests if self.total_requests > 0 else 0.0
+    
+    def replace_satisfaction(self, old_value: Optional[float], new_value: float) -> None:
+        """Swap one satisfaction sample in the running sum."""
+        if old_value is not None:
+            self.satisfaction_sum -= old_value
+            self.satisfaction_count -= 1
+        self.satisfaction_sum += new_value
+        self.satisfaction_count += 1
+    
+    def replace_resolution_time(self, old_value: Optional[float], new_value: float) -> None:
+        """Swap one resolution time sample in the running sum."""
+        if old_value is not None:
+            self.resolution_time_sum -= old_value
+            self.resolution_time_count -= 1
+        self.resolution_time_sum += new_value
+        self.resolution_time_count += 1
+
+
 @dataclass
 class NodePerformanceMetrics:
     """Performance metrics for each router node."""
@@ -62,7 +147,8 @@ class NodePerformanceMetrics:
     successful_routes: int = 0
     total_confidence: float = 0.0
     total_latency_ms: float = 0.0
-    user_satisfaction_scores: List[float] = field(default_factory=list)
+    total_satisfaction: float = 0.0
+    satisfaction_count: int = 0
     recent_decisions: deque = field(default_factory=lambda: deque(maxlen=100))
     
     @property
@@ -83,7 +169,7 @@ class NodePerformanceMetrics:
     @property
     def avg_satisfaction(self) -> float:
         """Calculate average user satisfaction."""
-        return statistics.mean(self.user_satisfaction_scores) if self.user_satisfaction_scores else 0.0
+        return self.total_satisfaction / self.satisfaction_count if self.satisfaction_count > 0 else 0.0
 
 
 class LearningRouterNode(RouterNode):
@@ -99,22 +185,70 @@ class LearningRouterNode(RouterNode):
         self.base_router_chain = base_router_chain
         self.learning_enabled = learning_enabled
         
-        # Learning data structures
-        self.decision_history: List[RoutingDecision] = []
-        self.node_metrics: Dict[str, NodePerformanceMetrics] = {}
-        self.agent_performance: Dict[AgentType, Dict[str, Any]] = defaultdict(lambda: {
-            'total_requests': 0,
-            'successful_requests': 0,
-            'avg_satisfaction': 0.0,
-            'avg_resolution_time': 0.0,
-            'escalation_rate': 0.0
-        })
-        
         # Learning parameters
         self.min_decisions_for_learning = 10  # Minimum decisions before applying learning
         self.confidence_threshold = 0.7  # Minimum confidence to override base routing
         self.learning_window_hours = 24  # Hours to consider for recent performance
         self.max_history_size = 1000  # Maximum decisions to keep in memory
+        self.min_query_tokens = 2  # Shorter queries carry too little signal to compare
+        self.vectorize_min_candidates = 64  # Aggregate with NumPy from this many similar decisions
+        self.snapshot_refresh_interval = 30.0  # Seconds between performance snapshot rebuilds
+        self.snapshot_refresh_decisions = 50  # New decisions that trigger an early rebuild
+        self.max_snapshot_queries = 512  # Distinct queries tracked in the snapshot
+        self.max_optimization_cache_size = 1024  # Memoized override decisions
+        self.metrics_batch_size = 100  # Router metric events recorded per drain step
+        self.max_pending_metrics = 10000  # Queued metric events before new ones are dropped
+        
+        # Learning data structures
+        self.decision_history: Deque[RoutingDecision] = deque(maxlen=self.max_history_size)
+        self.node_metrics: Dict[str, NodePerformanceMetrics] = {}
+        # Running per-agent aggregates, updated on record and feedback so the
+        # averages never need a pass over the history
+        self.agent_performance: Dict[AgentType, AgentAggregate] = {
+            agent: AgentAggregate() for agent in AgentType
+        }
+        
+        # Inverted index over query tokens. Decisions are keyed by a monotonically
+        # increasing sequence number so eviction from the front of the history
+        # maps to the oldest live sequence numbers.
+        self._next_seq = 0
+        self._decisions_by_seq: Dict[int, RoutingDecision] = {}
+        self._token_index: Dict[str, Set[int]] = {}
+        self._decision_index: Dict[str, RoutingDecision] = {}
+        
+        # Numeric decision columns in ring buffers indexed by seq % max_history_size,
+        # so large similar-decision sets can be aggregated with NumPy. Missing
+        # feedback is stored as NaN.
+        self._agent_codes = np.zeros(self.max_history_size, dtype=np.int16)
+        self._confidence = np.zeros(self.max_history_size, dtype=np.float64)
+        self._success = np.zeros(self.max_history_size, dtype=np.float64)
+        self._satisfaction = np.full(self.max_history_size, np.nan)
+        self._resolution_time = np.full(self.max_history_size, np.nan)
+        
+        # Hourly counters behind get_learning_metrics, keyed by epoch hour and
+        # kept in step with record, feedback and eviction
+        self._window_buckets: Dict[int, LearningWindowBucket] = {}
+        
+        # Per-query agent performance, keyed by query token set. It is rebuilt by a
+        # background task so the similarity scan never runs on the request path;
+        # queries missing from the snapshot are queued for the next rebuild.
+        self._performance_snapshot: Dict[FrozenSet[str], Dict[AgentType, Dict[str, Any]]] = {}
+        self._snapshot_pending: Set[FrozenSet[str]] = set()
+        self._snapshot_lock = asyncio.Lock()
+        self._snapshot_task: Optional[asyncio.Task] = None
+        self._snapshot_built_at = 0.0
+        self._decisions_since_snapshot = 0
+        
+        # Override decisions memoized per (query tokens, base agent). Entries only
+        # depend on the snapshot, so the cache is cleared whenever it is rebuilt.
+        self._optimization_cache: "OrderedDict[Tuple[FrozenSet[str], str], Optional[Tuple[AgentType, Dict[str, Any]]]]" = OrderedDict()
+        
+        # Base chain calls in flight, keyed like the routing cache
+        self._inflight_routes: Dict[Tuple[str, Optional[str]], asyncio.Future] = {}
+        
+        # Router metric events, recorded in batches by a background drain task
+        self._metrics_queue: asyncio.Queue = asyncio.Queue(maxsize=self.max_pending_metrics)
+        self._metrics_task: Optional[asyncio.Task] = None
         
         logger.info("LearningRouterNode initialized with learning_enabled=%s", learning_enabled)
     
@@ -138,14 +272,16 @@ class LearningRouterNode(RouterNode):
         """
         start_time = asyncio.get_event_loop().time()
         
+        # Step 1: Get base routing decision
+        base_result = await self._route_base(context)
+        
+        if not base_result:
+            logger.warning("Base router chain returned no result")
+            return None
+        
+        # Learning failures fall back to the base decision computed above
+        # rather than routing the request a second time
         try:
-            # Step 1: Get base routing decision
-            base_result = await self.base_router_chain.route(context)
-            
-            if not base_result:
-                logger.warning("Base router chain returned no result")
-                return None
-            
             # Step 2: Apply learning optimization if enabled
             if self.learning_enabled and len(self.decision_history) >= self.min_decisions_for_learning:
                 optimized_result = await self._apply_learning_optimization(context, base_result)
@@ -156,13 +292,13 @@ class LearningRouterNode(RouterNode):
             await self._record_routing_decision(context, base_result, start_time)
             
             # Record metrics
-            metrics_collector.record_router_request(
-                method=base_result.routing_method.value,
-                agent_type=base_result.metadata.get('selected_agent', 'unknown'),
-                confidence=base_result.confidence,
-                duration=(asyncio.get_event_loop().time() - start_time) * 1000,
-                routing_method=base_result.routing_method.value
-            )
+            self._enqueue_router_metrics({
+                'method': _ROUTE_METHOD_VALUE[base_result.routing_method],
+                'agent_type': base_result.metadata.get('selected_agent', 'unknown'),
+                'confidence': base_result.confidence,
+                'duration': (asyncio.get_event_loop().time() - start_time) * 1000,
+                'routing_method': _ROUTE_METHOD_VALUE[base_result.routing_method]
+            })
             
             # Step 4: Add learning metadata
             base_result.metadata.update({
@@ -171,12 +307,41 @@ class LearningRouterNode(RouterNode):
                 'learning_applied': self.learning_enabled and len(self.decision_history) >= self.min_decisions_for_learning
             })
             
-            return base_result
-            
         except (ValueError, RuntimeError, asyncio.TimeoutError) as e:
             logger.error("Learning router failed", error=str(e), session_id=context.prompt.session_id)
-            # Fallback to base router without learning
+        
+        return base_result
+    
+    async def _route_base(self, context: RequestContext) -> Optional[IntentResult]:
+        """
+        Route through the base chain, sharing one call between concurrent requests.
+        
+        Requests are coalesced on the same (prompt, user) key that the routing
+        cache uses, so followers receive what a cache hit would have given them.
+        Each follower gets its own copy because callers mutate the metadata.
+        """
+        key = (context.prompt.prompt, context.user_id)
+        pending = self._inflight_routes.get(key)
+        if pending is not None:
+            result = await asyncio.shield(pending)
+            if result is not None:
+                return result.model_copy(deep=True)
+            # The leading call failed; route this request on its own
             return await self.base_router_chain.route(context)
+        
+        future = asyncio.get_running_loop().create_future()
+        self._inflight_routes[key] = future
+        try:
+            result = await self.base_router_chain.route(context)
+        except BaseException:
+            future.set_result(None)
+            raise
+        else:
+            future.set_result(result.model_copy(deep=True) if result is not None else None)
+        finally:
+            del self._inflight_routes[key]
+        
+        return result
     
     async def _apply_learning_optimization(
         self, 
@@ -187,50 +352,64 @@ class LearningRouterNode(RouterNode):
         Apply learning-based optimization to the base routing result.
         
         Analyzes historical performance and may suggest a different agent
-        if learning indicates better performance.
+        if learning indicates better performance. Performance comes from the
+        background snapshot, so a query seen for the first time is routed
+        without optimization and picked up by the next rebuild.
         """
         try:
-            # Find similar historical queries
-            similar_decisions = self._find_similar_decisions(context.prompt.prompt)
-            
-            if len(similar_decisions) < 3:  # Need minimum sample size
+            query_key = _tokenize(context.prompt.prompt)
+            if len(query_key) < self.min_query_tokens:
                 return None
             
-            # Analyze performance by agent type for similar queries
-            agent_performance = self._analyze_agent_performance_for_similar_queries(similar_decisions)
-            
-            # Get best performing agent
-            best_agent = self._get_best_performing_agent(agent_performance)
-            
-            if best_agent and best_agent != AgentType(base_result.metadata.get('selected_agent', 'general')):
-                # Check if confidence in override is high enough
-                best_performance = agent_performance[best_agent]
-                if best_performance['confidence'] >= self.confidence_threshold:
-                    logger.info(
-                        "Learning override applied",
-                        original_agent=base_result.metadata.get('selected_agent'),
-                        optimized_agent=best_agent.value,
-                        confidence=best_performance['confidence'],
-                        sample_size=best_performance['sample_size']
-                    )
-                    
-                    # Create optimized result
-                    optimized_result = IntentResult(
-                        intent=f"learning_optimized_{base_result.intent}",
-                        confidence=best_performance['confidence'],
-                        entities=base_result.entities,
-                        routing_method=RoutingMethod.LLM_ROUTER,  # Mark as learning-optimized
-                        metadata={
-                            **base_result.metadata,
-                            'selected_agent': best_agent.value,
-                            'learning_override': True,
-                            'original_agent': base_result.metadata.get('selected_agent'),
-                            'learning_confidence': best_performance['confidence'],
-                            'learning_sample_size': best_performance['sample_size']
-                        }
-                    )
-                    
-                    return optimized_result
+            base_agent = base_result.metadata.get('selected_agent', 'general')
+            cache_key = (query_key, base_agent)
+            
+            if cache_key in self._optimization_cache:
+                self._optimization_cache.move_to_end(cache_key)
+                override = self._optimization_cache[cache_key]
+            else:
+                agent_performance = self._performance_snapshot.get(query_key)
+                
+                if agent_performance is None:
+                    self._snapshot_pending.add(query_key)
+                    self._schedule_snapshot_refresh()
+                    return None
+                
+                override = self._resolve_learning_override(agent_performance, _AGENT_BY_VALUE.get(base_agent, AgentType.GENERAL))
+                self._optimization_cache[cache_key] = override
+                if len(self._optimization_cache) > self.max_optimization_cache_size:
+                    self._optimization_cache.popitem(last=False)
+            
+            if self._snapshot_is_stale():
+                self._schedule_snapshot_refresh()
+            
+            if override:
+                best_agent, best_performance = override
+                logger.info(
+                    "Learning override applied",
+                    original_agent=base_result.metadata.get('selected_agent'),
+                    optimized_agent=_AGENT_VALUE[best_agent],
+                    confidence=best_performance['confidence'],
+                    sample_size=best_performance['sample_size']
+                )
+                
+                # Create optimized result
+                optimized_result = IntentResult(
+                    intent=f"learning_optimized_{base_result.intent}",
+                    confidence=best_performance['confidence'],
+                    entities=base_result.entities,
+                    routing_method=RoutingMethod.LLM_ROUTER,  # Mark as learning-optimized
+                    metadata={
+                        **base_result.metadata,
+                        'selected_agent': _AGENT_VALUE[best_agent],
+                        'learning_override': True,
+                        'original_agent': base_result.metadata.get('selected_agent'),
+                        'learning_confidence': best_performance['confidence'],
+                        'learning_sample_size': best_performance['sample_size']
+                    }
+                )
+                
+                return optimized_result
             
             return None
             
@@ -238,80 +417,276 @@ class LearningRouterNode(RouterNode):
             logger.error("Learning optimization failed", error=str(e))
             return None
     
-    def _find_similar_decisions(self, query: str, similarity_threshold: float = 0.7) -> List[RoutingDecision]:
+    def _resolve_learning_override(
+        self,
+        agent_performance: Dict[AgentType, Dict[str, Any]],
+        base_agent: AgentType
+    ) -> Optional[Tuple[AgentType, Dict[str, Any]]]:
+        """Pick the agent to override the base decision with, if any."""
+        best_agent = self._get_best_performing_agent(agent_performance)
+        
+        if best_agent and best_agent != base_agent:
+            # Check if confidence in override is high enough
+            best_performance = agent_performance[best_agent]
+            if best_performance['confidence'] >= self.confidence_threshold:
+                return best_agent, best_performance
+        
+        return None
+    
+    def _snapshot_is_stale(self) -> bool:
+        """Check whether the performance snapshot is due for a rebuild."""
+        if self._decisions_since_snapshot >= self.snapshot_refresh_decisions:
+            return True
+        elapsed = asyncio.get_event_loop().time() - self._snapshot_built_at
+        return elapsed >= self.snapshot_refresh_interval
+    
+    def _enqueue_router_metrics(self, event: Dict[str, Any]) -> None:
+        """Queue a router metric event without blocking the request."""
+        try:
+            self._metrics_queue.put_nowait(event)
+        except asyncio.QueueFull:
+            logger.debug("Router metrics queue full, dropping event")
+            return
+        
+        if self._metrics_task is None or self._metrics_task.done():
+            self._metrics_task = asyncio.create_task(self._drain_metrics())
+    
+    async def _drain_metrics(self) -> None:
+        """Record queued router metric events in batches until the queue is empty."""
+        while not self._metrics_queue.empty():
+            batch = []
+            while len(batch) < self.metrics_batch_size and not self._metrics_queue.empty():
+                batch.append(self._metrics_queue.get_nowait())
+            metrics_collector.record_router_requests_batch(batch)
+            await asyncio.sleep(0)  # Let request handlers run between batches
+    
+    def _schedule_snapshot_refresh(self) -> None:
+        """Start a snapshot rebuild unless one is already running."""
+        if self._snapshot_task is not None and not self._snapshot_task.done():
+            return
+        self._snapshot_task = asyncio.create_task(self._refresh_performance_snapshot())
+    
+    async def _refresh_performance_snapshot(self) -> None:
+        """Rebuild per-query agent performance off the request path."""
+        async with self._snapshot_lock:
+            # Bound the tracked queries, dropping the oldest; pending ones go last
+            query_keys = [key for key in self._performance_snapshot if key not in self._snapshot_pending]
+            query_keys.extend(self._snapshot_pending)
+            query_keys = query_keys[-self.max_snapshot_queries:]
+            self._snapshot_pending = set()
+            self._decisions_since_snapshot = 0
+            
+            snapshot: Dict[FrozenSet[str], Dict[AgentType, Dict[str, Any]]] = {}
+            for i, query_key in enumerate(query_keys):
+                snapshot[query_key] = self._analyze_agent_performance_for_query(query_key)
+                if i % 32 == 31:
+                    await asyncio.sleep(0)  # Let request handlers run between batches
+            
+            self._performance_snapshot = snapshot
+            self._optimization_cache.clear()
+            self._snapshot_built_at = asyncio.get_event_loop().time()
+            logger.debug("Performance snapshot rebuilt", queries=len(snapshot))
+    
+    def _find_similar_decisions(
+        self,
+        query_words: FrozenSet[str],
+        similarity_threshold: float = 0.7
+    ) -> List[RoutingDecision]:
+        """Find historically similar routing decisions."""
+        return list(self._iter_similar_decisions(
+            query_words, self._recent_candidates(query_words), similarity_threshold
+        ))
+    
+    def _recent_candidates(self, query_words: FrozenSet[str]) -> List[Tuple[int, int]]:
         """
-        Find historically similar routing decisions.
+        (sequence number, shared token count) for recent decisions sharing a token with the query.
         
-        Uses simple keyword-based similarity for now.
-        Could be enhanced with semantic similarity using embeddings.
+        Only decisions sharing at least one token with the query (looked up
+        through the inverted token index) are compared. Counting postings also
+        yields each candidate's overlap with the query, so no per-candidate set
+        intersection or union is needed.
         """
-        query_lower = query.lower()
-        query_words = set(query_lower.split())
+        if len(query_words) < self.min_query_tokens:
+            return []
         
-        similar_decisions = []
-        cutoff_time = datetime.utcnow() - timedelta(hours=self.learning_window_hours)
+        overlaps: Counter = Counter()
+        for token in query_words:
+            overlaps.update(self._token_index.get(token, ()))
         
-        for decision in self.decision_history:
-            # Only consider recent decisions
-            if decision.timestamp < cutoff_time:
-                continue
-            
-            # Simple word overlap similarity
-            decision_words = set(decision.user_query.lower().split())
-            if not decision_words:
-                continue
+        # Only consider recent decisions: sequence numbers follow time order, so
+        # everything older than the first recent decision is skipped at once
+        ordered = sorted(overlaps.items())
+        cutoff_seq = self._next_seq - len(self.decision_history) + self._first_recent_index()
+        return ordered[bisect.bisect_left(ordered, (cutoff_seq,)):]
+    
+    def _iter_similar_decisions(
+        self,
+        query_words: FrozenSet[str],
+        candidates: Iterable[Tuple[int, int]],
+        similarity_threshold: float = 0.7
+    ) -> Iterator[RoutingDecision]:
+        """
+        Yield candidate decisions similar enough to the query.
+        
+        Uses simple keyword-based similarity for now.
+        Could be enhanced with semantic similarity using embeddings.
+        """
+        query_size = len(query_words)
+        for seq, overlap in candidates:
+            decision = self._decisions_by_seq[seq]
             
-            overlap = len(query_words.intersection(decision_words))
-            similarity = overlap / len(query_words.union(decision_words))
+            # Simple word overlap similarity; the union size follows from the overlap
+            similarity = overlap / (query_size + len(decision.tokens) - overlap)
             
             if similarity >= similarity_threshold:
-                similar_decisions.append(decision)
+                yield decision
+    
+    def _first_recent_index(self) -> int:
+        """Index of the first history entry inside the learning window."""
+        cutoff_time = time.time() - self.learning_window_hours * 3600
+        return bisect.bisect_left(self.decision_history, cutoff_time, key=attrgetter('timestamp'))
+    
+    def _analyze_agent_performance_for_query(
+        self,
+        query_words: FrozenSet[str]
+    ) -> Dict[AgentType, Dict[str, Any]]:
+        """
+        Analyze performance of different agents for queries similar to this one.
+        
+        Large similar sets are summed with NumPy, small ones in a Python loop.
+        """
+        candidates = self._recent_candidates(query_words)
+        similar_decisions = list(self._iter_similar_decisions(query_words, candidates))
+        
+        # Collect statistics by agent type; candidates only share a token with
+        # the query, so the path is chosen on the similar decisions themselves
+        if len(similar_decisions) >= self.vectorize_min_candidates:
+            agent_stats = self._collect_agent_stats_vectorized(similar_decisions)
+        else:
+            agent_stats = self._collect_agent_stats(similar_decisions)
+        
+        if sum(stats['total'] for stats in agent_stats.values()) < 3:  # Need minimum sample size
+            return {}
+        
+        # Skip the composite scores when no agent could clear the override threshold
+        if not self._may_reach_confidence_threshold(agent_stats):
+            return {}
+
+        # Calculate performance metrics
+        return self._performance_from_agent_stats(agent_stats)
+
+    def _may_reach_confidence_threshold(self, agent_stats: Dict[AgentType, Dict[str, Any]]) -> bool:
+        """
+        Check whether any agent's composite score could reach the confidence threshold.
         
-        return similar_decisions
+        Satisfaction, confidence and resolution time contribute at most 0.6 to
+        the score, so the success rate alone gives an upper bound.
+        """
+        for stats in agent_stats.values():
+            if stats['total'] < 2:
+                continue
+            upper_bound = min(0.95, stats['successful'] / stats['total'] * 0.4 + 0.6)
+            if upper_bound >= self.confidence_threshold:
+                return True
+        return False
     
-    def _analyze_agent_performance_for_similar_queries(
-        self, 
-        similar_decisions: List[RoutingDecision]
+    def _collect_agent_stats(
+        self,
+        similar_decisions: Iterable[RoutingDecision]
     ) -> Dict[AgentType, Dict[str, Any]]:
-        """Analyze performance of different agents for similar queries."""
-        # Initialize agent stats with proper typing
+        """Sum per-agent statistics by walking the decisions."""
         agent_stats: Dict[AgentType, Dict[str, Any]] = {}
-        
-        # Collect statistics by agent type
         for decision in similar_decisions:
             agent = decision.selected_agent
             if agent not in agent_stats:
                 agent_stats[agent] = {
                     'total': 0,
                     'successful': 0,
-                    'satisfaction_scores': [],
-                    'resolution_times': [],
-                    'confidence_scores': []
+                    'confidence_sum': 0.0,
+                    'satisfaction_sum': 0.0,
+                    'satisfaction_count': 0,
+                    'resolution_time_sum': 0.0,
+                    'resolution_time_count': 0
                 }
             
             stats = agent_stats[agent]
             stats['total'] += 1
-            stats['confidence_scores'].append(decision.confidence)
+            stats['confidence_sum'] += decision.confidence
             
             if decision.success is True:
                 stats['successful'] += 1
             
             if decision.user_satisfaction is not None:
-                stats['satisfaction_scores'].append(decision.user_satisfaction)
+                stats['satisfaction_sum'] += decision.user_satisfaction
+                stats['satisfaction_count'] += 1
             
             if decision.resolution_time is not None:
-                stats['resolution_times'].append(decision.resolution_time)
+                stats['resolution_time_sum'] += decision.resolution_time
+                stats['resolution_time_count'] += 1
         
-        # Calculate performance metrics
+        return agent_stats
+    
+    def _collect_agent_stats_vectorized(
+        self,
+        similar_decisions: Iterable[RoutingDecision]
+    ) -> Dict[AgentType, Dict[str, Any]]:
+        """Sum per-agent statistics from the NumPy decision columns."""
+        slots = np.fromiter((d.seq for d in similar_decisions), dtype=np.int64)
+        slots %= self.max_history_size
+        codes = self._agent_codes[slots]
+        n_agents = len(_AGENT_TYPES)
+        
+        totals = np.bincount(codes, minlength=n_agents)
+        confidence_sums = np.bincount(codes, weights=self._confidence[slots], minlength=n_agents)
+        successes = np.bincount(codes, weights=self._success[slots], minlength=n_agents)
+        
+        satisfaction = self._satisfaction[slots]
+        has_satisfaction = ~np.isnan(satisfaction)
+        satisfaction_sums = np.bincount(
+            codes[has_satisfaction], weights=satisfaction[has_satisfaction], minlength=n_agents
+        )
+        satisfaction_counts = np.bincount(codes[has_satisfaction], minlength=n_agents)
+        
+        resolution_time = self._resolution_time[slots]
+        has_resolution_time = ~np.isnan(resolution_time)
+        resolution_time_sums = np.bincount(
+            codes[has_resolution_time], weights=resolution_time[has_resolution_time], minlength=n_agents
+        )
+        resolution_time_counts = np.bincount(codes[has_resolution_time], minlength=n_agents)
+        
+        return {
+            _AGENT_TYPES[code]: {
+                'total': int(totals[code]),
+                'successful': int(successes[code]),
+                'confidence_sum': float(confidence_sums[code]),
+                'satisfaction_sum': float(satisfaction_sums[code]),
+                'satisfaction_count': int(satisfaction_counts[code]),
+                'resolution_time_sum': float(resolution_time_sums[code]),
+                'resolution_time_count': int(resolution_time_counts[code])
+            }
+            for code in np.flatnonzero(totals)
+        }
+    
+    def _performance_from_agent_stats(
+        self,
+        agent_stats: Dict[AgentType, Dict[str, Any]]
+    ) -> Dict[AgentType, Dict[str, Any]]:
+        """Turn per-agent sums into composite performance scores."""
         agent_performance = {}
         for agent, stats in agent_stats.items():
             if stats['total'] < 2:  # Need minimum sample
                 continue
             
             success_rate = stats['successful'] / stats['total']
-            avg_confidence = statistics.mean(stats['confidence_scores'])
-            avg_satisfaction = statistics.mean(stats['satisfaction_scores']) if stats['satisfaction_scores'] else 3.0
-            avg_resolution_time = statistics.mean(stats['resolution_times']) if stats['resolution_times'] else 300.0
+            avg_confidence = stats['confidence_sum'] / stats['total']
+            avg_satisfaction = (
+                stats['satisfaction_sum'] / stats['satisfaction_count']
+                if stats['satisfaction_count'] else 3.0
+            )
+            avg_resolution_time = (
+                stats['resolution_time_sum'] / stats['resolution_time_count']
+                if stats['resolution_time_count'] else 300.0
+            )
             
             # Calculate composite performance score
             # Higher satisfaction and success rate = better
@@ -367,23 +742,33 @@ class LearningRouterNode(RouterNode):
                 session_id=context.prompt.session_id or "unknown",
                 request_id=context.request_id,
                 user_query=context.prompt.prompt,
-                selected_agent=AgentType(result.metadata.get('selected_agent', 'general')),
+                selected_agent=_AGENT_BY_VALUE.get(result.metadata.get('selected_agent'), AgentType.GENERAL),
                 routing_method=result.routing_method,
                 confidence=result.confidence,
                 latency_ms=latency_ms,
-                timestamp=datetime.utcnow(),
-                metadata=result.metadata
+                timestamp=time.time(),
+                metadata=result.metadata,
+                tokens=_tokenize(context.prompt.prompt)
             )
             
-            # Add to history
+            # Add to history; the bounded deque evicts the oldest decision
+            if len(self.decision_history) == self.decision_history.maxlen:
+                self._remove_from_window(self.decision_history[0])
+                self._unindex_decision(self._next_seq - len(self.decision_history))
             self.decision_history.append(decision)
+            self._index_decision(decision)
+            self._decisions_since_snapshot += 1
+            
+            bucket = self._window_bucket(decision.timestamp, create=True)
+            bucket.decisions += 1
+            bucket.agent_distribution[_AGENT_VALUE[decision.selected_agent]] += 1
             
-            # Maintain maximum history size
-            if len(self.decision_history) > self.max_history_size:
-                self.decision_history = self.decision_history[-self.max_history_size:]
+            agent_stats = self.agent_performance[decision.selected_agent]
+            agent_stats.total_requests += 1
+            agent_stats.confidence_sum += decision.confidence
             
             # Update node metrics
-            node_type = result.routing_method.value
+            node_type = _ROUTE_METHOD_VALUE[result.routing_method]
             if node_type not in self.node_metrics:
                 self.node_metrics[node_type] = NodePerformanceMetrics(node_type)
             
@@ -404,6 +789,64 @@ class LearningRouterNode(RouterNode):
         except (ValueError, KeyError) as e:
             logger.error("Failed to record routing decision", error=str(e))
     
+    def _window_bucket(self, timestamp: float, create: bool = False) -> Optional[LearningWindowBucket]:
+        """Get the hourly bucket for a timestamp, optionally creating it."""
+        hour = int(timestamp // 3600)
+        bucket = self._window_buckets.get(hour)
+        if bucket is None and create:
+            bucket = self._window_buckets[hour] = LearningWindowBucket()
+            # Drop buckets that fell out of the learning window
+            oldest_hour = hour - self.learning_window_hours
+            for stale_hour in [h for h in self._window_buckets if h < oldest_hour]:
+                del self._window_buckets[stale_hour]
+        return bucket
+    
+    def _remove_from_window(self, decision: RoutingDecision) -> None:
+        """Take an evicted decision out of its hourly bucket."""
+        bucket = self._window_bucket(decision.timestamp)
+        if bucket is None:
+            return
+        bucket.decisions -= 1
+        bucket.agent_distribution[_AGENT_VALUE[decision.selected_agent]] -= 1
+        if decision.success is True:
+            bucket.successful -= 1
+        if decision.user_satisfaction is not None:
+            bucket.satisfaction_sum -= decision.user_satisfaction
+            bucket.satisfaction_count -= 1
+    
+    def _index_decision(self, decision: RoutingDecision) -> None:
+        """Add a decision to the id lookup and the inverted token index."""
+        seq = self._next_seq
+        self._next_seq += 1
+        decision.seq = seq
+        
+        slot = seq % self.max_history_size
+        self._agent_codes[slot] = _AGENT_CODES[decision.selected_agent]
+        self._confidence[slot] = decision.confidence
+        self._success[slot] = float(decision.success is True)
+        self._satisfaction[slot] = np.nan if decision.user_satisfaction is None else decision.user_satisfaction
+        self._resolution_time[slot] = np.nan if decision.resolution_time is None else decision.resolution_time
+        
+        self._decisions_by_seq[seq] = decision
+        self._decision_index[decision.decision_id] = decision
+        for token in decision.tokens:
+            self._token_index.setdefault(token, set()).add(seq)
+    
+    def _unindex_decision(self, seq: int) -> None:
+        """Remove an evicted decision from the id lookup and token index."""
+        decision = self._decisions_by_seq.pop(seq, None)
+        if decision is None:
+            return
+        if self._decision_index.get(decision.decision_id) is decision:
+            del self._decision_index[decision.decision_id]
+        for token in decision.tokens:
+            postings = self._token_index.get(token)
+            if postings is None:
+                continue
+            postings.discard(seq)
+            if not postings:
+                del self._token_index[token]
+    
     async def record_feedback(
         self, 
         decision_id: str, 
@@ -417,12 +860,7 @@ class LearningRouterNode(RouterNode):
         routing decisions to improve learning.
         """
         try:
-            # Find the decision
-            decision = None
-            for d in self.decision_history:
-                if d.decision_id == decision_id:
-                    decision = d
-                    break
+            decision = self._decision_index.get(decision_id)
             
             if not decision:
                 logger.warning("Decision not found for feedback", decision_id=decision_id)
@@ -430,26 +868,50 @@ class LearningRouterNode(RouterNode):
             
             # Record feedback
             decision.feedback[feedback_type] = feedback_value
+            agent_stats = self.agent_performance[decision.selected_agent]
+            bucket = self._window_bucket(decision.timestamp)
             
-            # Update specific metrics based on feedback type
+            # Update specific metrics based on feedback type, replacing any
+            # earlier value in the agent's running aggregates
             if feedback_type == FeedbackType.USER_SATISFACTION:
-                decision.user_satisfaction = float(feedback_value)
+                value = float(feedback_value)
+                agent_stats.replace_satisfaction(decision.user_satisfaction, value)
+                if bucket is not None:
+                    if decision.user_satisfaction is not None:
+                        bucket.satisfaction_sum -= decision.user_satisfaction
+                        bucket.satisfaction_count -= 1
+                    bucket.satisfaction_sum += value
+                    bucket.satisfaction_count += 1
+                decision.user_satisfaction = value
+                self._satisfaction[decision.seq % self.max_history_size] = value
             elif feedback_type == FeedbackType.AGENT_SUCCESS:
-                decision.success = bool(feedback_value)
+                value = bool(feedback_value)
+                success_delta = int(value) - int(decision.success is True)
+                agent_stats.successful_requests += success_delta
+                if bucket is not None:
+                    bucket.successful += success_delta
+                decision.success = value
+                self._success[decision.seq % self.max_history_size] = float(value)
             elif feedback_type == FeedbackType.RESOLUTION_TIME:
-                decision.resolution_time = float(feedback_value)
+                value = float(feedback_value)
+                agent_stats.replace_resolution_time(decision.resolution_time, value)
+                decision.resolution_time = value
+                self._resolution_time[decision.seq % self.max_history_size] = value
             elif feedback_type == FeedbackType.ESCALATION:
-                decision.escalated = bool(feedback_value)
+                value = bool(feedback_value)
+                agent_stats.escalations += int(value) - int(decision.escalated)
+                decision.escalated = value
             
             # Update node metrics
-            node_type = decision.routing_method.value
+            node_type = _ROUTE_METHOD_VALUE[decision.routing_method]
             if node_type in self.node_metrics:
                 metrics = self.node_metrics[node_type]
                 
                 if feedback_type == FeedbackType.AGENT_SUCCESS and feedback_value:
                     metrics.successful_routes += 1
                 elif feedback_type == FeedbackType.USER_SATISFACTION:
-                    metrics.user_satisfaction_scores.append(float(feedback_value))
+                    metrics.total_satisfaction += float(feedback_value)
+                    metrics.satisfaction_count += 1
             
             logger.info(
                 "Feedback recorded",
@@ -466,17 +928,22 @@ class LearningRouterNode(RouterNode):
         """Get current learning metrics for monitoring and analysis."""
         try:
             total_decisions = len(self.decision_history)
-            recent_cutoff = datetime.utcnow() - timedelta(hours=self.learning_window_hours)
-            recent_decisions = [d for d in self.decision_history if d.timestamp >= recent_cutoff]
             
-            # Calculate overall metrics
-            successful_decisions = [d for d in recent_decisions if d.success is True]
-            satisfaction_scores = [d.user_satisfaction for d in recent_decisions if d.user_satisfaction is not None]
-            
-            # Agent distribution
-            agent_distribution = defaultdict(int)
-            for decision in recent_decisions:
-                agent_distribution[decision.selected_agent.value] += 1
+            # Sum the hourly buckets inside the learning window
+            cutoff_hour = int((time.time() - self.learning_window_hours * 3600) // 3600)
+            recent_decisions = 0
+            successful_decisions = 0
+            satisfaction_sum = 0.0
+            satisfaction_count = 0
+            agent_distribution: Counter = Counter()
+            for hour, bucket in self._window_buckets.items():
+                if hour < cutoff_hour:
+                    continue
+                recent_decisions += bucket.decisions
+                successful_decisions += bucket.successful
+                satisfaction_sum += bucket.satisfaction_sum
+                satisfaction_count += bucket.satisfaction_count
+                agent_distribution += bucket.agent_distribution
             
             # Node performance summary
             node_performance = {}
@@ -489,14 +956,29 @@ class LearningRouterNode(RouterNode):
                     'total_requests': metrics.total_requests
                 }
             
+            # Agent performance summary from the running aggregates
+            agent_performance = {}
+            for agent, stats in self.agent_performance.items():
+                if not stats.total_requests:
+                    continue
+                agent_performance[agent.value] = {
+                    'total_requests': stats.total_requests,
+                    'success_rate': stats.success_rate,
+                    'avg_confidence': stats.avg_confidence,
+                    'avg_satisfaction': stats.avg_satisfaction,
+                    'avg_resolution_time': stats.avg_resolution_time,
+                    'escalation_rate': stats.escalation_rate
+                }
+            
             return {
                 'total_decisions': total_decisions,
-                'recent_decisions': len(recent_decisions),
-                'success_rate': len(successful_decisions) / len(recent_decisions) if recent_decisions else 0.0,
-                'avg_satisfaction': statistics.mean(satisfaction_scores) if satisfaction_scores else 0.0,
+                'recent_decisions': recent_decisions,
+                'success_rate': successful_decisions / recent_decisions if recent_decisions else 0.0,
+                'avg_satisfaction': satisfaction_sum / satisfaction_count if satisfaction_count else 0.0,
                 'learning_enabled': self.learning_enabled,
                 'agent_distribution': dict(agent_distribution),
                 'node_performance': node_performance,
+                'agent_performance': agent_performance,
                 'learning_window_hours': self.learning_window_hours,
                 'last_updated': datetime.utcnow().isoformat()
             }
@@ -505,28 +987,39 @@ class LearningRouterNode(RouterNode):
             logger.error("Failed to get learning metrics", error=str(e))
             return {'error': str(e)}
     
+    def iter_decisions(self) -> Iterator[Dict[str, Any]]:
+        """
+        Yield exported decisions one at a time, oldest first.
+        
+        Walks the sequence index rather than the history deque, so decisions
+        recorded or evicted while a consumer is streaming do not break iteration.
+        """
+        end_seq = self._next_seq
+        for seq in range(end_seq - len(self.decision_history), end_seq):
+            d = self._decisions_by_seq.get(seq)
+            if d is None:  # Evicted since the export started
+                continue
+            yield {
+                'decision_id': d.decision_id,
+                'session_id': d.session_id,
+                'user_query': d.user_query,
+                'selected_agent': d.selected_agent.value,
+                'routing_method': d.routing_method.value,
+                'confidence': d.confidence,
+                'latency_ms': d.latency_ms,
+                'timestamp': datetime.utcfromtimestamp(d.timestamp).isoformat(),
+                'success': d.success,
+                'user_satisfaction': d.user_satisfaction,
+                'resolution_time': d.resolution_time,
+                'escalated': d.escalated,
+                'feedback': {k.value: v for k, v in d.feedback.items()}
+            }
+    
     def export_learning_data(self) -> Dict[str, Any]:
         """Export learning data for analysis or backup."""
         try:
             return {
-                'decision_history': [
-                    {
-                        'decision_id': d.decision_id,
-                        'session_id': d.session_id,
-                        'user_query': d.user_query,
-                        'selected_agent': d.selected_agent.value,
-                        'routing_method': d.routing_method.value,
-                        'confidence': d.confidence,
-                        'latency_ms': d.latency_ms,
-                        'timestamp': d.timestamp.isoformat(),
-                        'success': d.success,
-                        'user_satisfaction': d.user_satisfaction,
-                        'resolution_time': d.resolution_time,
-                        'escalated': d.escalated,
-                        'feedback': {k.value: v for k, v in d.feedback.items()}
-                    }
-                    for d in self.decision_history
-                ],
+                'decision_history': list(self.iter_decisions()),
                 'node_metrics': {
                     node_type: {
                         'total_requests': metrics.total_requests,
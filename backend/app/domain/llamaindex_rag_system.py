@@ -5,11 +5,26 @@ This module provides advanced RAG capabilities using LlamaIndex framework
 while leveraging AgentHive's existing PostgreSQL + pgvector infrastructure.
 """
 
-from typing import List, Dict, Any, Optional, Union, AsyncIterator
+from typing import List, Dict, Any, Awaitable, Callable, Optional, Tuple, TypeVar, Union, AsyncIterator
 import asyncio
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from datetime import datetime
+import hashlib
+import itertools
 import json
+import os
+import string
+import time
+
+import asyncpg
+import httpx
+import numpy as np
+import openai
+import orjson
+from openai import AsyncOpenAI
+from tenacity import AsyncRetrying, RetryCallState, retry_if_exception_type, stop_after_attempt, wait_exponential_jitter
 
 from llama_index.core import VectorStoreIndex, ServiceContext, Document
 from llama_index.core.node_parser import SimpleNodeParser
@@ -21,14 +36,252 @@ from llama_index.core.retrievers import VectorIndexRetriever
 from llama_index.core.query_engine import RetrieverQueryEngine
 from llama_index.core.postprocessor import SimilarityPostprocessor
 from llama_index.readers.file import SimpleDirectoryReader, PDFReader
-from llama_index.core.schema import NodeWithScore, QueryBundle
+from llama_index.core.vector_stores import MetadataFilter, MetadataFilters
+from llama_index.core.schema import BaseNode, MetadataMode, NodeWithScore, QueryBundle
 from llama_index.core.callbacks import CallbackManager, LlamaDebugHandler
+from llama_index.core.prompts.default_prompts import DEFAULT_TEXT_QA_PROMPT
 
 from ..core.observability import get_logger, with_tracing
 from ..core.config import settings
 
 logger = get_logger(__name__)
 
+EMBEDDINGS_TABLE = "document_embeddings"
+EMBEDDINGS_DATA_TABLE = f"data_{EMBEDDINGS_TABLE}"  # PGVectorStore prefixes its table name
+EMBED_DIM = 1536  # OpenAI embedding dimension
+EMBEDDING_MODEL = "text-embedding-ada-002"
+
+# Polling bounds for OpenAI Batch API embedding jobs
+_BATCH_POLL_INITIAL_SECONDS = 5.0
+_BATCH_POLL_MAX_SECONDS = 300.0
+_BATCH_TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+# Errors worth retrying: rate limits, 5xx responses, timeouts and dropped
+# connections. Other API errors (bad requests, auth, 4xx) fail on the first try
+_TRANSIENT_ERRORS = (
+    openai.RateLimitError,
+    openai.APIConnectionError,
+    openai.APITimeoutError,
+    openai.InternalServerError,
+    httpx.TransportError,
+)
+
+T = TypeVar("T")
+
+# HNSW (m, ef_construction, ef_search) tiers by corpus size: small corpora keep
+# the cheap defaults, larger ones get a denser graph and a wider search beam
+_HNSW_TIERS = [
+    (100_000, (16, 64, 40)),
+    (1_000_000, (24, 100, 100)),
+]
+_HNSW_LARGE = (32, 128, 200)
+
+
+def configure_hnsw_params(vector_count: int) -> Dict[str, int]:
+    """Pick HNSW index and search parameters for a corpus of this size."""
+    m, ef_construction, ef_search = _HNSW_LARGE
+    for max_vectors, tier in _HNSW_TIERS:
+        if vector_count < max_vectors:
+            m, ef_construction, ef_search = tier
+            break
+    
+    return {
+        "hnsw_m": m,
+        "hnsw_ef_construction": ef_construction,
+        "hnsw_ef_search": ef_search,
+    }
+
+
+class SemanticQueryCache:
+    """
+    Cache of query results keyed by query embedding.
+    
+    A lookup returns the stored result of the most similar cached query when
+    its cosine similarity clears the threshold. Embeddings are kept normalized
+    in one NumPy matrix, so a lookup is a single matrix-vector product; when
+    the cache is full the oldest entry is overwritten.
+    """
+    
+    def __init__(
+        self,
+        dim: int = 1536,
+        max_entries: int = 1024,
+        similarity_threshold: float = 0.95,
+        ttl_seconds: float = 3600.0
+    ):
+        self.similarity_threshold = similarity_threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._vectors = np.zeros((max_entries, dim), dtype=np.float32)
+        self._expires_at = np.zeros(max_entries, dtype=np.float64)  # 0 marks an empty slot
+        self._key_hashes = np.zeros(max_entries, dtype=np.int64)
+        self._entries: List[Optional[Tuple[Any, Dict[str, Any]]]] = [None] * max_entries
+        self._next_slot = 0
+        self.hits = 0
+        self.misses = 0
+    
+    @staticmethod
+    def _normalize(embedding: List[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+    
+    def lookup(self, embedding: List[float], key: Any = None) -> Optional[Dict[str, Any]]:
+        """Return the cached result for a similar query with the same key, if any."""
+        live = (self._expires_at > time.time()) & (self._key_hashes == hash(key))
+        if live.any():
+            similarities = self._vectors @ self._normalize(embedding)
+            similarities[~live] = -1.0
+            slot = int(np.argmax(similarities))
+            entry = self._entries[slot]
+            if similarities[slot] >= self.similarity_threshold and entry is not None and entry[0] == key:
+                self.hits += 1
+                return entry[1]
+        
+        self.misses += 1
+        return None
+    
+    def add(self, embedding: List[float], result: Dict[str, Any], key: Any = None) -> None:
+        """Store a result, overwriting the oldest entry when full."""
+        slot = self._next_slot
+        self._next_slot = (slot + 1) % self.max_entries
+        self._vectors[slot] = self._normalize(embedding)
+        self._expires_at[slot] = time.time() + self.ttl_seconds
+        self._key_hashes[slot] = hash(key)
+        self._entries[slot] = (key, result)
+    
+    def clear(self) -> None:
+        """Drop every entry, e.g. once new documents make cached answers stale."""
+        self._expires_at[:] = 0
+        self._entries = [None] * self.max_entries
+        self._next_slot = 0
+    
+    def stats(self) -> Dict[str, Any]:
+        """Hit rate and occupancy for monitoring."""
+        lookups = self.hits + self.misses
+        return {
+            "entries": int((self._expires_at > time.time()).sum()),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
+
+
+# Prompt templates for query decomposition, compiled once at import
+_DECOMPOSITION_TEMPLATE = string.Template(
+    "Break down this complex query into $max_sub_queries simpler, focused sub-queries:\n\n"
+    "Query: $query\n\n"
+    "Return only the sub-queries, one per line, without numbering or explanation."
+)
+_SYNTHESIS_TEMPLATE = string.Template(
+    "Based on the following sub-query results, provide a comprehensive answer to the original query:\n\n"
+    "Original Query: $query\n\n"
+    "Sub-query Results:\n$sub_results\n\n"
+    "Provide a clear, comprehensive answer that synthesizes information from all relevant sub-queries."
+)
+
+
+# Markers suggesting a query has several parts worth decomposing
+_MULTI_PART_MARKERS = (" and ", " also ", ";", " compare ", " vs ")
+
+
+def _looks_decomposable(query: str, min_words: int) -> bool:
+    """Cheap check for whether a query is long or multi-part enough to split."""
+    if len(query.split(maxsplit=min_words)) >= min_words:
+        return True
+    lowered = f" {query.lower()} "
+    return any(marker in lowered for marker in _MULTI_PART_MARKERS)
+
+
+def _source_node_dict(node: NodeWithScore) -> Dict[str, Any]:
+    """Serialize a retrieved node for query results."""
+    return {
+        "content": node.node.text,
+        "metadata": node.node.metadata,
+        "score": node.score,
+        "node_id": node.node.node_id
+    }
+
+
+def _compact_for_synthesis(
+    sub_results: List[Dict[str, Any]],
+    max_sources: int = 3,
+    max_snippet_chars: int = 300
+) -> List[Dict[str, Any]]:
+    """Project sub-query results down to what the synthesis prompt needs."""
+    return [
+        {
+            "q": sub_result["sub_query"],
+            "a": sub_result["result"]["response"],
+            "ctx": [
+                node["content"][:max_snippet_chars]
+                for node in sub_result["result"]["source_nodes"][:max_sources]
+            ]
+        }
+        for sub_result in sub_results
+        if "result" in sub_result
+    ]
+
+
+# Worker processes for chunking large ingests, created on first use
+_chunk_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _get_chunk_pool() -> ProcessPoolExecutor:
+    """Return the shared chunking process pool."""
+    global _chunk_pool
+    if _chunk_pool is None:
+        _chunk_pool = ProcessPoolExecutor(max_workers=os.cpu_count())
+    return _chunk_pool
+
+
+def _build_node_parser(chunk_size: int, chunk_overlap: int) -> SimpleNodeParser:
+    """Node parser used for ingestion, in-process and in chunking workers."""
+    text_splitter = TokenTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        separator=" "
+    )
+    
+    return SimpleNodeParser(
+        text_splitter=text_splitter,
+        include_metadata=True,
+        include_prev_next_rel=True
+    )
+
+
+def _parse_shard(documents: List[Document], chunk_size: int, chunk_overlap: int) -> List[BaseNode]:
+    """Chunk one shard of documents; runs in a worker process."""
+    return _build_node_parser(chunk_size, chunk_overlap).get_nodes_from_documents(documents)
+
+
+def _load_document(
+    doc: Union[str, Path, Document],
+    metadata: Optional[Dict[str, Any]] = None
+) -> Tuple[List[Document], Optional[str]]:
+    """Load and tag one ingestion input; returns the documents or an error message."""
+    try:
+        loaded_docs: List[Document] = []
+        if isinstance(doc, (str, Path)):
+            # Load document from file path
+            if Path(doc).suffix.lower() == '.pdf':
+                reader = PDFReader()
+                loaded_docs = reader.load_data(file=Path(doc))
+            else:
+                reader = SimpleDirectoryReader(input_files=[str(doc)])
+                loaded_docs = reader.load_data()
+        
+        elif isinstance(doc, Document):
+            loaded_docs = [doc]
+        
+        if metadata:
+            for loaded_doc in loaded_docs:
+                loaded_doc.metadata.update(metadata)
+        return loaded_docs, None
+        
+    except Exception as e:
+        return [], f"Error processing document {doc}: {str(e)}"
+
 
 class EnterpriseRAGSystem:
     """
@@ -47,9 +300,13 @@ class EnterpriseRAGSystem:
         self.index: Optional[VectorStoreIndex] = None
         self.service_context: Optional[ServiceContext] = None
         self.query_engine: Optional[RetrieverQueryEngine] = None
+        self._retrievers: Dict[int, VectorIndexRetriever] = {}
+        self._query_engines: Dict[int, RetrieverQueryEngine] = {}
         self.embedding_model: Optional[OpenAIEmbedding] = None
         self.llm: Optional[OpenAI] = None
         self.node_parser: Optional[SimpleNodeParser] = None
+        self._http: Optional[httpx.AsyncClient] = None
+        self._openai_client: Optional[AsyncOpenAI] = None
         
         # Configuration
         self.chunk_size = 512
@@ -57,17 +314,47 @@ class EnterpriseRAGSystem:
         self.similarity_threshold = 0.7
         self.top_k_retrieval = 10
         self.max_tokens = 1500
+        self.synthesis_max_tokens = 800  # Cap on the decomposition synthesis answer
+        self.decomposition_min_words = 12  # Shorter queries without multi-part markers skip decomposition
+        self.hnsw_params = configure_hnsw_params(0)
+        self.use_halfvec = False  # Store embeddings as halfvec (needs pgvector >= 0.7)
+        self.bulk_ingest_threshold = 500  # Nodes above which ingestion embeds via the Batch API
+        self.insert_batch_size = 500  # Nodes written to the index per worker-thread call
+        self.parallel_parse_min_chars = 200_000  # Ingest size at which chunking moves to worker processes
+        self.ingest_concurrency = getattr(settings, "RAG_INGEST_CONCURRENCY", 8)  # Files loaded at once
+        self.sub_query_concurrency = 3  # Decomposed sub-queries in flight at once
+        
+        # Results of recent queries, reused for paraphrased repeats
+        self.query_cache = SemanticQueryCache(dim=EMBED_DIM, similarity_threshold=0.95)
+        
+        # Sub-queries produced for recent complex queries, keyed by normalized query hash
+        self.max_decomposition_cache_size = 4096
+        self._decomposition_cache: "OrderedDict[str, List[str]]" = OrderedDict()
+        self.decomposition_cache_hits = 0
         
-        # Callback handler for debugging
-        self.debug_handler = LlamaDebugHandler(print_trace_on_end=True)
-        self.callback_manager = CallbackManager([self.debug_handler])
+        # Callback handler for debugging; it prints a trace to stdout after every
+        # call, so it is only attached in development
+        self.debug_handler: Optional[LlamaDebugHandler] = None
+        if settings.DEBUG and settings.ENVIRONMENT == "development":
+            self.debug_handler = LlamaDebugHandler(print_trace_on_end=True)
+        self.callback_manager = CallbackManager([self.debug_handler] if self.debug_handler else [])
     
     async def initialize(self) -> None:
         """Initialize the RAG system with existing PostgreSQL infrastructure."""
+        if self.query_engine is not None:
+            return  # Already initialized; re-entry is a no-op
+        
         try:
+            # Pooled HTTP client for direct OpenAI calls (batch embedding jobs)
+            self._http = httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=100, max_keepalive_connections=50),
+                timeout=60
+            )
+            self._openai_client = AsyncOpenAI(http_client=self._http)
+            
             # Initialize embedding model
             self.embedding_model = OpenAIEmbedding(
-                model="text-embedding-ada-002",
+                model=EMBEDDING_MODEL,
                 embed_batch_size=100
             )
             
@@ -78,6 +365,14 @@ class EnterpriseRAGSystem:
                 max_tokens=self.max_tokens
             )
             
+            # Size HNSW parameters to the current corpus
+            vector_count = await self._estimate_vector_count()
+            self.hnsw_params = configure_hnsw_params(vector_count)
+            logger.info(f"Using HNSW parameters {self.hnsw_params} for ~{vector_count} vectors")
+            
+            if self.use_halfvec:
+                await self._ensure_halfvec()
+            
             # Connect to existing PostgreSQL + pgvector
             self.vector_store = PGVectorStore.from_params(
                 database=settings.DATABASE_NAME,
@@ -85,27 +380,13 @@ class EnterpriseRAGSystem:
                 password=settings.DATABASE_PASSWORD,
                 port=settings.DATABASE_PORT,
                 user=settings.DATABASE_USER,
-                table_name="document_embeddings",
-                embed_dim=1536,  # OpenAI embedding dimension
-                hnsw_kwargs={
-                    "hnsw_m": 16,
-                    "hnsw_ef_construction": 64,
-                    "hnsw_ef_search": 40,
-                }
+                table_name=EMBEDDINGS_TABLE,
+                embed_dim=EMBED_DIM,
+                hnsw_kwargs=dict(self.hnsw_params)
             )
             
             # Initialize node parser with advanced chunking
-            text_splitter = TokenTextSplitter(
-                chunk_size=self.chunk_size,
-                chunk_overlap=self.chunk_overlap,
-                separator=" "
-            )
-            
-            self.node_parser = SimpleNodeParser(
-                text_splitter=text_splitter,
-                include_metadata=True,
-                include_prev_next_rel=True
-            )
+            self.node_parser = _build_node_parser(self.chunk_size, self.chunk_overlap)
             
             # Create service context
             self.service_context = ServiceContext.from_defaults(
@@ -127,6 +408,115 @@ class EnterpriseRAGSystem:
             logger.error(f"Failed to initialize RAG system: {e}")
             raise RuntimeError(f"RAG system initialization failed: {e}")
     
+    async def _retry(
+        self,
+        fn: Callable[..., Awaitable[T]],
+        *args: Any,
+        attempts: int = 5,
+        base: float = 1.0,
+        stats: Optional[Dict[str, Any]] = None,
+        **kwargs: Any
+    ) -> T:
+        """
+        Await fn(*args, **kwargs), retrying transient OpenAI/HTTP errors.
+        
+        Waits grow exponentially from `base` seconds with a little jitter.
+        Retries are logged and, when `stats` is given, counted in stats["retried"].
+        """
+        def log_retry(retry_state: RetryCallState) -> None:
+            if stats is not None:
+                stats["retried"] = stats.get("retried", 0) + 1
+            logger.warning(
+                f"Retrying {getattr(fn, '__name__', fn)} after attempt {retry_state.attempt_number}: "
+                f"{retry_state.outcome.exception()}"
+            )
+        
+        async for attempt in AsyncRetrying(
+            stop=stop_after_attempt(attempts),
+            wait=wait_exponential_jitter(initial=base, jitter=0.2),
+            retry=retry_if_exception_type(_TRANSIENT_ERRORS),
+            before_sleep=log_retry,
+            reraise=True
+        ):
+            with attempt:
+                return await fn(*args, **kwargs)
+    
+    async def _connect(self) -> asyncpg.Connection:
+        """Open a direct connection to the embeddings database."""
+        return await asyncpg.connect(
+            database=settings.DATABASE_NAME,
+            host=settings.DATABASE_HOST,
+            password=settings.DATABASE_PASSWORD,
+            port=settings.DATABASE_PORT,
+            user=settings.DATABASE_USER
+        )
+    
+    async def _estimate_vector_count(self) -> int:
+        """Estimate the embeddings row count from planner statistics (no table scan)."""
+        try:
+            conn = await self._connect()
+            try:
+                count = await conn.fetchval(
+                    "SELECT max(reltuples)::bigint FROM pg_class WHERE relname = ANY($1::text[])",
+                    [EMBEDDINGS_TABLE, EMBEDDINGS_DATA_TABLE]
+                )
+            finally:
+                await conn.close()
+            
+            # reltuples is -1 for tables that have never been analyzed
+            return max(count or 0, 0)
+            
+        except Exception as e:
+            logger.warning(f"Could not estimate vector count, using default HNSW parameters: {e}")
+            return 0
+    
+    async def _ensure_halfvec(self) -> None:
+        """
+        Convert the embedding column to halfvec and rebuild its HNSW index.
+        
+        A one-time migration: it is skipped when the table does not exist yet
+        or the column is already halfvec. Half-precision vectors halve the
+        bytes read per distance computation.
+        """
+        conn = await self._connect()
+        try:
+            column_type = await conn.fetchval(
+                """
+                SELECT format_type(atttypid, atttypmod) FROM pg_attribute
+                WHERE attrelid = to_regclass($1) AND attname = 'embedding'
+                """,
+                EMBEDDINGS_DATA_TABLE
+            )
+            if column_type is None or column_type.startswith("halfvec"):
+                return
+            
+            hnsw_indexes = await conn.fetch(
+                """
+                SELECT indexname FROM pg_indexes
+                WHERE tablename = $1 AND indexdef ILIKE '%USING hnsw%'
+                """,
+                EMBEDDINGS_DATA_TABLE
+            )
+            
+            logger.info(f"Migrating {EMBEDDINGS_DATA_TABLE}.embedding from {column_type} to halfvec({EMBED_DIM})")
+            async with conn.transaction():
+                await conn.execute("SET LOCAL maintenance_work_mem = '2GB'")
+                await conn.execute("SET LOCAL max_parallel_maintenance_workers = 7")
+                for row in hnsw_indexes:
+                    await conn.execute(f'DROP INDEX IF EXISTS "{row["indexname"]}"')
+                await conn.execute(
+                    f"ALTER TABLE {EMBEDDINGS_DATA_TABLE} ALTER COLUMN embedding "
+                    f"TYPE halfvec({EMBED_DIM}) USING embedding::halfvec({EMBED_DIM})"
+                )
+                await conn.execute(
+                    f"CREATE INDEX {EMBEDDINGS_DATA_TABLE}_embedding_halfvec_idx "
+                    f"ON {EMBEDDINGS_DATA_TABLE} USING hnsw (embedding halfvec_cosine_ops) "
+                    f"WITH (m = {self.hnsw_params['hnsw_m']}, "
+                    f"ef_construction = {self.hnsw_params['hnsw_ef_construction']})"
+                )
+        finally:
+            await conn.close()
+    
     async def _initialize_index(self) -> None:
         """Initialize or load the vector index."""
         try:
@@ -149,30 +539,73 @@ class EnterpriseRAGSystem:
     
     async def _setup_query_engine(self) -> None:
         """Setup advanced query engine with retrieval and post-processing."""
-        # Create retriever with configurable parameters
-        retriever = VectorIndexRetriever(
+        self._retrievers.clear()
+        self._query_engines.clear()
+        self.query_engine = self._get_query_engine(self.top_k_retrieval)
+    
+    def _build_retriever(self, top_k: int, filters: Optional[Dict[str, Any]] = None) -> VectorIndexRetriever:
+        """Create a retriever, pushing metadata filters down into the vector store query."""
+        # ef_search is passed per query so the vector store sets it inside the
+        # query transaction rather than for the whole database; the beam must
+        # be at least a few times wider than the number of results wanted
+        ef_search = max(top_k * 4, self.hnsw_params["hnsw_ef_search"])
+        metadata_filters = None
+        if filters:
+            # Filtered-out hits shrink the HNSW candidate pool, so search wider
+            ef_search = max(top_k * 8, 100, ef_search)
+            metadata_filters = MetadataFilters(
+                filters=[MetadataFilter(key=key, value=value) for key, value in filters.items()]
+            )
+        
+        return VectorIndexRetriever(
             index=self.index,
-            similarity_top_k=self.top_k_retrieval,
-            vector_store_query_mode="default"
+            similarity_top_k=top_k,
+            vector_store_query_mode="default",
+            filters=metadata_filters,
+            vector_store_kwargs={"hnsw_ef_search": ef_search}
         )
-        
+    
+    def _build_query_engine(self, retriever: VectorIndexRetriever) -> RetrieverQueryEngine:
+        """Wrap a retriever with post-processing and synthesis."""
         # Add post-processors for filtering and re-ranking
         postprocessors = [
             SimilarityPostprocessor(similarity_cutoff=self.similarity_threshold)
         ]
         
-        # Create query engine
-        self.query_engine = RetrieverQueryEngine(
+        return RetrieverQueryEngine(
             retriever=retriever,
             node_postprocessors=postprocessors,
             service_context=self.service_context
         )
     
+    def _get_retriever(self, top_k: int, filters: Optional[Dict[str, Any]] = None) -> VectorIndexRetriever:
+        """Return the shared retriever for this top_k; filtered retrievers are built per call."""
+        if filters:
+            return self._build_retriever(top_k, filters)
+        
+        retriever = self._retrievers.get(top_k)
+        if retriever is None:
+            retriever = self._build_retriever(top_k)
+            self._retrievers[top_k] = retriever
+        return retriever
+    
+    def _get_query_engine(self, top_k: int, filters: Optional[Dict[str, Any]] = None) -> RetrieverQueryEngine:
+        """Return the shared query engine for this top_k; filtered engines are built per call."""
+        if filters:
+            return self._build_query_engine(self._get_retriever(top_k, filters))
+        
+        query_engine = self._query_engines.get(top_k)
+        if query_engine is None:
+            query_engine = self._build_query_engine(self._get_retriever(top_k))
+            self._query_engines[top_k] = query_engine
+        return query_engine
+    
     @with_tracing("rag_ingest_documents")
     async def ingest_documents(
         self, 
         documents: List[Union[str, Path, Document]], 
-        metadata: Optional[Dict[str, Any]] = None
+        metadata: Optional[Dict[str, Any]] = None,
+        bulk: bool = False
     ) -> Dict[str, Any]:
         """
         Ingest documents into the RAG system.
@@ -180,6 +613,10 @@ class EnterpriseRAGSystem:
         Args:
             documents: List of file paths, Document objects, or text content
             metadata: Optional metadata to attach to documents
+            bulk: Embed large jobs (over bulk_ingest_threshold nodes) through
+                the OpenAI Batch API instead of the interactive endpoint. Batch
+                jobs have a 24h completion window and this call waits for them,
+                so only offline jobs should opt in
             
         Returns:
             Ingestion statistics and results
@@ -190,44 +627,42 @@ class EnterpriseRAGSystem:
                 "total_documents": len(documents),
                 "processed_documents": 0,
                 "total_nodes": 0,
+                "retried": 0,
+                "ingested_batches": 0,
                 "errors": []
             }
             
-            for doc in documents:
-                try:
-                    if isinstance(doc, (str, Path)):
-                        # Load document from file path
-                        if Path(doc).suffix.lower() == '.pdf':
-                            reader = PDFReader()
-                            loaded_docs = reader.load_data(file=Path(doc))
-                        else:
-                            reader = SimpleDirectoryReader(input_files=[str(doc)])
-                            loaded_docs = reader.load_data()
-                        
-                        for loaded_doc in loaded_docs:
-                            if metadata:
-                                loaded_doc.metadata.update(metadata)
-                            processed_docs.append(loaded_doc)
-                    
-                    elif isinstance(doc, Document):
-                        if metadata:
-                            doc.metadata.update(metadata)
-                        processed_docs.append(doc)
-                    
-                    stats["processed_documents"] += 1
-                    
-                except Exception as e:
-                    error_msg = f"Error processing document {doc}: {str(e)}"
+            # Load files in worker threads, bounded so large uploads don't
+            # exhaust the default executor
+            semaphore = asyncio.Semaphore(self.ingest_concurrency)
+            
+            async def load_bounded(doc):
+                async with semaphore:
+                    return await asyncio.to_thread(_load_document, doc, metadata)
+            
+            results = await asyncio.gather(*(load_bounded(doc) for doc in documents))
+            
+            for loaded_docs, error_msg in results:
+                if error_msg:
                     logger.error(error_msg)
                     stats["errors"].append(error_msg)
+                    continue
+                processed_docs.extend(loaded_docs)
+                stats["processed_documents"] += 1
             
             if processed_docs:
-                # Parse documents into nodes
-                nodes = self.node_parser.get_nodes_from_documents(processed_docs)
+                nodes = await self._parse_documents(processed_docs)
                 stats["total_nodes"] = len(nodes)
                 
                 # Add nodes to index
-                self.index.insert_nodes(nodes)
+                try:
+                    if bulk and len(nodes) > self.bulk_ingest_threshold:
+                        await self._insert_nodes_bulk(nodes, stats)
+                    else:
+                        await self._insert_in_batches(self.index.insert_nodes, nodes, stats)
+                finally:
+                    # Cached answers predate the new documents, even after a partial insert
+                    self.query_cache.clear()
                 
                 logger.info(f"Successfully ingested {len(processed_docs)} documents, {len(nodes)} nodes")
             
@@ -237,6 +672,122 @@ class EnterpriseRAGSystem:
             logger.error(f"Document ingestion failed: {e}")
             raise RuntimeError(f"Failed to ingest documents: {e}")
     
+    async def _parse_documents(self, documents: List[Document]) -> List[BaseNode]:
+        """
+        Chunk documents into nodes off the event loop.
+        
+        Small ingests are parsed in a worker thread; large ones are split into
+        per-CPU shards on document boundaries and parsed in worker processes,
+        since chunking is mostly Python-level CPU work.
+        """
+        total_chars = sum(len(doc.text) for doc in documents)
+        if total_chars < self.parallel_parse_min_chars or len(documents) < 2:
+            return await asyncio.to_thread(self.node_parser.get_nodes_from_documents, documents)
+        
+        shard_count = min(len(documents), os.cpu_count() or 1)
+        shards = [documents[i::shard_count] for i in range(shard_count)]
+        
+        loop = asyncio.get_running_loop()
+        pool = _get_chunk_pool()
+        node_lists = await asyncio.gather(*(
+            loop.run_in_executor(pool, _parse_shard, shard, self.chunk_size, self.chunk_overlap)
+            for shard in shards
+        ))
+        return list(itertools.chain.from_iterable(node_lists))
+    
+    async def _insert_nodes_bulk(self, nodes: List[BaseNode], stats: Optional[Dict[str, Any]] = None) -> None:
+        """Embed nodes through the Batch API and write them straight to the vector store."""
+        try:
+            await self._bulk_embed_nodes(nodes, stats)
+        except Exception as e:
+            logger.warning(f"Batch embedding failed, falling back to interactive embedding: {e}")
+            await self._insert_in_batches(self.index.insert_nodes, nodes, stats)
+            return
+        
+        await self._insert_in_batches(self.vector_store.add, nodes, stats)
+    
+    async def _insert_in_batches(
+        self,
+        insert: Callable[[List[BaseNode]], Any],
+        nodes: List[BaseNode],
+        stats: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """
+        Write nodes in fixed-size batches, each in a worker thread.
+        
+        Keeps the event loop free during large ingests and bounds the size of
+        each insert transaction and HNSW index update.
+        """
+        for start in range(0, len(nodes), self.insert_batch_size):
+            await asyncio.to_thread(insert, nodes[start:start + self.insert_batch_size])
+            if stats is not None:
+                stats["ingested_batches"] += 1
+    
+    async def _bulk_embed_nodes(self, nodes: List[BaseNode], stats: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Set node embeddings from an OpenAI Batch API job.
+        
+        Node texts are submitted as one JSONL batch against /v1/embeddings and
+        the job is polled with exponential backoff until it finishes.
+        """
+        client = self._openai_client
+        
+        requests = "\n".join(
+            json.dumps({
+                "custom_id": node.node_id,
+                "method": "POST",
+                "url": "/v1/embeddings",
+                "body": {
+                    "model": EMBEDDING_MODEL,
+                    "input": node.get_content(metadata_mode=MetadataMode.EMBED)
+                }
+            })
+            for node in nodes
+        )
+        input_file = await self._retry(
+            client.files.create,
+            file=("embeddings.jsonl", requests.encode("utf-8")),
+            purpose="batch",
+            base=5.0,
+            stats=stats
+        )
+        batch = await self._retry(
+            client.batches.create,
+            base=5.0,
+            stats=stats,
+            input_file_id=input_file.id,
+            endpoint="/v1/embeddings",
+            completion_window="24h"
+        )
+        logger.info(f"Submitted embedding batch {batch.id} for {len(nodes)} nodes")
+        
+        delay = _BATCH_POLL_INITIAL_SECONDS
+        while batch.status not in _BATCH_TERMINAL_STATUSES:
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, _BATCH_POLL_MAX_SECONDS)
+            batch = await self._retry(client.batches.retrieve, batch.id, base=5.0, stats=stats)
+        
+        if batch.status != "completed" or not batch.output_file_id:
+            raise RuntimeError(f"Embedding batch {batch.id} ended with status {batch.status}")
+        
+        output = await self._retry(client.files.content, batch.output_file_id, base=5.0, stats=stats)
+        embeddings: Dict[str, List[float]] = {}
+        for line in output.text.splitlines():
+            if not line.strip():
+                continue
+            result = json.loads(line)
+            response = result.get("response") or {}
+            if response.get("status_code") != 200:
+                continue
+            embeddings[result["custom_id"]] = response["body"]["data"][0]["embedding"]
+        
+        missing = [node.node_id for node in nodes if node.node_id not in embeddings]
+        if missing:
+            raise RuntimeError(f"Embedding batch {batch.id} is missing {len(missing)} embeddings")
+        
+        for node in nodes:
+            node.embedding = embeddings[node.node_id]
+    
     @with_tracing("rag_query")
     async def query(
         self, 
@@ -249,7 +800,7 @@ class EnterpriseRAGSystem:
         
         Args:
             query_text: The query string
-            filters: Optional metadata filters
+            filters: Optional exact-match metadata filters, applied inside the vector search
             top_k: Number of results to retrieve
             
         Returns:
@@ -259,38 +810,83 @@ class EnterpriseRAGSystem:
             if not self.query_engine:
                 raise RuntimeError("RAG system not initialized")
             
-            # Override top_k if specified
-            if top_k:
-                self.query_engine.retriever._similarity_top_k = top_k
+            # Serve paraphrased repeats from the semantic cache. The query embedding
+            # is reused for retrieval on a miss, so the cache costs no extra call.
+            query_embedding = await self._retry(self.embedding_model.aget_query_embedding, query_text)
+            cache_key = (top_k, json.dumps(filters, sort_keys=True, default=str))
+            cached = self.query_cache.lookup(query_embedding, key=cache_key)
+            if cached is not None:
+                return {**cached, "query": query_text, "cached": True}
+            
+            # Engines are per top_k, so concurrent queries never share a mutated retriever
+            query_engine = self._get_query_engine(top_k or self.top_k_retrieval, filters)
             
             # Execute query
-            response = await asyncio.to_thread(
-                self.query_engine.query,
-                QueryBundle(query_str=query_text)
+            response = await self._retry(
+                query_engine.aquery,
+                QueryBundle(query_str=query_text, embedding=query_embedding)
             )
             
             # Extract source nodes and metadata
-            source_nodes = []
-            for node in response.source_nodes:
-                source_nodes.append({
-                    "content": node.node.text,
-                    "metadata": node.node.metadata,
-                    "score": node.score,
-                    "node_id": node.node.node_id
-                })
+            source_nodes = [_source_node_dict(node) for node in response.source_nodes]
             
-            return {
+            result = {
                 "response": str(response),
                 "source_nodes": source_nodes,
                 "query": query_text,
                 "total_sources": len(source_nodes),
                 "timestamp": datetime.utcnow().isoformat()
             }
+            self.query_cache.add(query_embedding, result, key=cache_key)
+            return result
             
         except Exception as e:
             logger.error(f"RAG query failed: {e}")
             raise RuntimeError(f"Failed to execute RAG query: {e}")
     
+    async def query_stream(
+        self,
+        query_text: str,
+        filters: Optional[Dict[str, Any]] = None,
+        top_k: Optional[int] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Query the RAG system, streaming the answer as it is generated.
+        
+        Yields {"delta": text} chunks from the LLM, then one final event with
+        the source nodes, so chat clients can render tokens before synthesis
+        finishes. The semantic cache is not consulted.
+        
+        Args:
+            query_text: The query string
+            filters: Optional exact-match metadata filters, applied inside the vector search
+            top_k: Number of results to retrieve
+        """
+        if not self.query_engine:
+            raise RuntimeError("RAG system not initialized")
+        
+        retriever = self._get_retriever(top_k or self.top_k_retrieval, filters)
+        nodes = await self._retry(retriever.aretrieve, QueryBundle(query_str=query_text))
+        nodes = SimilarityPostprocessor(
+            similarity_cutoff=self.similarity_threshold
+        ).postprocess_nodes(nodes)
+        
+        prompt = DEFAULT_TEXT_QA_PROMPT.format(
+            context_str="\n\n".join(node.node.get_content() for node in nodes),
+            query_str=query_text
+        )
+        stream = await self._retry(self.llm.astream_complete, prompt)
+        async for chunk in stream:
+            if chunk.delta:
+                yield {"delta": chunk.delta}
+        
+        yield {
+            "source_nodes": [_source_node_dict(node) for node in nodes],
+            "query": query_text,
+            "total_sources": len(nodes),
+            "timestamp": datetime.utcnow().isoformat()
+        }
+    
     async def query_with_decomposition(
         self, 
         complex_query: str,
@@ -306,51 +902,44 @@ class EnterpriseRAGSystem:
         Returns:
             Comprehensive results from sub-query synthesis
         """
+        # Short single-part queries can't usefully decompose; skip the LLM round-trip
+        if not _looks_decomposable(complex_query, self.decomposition_min_words):
+            return await self.query(complex_query)
+        
         try:
-            # Use LLM to decompose query
-            decomposition_prompt = f"""
-            Break down this complex query into {max_sub_queries} simpler, focused sub-queries:
+            sub_queries = await self._decompose_query(complex_query, max_sub_queries)
             
-            Query: {complex_query}
+            # Execute sub-queries concurrently, bounded to avoid rate-limit spikes
+            semaphore = asyncio.Semaphore(self.sub_query_concurrency)
             
-            Return only the sub-queries, one per line, without numbering or explanation.
-            """
+            async def run_sub_query(sub_query: str) -> Dict[str, Any]:
+                async with semaphore:
+                    return await self.query(sub_query, top_k=5)
             
-            decomposition_response = await asyncio.to_thread(
-                self.llm.complete,
-                decomposition_prompt
+            results = await asyncio.gather(
+                *(run_sub_query(sub_query) for sub_query in sub_queries),
+                return_exceptions=True
             )
             
-            sub_queries = [
-                q.strip() 
-                for q in str(decomposition_response).split('\n') 
-                if q.strip()
-            ][:max_sub_queries]
-            
-            # Execute sub-queries
             sub_results = []
-            for sub_query in sub_queries:
-                result = await self.query(sub_query, top_k=5)
-                sub_results.append({
-                    "sub_query": sub_query,
-                    "result": result
-                })
+            for sub_query, result in zip(sub_queries, results):
+                if isinstance(result, Exception):
+                    logger.warning(f"Sub-query failed: {sub_query}: {result}")
+                    sub_results.append({"sub_query": sub_query, "error": str(result)})
+                else:
+                    sub_results.append({"sub_query": sub_query, "result": result})
             
             # Synthesize results
-            synthesis_prompt = f"""
-            Based on the following sub-query results, provide a comprehensive answer to the original query:
-            
-            Original Query: {complex_query}
-            
-            Sub-query Results:
-            {json.dumps(sub_results, indent=2)}
-            
-            Provide a clear, comprehensive answer that synthesizes information from all relevant sub-queries.
-            """
+            synthesis_prompt = _SYNTHESIS_TEMPLATE.substitute(
+                query=complex_query,
+                sub_results=orjson.dumps(_compact_for_synthesis(sub_results)).decode()
+            )
             
-            synthesis_response = await asyncio.to_thread(
-                self.llm.complete,
-                synthesis_prompt
+            synthesis_response = await self._retry(
+                self.llm.acomplete,
+                synthesis_prompt,
+                max_tokens=self.synthesis_max_tokens,
+                stop=["\n\n\n"]
             )
             
             return {
@@ -367,6 +956,40 @@ class EnterpriseRAGSystem:
             # Fallback to regular query
             return await self.query(complex_query)
     
+    async def _decompose_query(self, complex_query: str, max_sub_queries: int) -> List[str]:
+        """Split a complex query into sub-queries with the LLM, memoized per normalized query."""
+        cache_key = hashlib.blake2b(
+            f"{max_sub_queries}|{complex_query.strip().lower()}".encode(),
+            digest_size=16
+        ).hexdigest()
+        
+        sub_queries = self._decomposition_cache.get(cache_key)
+        if sub_queries is not None:
+            self._decomposition_cache.move_to_end(cache_key)
+            self.decomposition_cache_hits += 1
+            return sub_queries
+        
+        # Use LLM to decompose query
+        decomposition_prompt = _DECOMPOSITION_TEMPLATE.substitute(
+            max_sub_queries=max_sub_queries,
+            query=complex_query
+        )
+        
+        decomposition_response = await self._retry(self.llm.acomplete, decomposition_prompt)
+        
+        sub_queries = [
+            q.strip() 
+            for q in str(decomposition_response).split('\n') 
+            if q.strip()
+        ][:max_sub_queries]
+        
+        if sub_queries:
+            self._decomposition_cache[cache_key] = sub_queries
+            if len(self._decomposition_cache) > self.max_decomposition_cache_size:
+                self._decomposition_cache.popitem(last=False)
+        
+        return sub_queries
+    
     async def get_similar_documents(
         self, 
         query_text: str, 
@@ -375,13 +998,8 @@ class EnterpriseRAGSystem:
     ) -> List[Dict[str, Any]]:
         """Get similar documents without LLM synthesis."""
         try:
-            retriever = VectorIndexRetriever(
-                index=self.index,
-                similarity_top_k=top_k
-            )
-            
-            nodes = await asyncio.to_thread(
-                retriever.retrieve,
+            nodes = await self._retry(
+                self._get_retriever(top_k).aretrieve,
                 QueryBundle(query_str=query_text)
             )
             
@@ -419,6 +1037,13 @@ class EnterpriseRAGSystem:
             logger.error(f"Failed to add text document: {e}")
             raise RuntimeError(f"Failed to add document: {e}")
     
+    async def close(self) -> None:
+        """Release pooled HTTP connections."""
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+            self._openai_client = None
+    
     async def get_index_stats(self) -> Dict[str, Any]:
         """Get statistics about the RAG index."""
         try:
@@ -427,10 +1052,15 @@ class EnterpriseRAGSystem:
             return {
                 "index_type": "VectorStoreIndex",
                 "vector_store": "PostgreSQL + pgvector",
-                "embedding_model": "text-embedding-ada-002",
+                "embedding_model": EMBEDDING_MODEL,
                 "chunk_size": self.chunk_size,
                 "chunk_overlap": self.chunk_overlap,
                 "similarity_threshold": self.similarity_threshold,
+                "query_cache": self.query_cache.stats(),
+                "decomposition_cache": {
+                    "entries": len(self._decomposition_cache),
+                    "hits": self.decomposition_cache_hits
+                },
                 "initialized": self.index is not None
             }
             
@@ -441,6 +1071,7 @@ class EnterpriseRAGSystem:
 
 # Global RAG system instance
 _rag_system: Optional[EnterpriseRAGSystem] = None
+_rag_init_lock = asyncio.Lock()
 
 
 async def get_rag_system() -> EnterpriseRAGSystem:
@@ -448,12 +1079,29 @@ async def get_rag_system() -> EnterpriseRAGSystem:
     global _rag_system
     
     if _rag_system is None:
-        _rag_system = EnterpriseRAGSystem()
-        await _rag_system.initialize()
+        async with _rag_init_lock:
+            # Concurrent callers wait here; only the first one initializes
+            if _rag_system is None:
+                rag_system = EnterpriseRAGSystem()
+                await rag_system.initialize()
+                _rag_system = rag_system
     
     return _rag_system
 
 
+async def shutdown_rag_system() -> None:
+    """Close the global RAG system instance and chunking workers, if they were created."""
+    global _rag_system, _chunk_pool
+    
+    if _rag_system is not None:
+        await _rag_system.close()
+        _rag_system = None
+    
+    if _chunk_pool is not None:
+        _chunk_pool.shutdown(wait=False, cancel_futures=True)
+        _chunk_pool = None
+
+
 async def query_knowledge_base(
     query: str, 
     top_k: int = 5,
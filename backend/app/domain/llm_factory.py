@@ -2,7 +2,9 @@
 Factory for creating LLM adapters with fallback support.
 """
 
-from typing import Optional
+from typing import Callable, Dict, List, Optional, Tuple, Type
+from functools import lru_cache
+import time
 import httpx
 from app.core.settings import settings
 from app.adapters.llm_ollama import OllamaAdapter
@@ -11,20 +13,63 @@ from app.core.observability import get_logger
 
 logger = get_logger(__name__)
 
+OLLAMA_PROBE_TTL_SEC = 10.0  # How long an Ollama liveness result is reused
+ADAPTER_TTL_SEC = 300.0  # How long an adapter instance is reused
+
+_probe_client: Optional[httpx.AsyncClient] = None
+_ollama_probe_cache: Optional[Tuple[float, bool]] = None
+_adapter_cache: Dict[type, Tuple[float, OllamaAdapter | OpenAIAdapter]] = {}
+
+
+def _get_probe_client() -> httpx.AsyncClient:
+    """Shared client for liveness probes, so probes reuse connections."""
+    global _probe_client
+    if _probe_client is None or _probe_client.is_closed:
+        _probe_client = httpx.AsyncClient(
+            timeout=5.0,
+            limits=httpx.Limits(max_keepalive_connections=5)
+        )
+    return _probe_client
+
 
 async def check_ollama_availability() -> bool:
-    """Check if Ollama is available and responsive."""
+    """Check if Ollama is available and responsive; results are reused briefly."""
+    global _ollama_probe_cache
+    now = time.monotonic()
+    if _ollama_probe_cache is not None and now - _ollama_probe_cache[0] < OLLAMA_PROBE_TTL_SEC:
+        return _ollama_probe_cache[1]
+    
     try:
-        async with httpx.AsyncClient(timeout=5.0) as client:
-            response = await client.get(f"{settings.OLLAMA_BASE_URL}/api/tags")
-            return response.status_code == 200
+        response = await _get_probe_client().get(f"{settings.OLLAMA_BASE_URL}/api/tags")
+        available = response.status_code == 200
     except Exception as e:
         logger.debug(f"Ollama availability check failed: {e}")
-        return False
+        available = False
+    
+    _ollama_probe_cache = (now, available)
+    return available
+
+
+def _get_adapter(adapter_cls: Type[OllamaAdapter] | Type[OpenAIAdapter]) -> OllamaAdapter | OpenAIAdapter:
+    """Return a cached adapter instance, creating a new one when missing or expired."""
+    now = time.monotonic()
+    cached = _adapter_cache.get(adapter_cls)
+    if cached is not None and now - cached[0] < ADAPTER_TTL_SEC:
+        return cached[1]
+    
+    adapter = adapter_cls()
+    _adapter_cache[adapter_cls] = (now, adapter)
+    return adapter
 
 
+@lru_cache(maxsize=1)
 def is_openai_configured() -> bool:
-    """Check if OpenAI/Azure OpenAI is properly configured."""
+    """
+    Check if OpenAI/Azure OpenAI is properly configured.
+    
+    Settings are read once at startup, so the answer is memoized; call
+    is_openai_configured.cache_clear() after changing them.
+    """
     # Check for Azure OpenAI configuration
     if (hasattr(settings, 'LLM_PROVIDER') and settings.LLM_PROVIDER.lower() == 'azure' and
         hasattr(settings, 'AZURE_OPENAI_API_KEY') and settings.AZURE_OPENAI_API_KEY and 
@@ -42,6 +87,30 @@ def is_openai_configured() -> bool:
     return False
 
 
+# Provider candidates as (name, configuration check, adapter class). Ollama
+# needs no configuration; its liveness is probed only on the async path.
+_Candidate = Tuple[str, Callable[[], bool], Type[OllamaAdapter] | Type[OpenAIAdapter]]
+
+_PROVIDER_CANDIDATES: Dict[str, _Candidate] = {
+    "openai": ("openai", is_openai_configured, OpenAIAdapter),
+    "ollama": ("ollama", lambda: True, OllamaAdapter),
+}
+
+
+def _ordered_candidates(provider: str) -> List[_Candidate]:
+    """
+    Candidates in the order they should be tried for a configured provider.
+    
+    The configured provider goes first and the other is the fallback;
+    unknown providers prefer OpenAI.
+    """
+    if provider == "ollama":
+        return [_PROVIDER_CANDIDATES["ollama"], _PROVIDER_CANDIDATES["openai"]]
+    if provider not in ("azure", "openai"):
+        logger.warning(f"Unknown LLM provider '{provider}', trying available options")
+    return [_PROVIDER_CANDIDATES["openai"], _PROVIDER_CANDIDATES["ollama"]]
+
+
 def create_llm_adapter() -> Optional[OllamaAdapter | OpenAIAdapter]:
     """
     Create an LLM adapter based on the configured provider with fallback support.
@@ -56,66 +125,18 @@ def create_llm_adapter() -> Optional[OllamaAdapter | OpenAIAdapter]:
     """
     provider = getattr(settings, 'LLM_PROVIDER', 'openai').lower()
     
-    # Try the configured provider first
-    if provider == "ollama":
+    for name, is_configured, adapter_cls in _ordered_candidates(provider):
+        if not is_configured():
+            logger.warning(f"{name} is not properly configured, skipping")
+            continue
         try:
-            logger.info("Using Ollama as the LLM provider")
-            return OllamaAdapter()
+            logger.info(f"Using {name} as the LLM provider")
+            return _get_adapter(adapter_cls)
         except Exception as e:
-            logger.warning(f"Failed to create Ollama adapter: {e}")
-            # Fall back to OpenAI if available
-            if is_openai_configured():
-                logger.info("Falling back to OpenAI")
-                return OpenAIAdapter()
-            else:
-                logger.error("No LLM provider available")
-                raise ValueError("Both Ollama and OpenAI are unavailable")
-    
-    elif provider in ["azure", "openai"]:
-        # Check if OpenAI is properly configured
-        if is_openai_configured():
-            try:
-                logger.info(f"Using {provider.upper()} as the LLM provider")
-                return OpenAIAdapter()
-            except Exception as e:
-                logger.warning(f"Failed to create OpenAI adapter: {e}")
-                # Fall back to Ollama
-                try:
-                    logger.info("Falling back to Ollama")
-                    return OllamaAdapter()
-                except Exception as ollama_error:
-                    logger.error(f"Ollama fallback also failed: {ollama_error}")
-                    raise ValueError("Both OpenAI and Ollama are unavailable")
-        else:
-            # OpenAI not configured, try Ollama
-            logger.warning("OpenAI not properly configured, trying Ollama")
-            try:
-                logger.info("Using Ollama as fallback LLM provider")
-                return OllamaAdapter()
-            except Exception as e:
-                logger.error(f"Failed to create Ollama adapter: {e}")
-                raise ValueError("OpenAI not configured and Ollama unavailable")
+            logger.warning(f"Failed to create {name} adapter: {e}")
     
-    else:
-        # Unknown provider, try both
-        logger.warning(f"Unknown LLM provider '{provider}', trying available options")
-        
-        # Try OpenAI first if configured
-        if is_openai_configured():
-            try:
-                logger.info("Using OpenAI as fallback")
-                return OpenAIAdapter()
-            except Exception:
-                pass
-        
-        # Try Ollama
-        try:
-            logger.info("Using Ollama as fallback")
-            return OllamaAdapter()
-        except Exception:
-            pass
-        
-        raise ValueError(f"Unsupported LLM provider: {provider}")
+    logger.error("No LLM provider available")
+    raise ValueError(f"No LLM provider available (configured provider: {provider})")
 
 
 async def create_llm_adapter_async() -> Optional[OllamaAdapter | OpenAIAdapter]:
@@ -124,45 +145,17 @@ async def create_llm_adapter_async() -> Optional[OllamaAdapter | OpenAIAdapter]:
     """
     provider = getattr(settings, 'LLM_PROVIDER', 'openai').lower()
     
-    # Check Ollama availability if it's the configured provider or fallback
-    ollama_available = await check_ollama_availability()
-    openai_configured = is_openai_configured()
-    
-    if provider == "ollama":
-        if ollama_available:
-            logger.info("Using Ollama as the LLM provider")
-            return OllamaAdapter()
-        elif openai_configured:
-            logger.info("Ollama unavailable, falling back to OpenAI")
-            return OpenAIAdapter()
-        else:
-            raise ValueError("Ollama unavailable and OpenAI not configured")
-    
-    elif provider in ["azure", "openai"]:
-        if openai_configured:
-            try:
-                logger.info(f"Using {provider.upper()} as the LLM provider")
-                return OpenAIAdapter()
-            except Exception as e:
-                logger.warning(f"OpenAI failed: {e}")
-                if ollama_available:
-                    logger.info("Falling back to Ollama")
-                    return OllamaAdapter()
-                else:
-                    raise ValueError("OpenAI failed and Ollama unavailable")
-        elif ollama_available:
-            logger.info("OpenAI not configured, using Ollama")
-            return OllamaAdapter()
-        else:
-            raise ValueError("OpenAI not configured and Ollama unavailable")
+    for name, is_configured, adapter_cls in _ordered_candidates(provider):
+        if not is_configured():
+            continue
+        # Probe Ollama only when it is the candidate being considered
+        if adapter_cls is OllamaAdapter and not await check_ollama_availability():
+            logger.info("Ollama unavailable, skipping")
+            continue
+        try:
+            logger.info(f"Using {name} as the LLM provider")
+            return _get_adapter(adapter_cls)
+        except Exception as e:
+            logger.warning(f"Failed to create {name} adapter: {e}")
     
-    else:
-        # Try best available option
-        if openai_configured:
-            logger.info("Using OpenAI as fallback")
-            return OpenAIAdapter()
-        elif ollama_available:
-            logger.info("Using Ollama as fallback")
-            return OllamaAdapter()
-        else:
-            raise ValueError("No LLM provider available") 
\ No newline at end of file
+    raise ValueError(f"No LLM provider available (configured provider: {provider})")
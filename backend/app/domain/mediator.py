@@ -4,17 +4,48 @@ Mediator pattern implementation for component communication.
 This module provides an event bus for decoupled communication between components.
 """
 
-from typing import Dict, List, Callable, Any, Optional
-from dataclasses import dataclass
-from datetime import datetime
+from typing import Dict, List, Callable, Any, Optional, Tuple
+from collections import defaultdict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
 import asyncio
-import json
+import itertools
+import logging
+import os
+import time
 from enum import Enum
 
-from ..core.observability import get_logger
-from ..adapters.queue_redis import RedisAdapter
+import orjson
+
+from ..core.observability import get_logger, request_id_var, session_id_var
+from ..adapters.queue_redis import RedisAdapter, RedisPubSubReader
 
 logger = get_logger(__name__)
+# structlog filters on the stdlib logger's level; checking it first skips
+# building debug messages on the publish path when DEBUG is off
+_std_logger = logging.getLogger(__name__)
+
+# Outbound Redis publishes are buffered and flushed through one pipeline
+REDIS_QUEUE_SIZE = 10000
+REDIS_BATCH_SIZE = 100
+REDIS_LINGER_MS = 5
+
+# Streamed tokens are coalesced into one event per window or per batch
+TOKEN_COALESCE_MS = 20
+TOKEN_COALESCE_MAX = 32
+
+# Per-session queues drop their oldest event once full
+SESSION_QUEUE_SIZE = 1024
+
+# Replay history kept per session by publish_with_history
+SESSION_HISTORY_LEN = 100
+SESSION_HISTORY_TTL_SEC = 3600
+
+# Written first into every payload this process publishes, so the listener
+# can drop its own events (already delivered locally) without decoding them
+_BUS_ID = os.urandom(8).hex()
+_ORIGIN_PREFIX = b'{"origin":"' + _BUS_ID.encode() + b'"'
 
 
 class EventType(str, Enum):
@@ -30,25 +61,60 @@ class EventType(str, Enum):
     ERROR_OCCURRED = "error.occurred"
 
 
-@dataclass
+# Lookups resolved once instead of per event
+_EVENT_TYPES: Dict[str, EventType] = {event_type.value: event_type for event_type in EventType}
+_CHANNELS: Dict[EventType, str] = {event_type: f"events:{event_type.value}" for event_type in EventType}
+_TYPES_BY_CHANNEL: Dict[bytes, EventType] = {channel.encode(): event_type for event_type, channel in _CHANNELS.items()}
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+@dataclass(slots=True)
 class Event:
-    """Event data structure."""
+    """Event data structure.
+    
+    The timestamp is epoch nanoseconds and is serialized as an integer; use
+    iso_timestamp where a human-readable string is needed. Request and session
+    ids default to the ones bound to the current context.
+    """
     type: EventType
     payload: Dict[str, Any]
-    timestamp: datetime = None
+    timestamp: int = field(default_factory=time.time_ns)
     session_id: Optional[str] = None
     request_id: Optional[str] = None
     
     def __post_init__(self):
-        if self.timestamp is None:
-            self.timestamp = datetime.utcnow()
+        if self.session_id is None:
+            self.session_id = session_id_var.get()
+        if self.request_id is None:
+            self.request_id = request_id_var.get()
+    
+    @property
+    def iso_timestamp(self) -> str:
+        """Timestamp as a naive UTC ISO string."""
+        return (_EPOCH + timedelta(microseconds=self.timestamp // 1000)).isoformat()
+    
+    def to_json(self, origin: Optional[str] = None) -> bytes:
+        """Serialize the event straight to JSON bytes.
+        
+        ``origin`` is written as the first key when given.
+        """
+        data = {"origin": origin} if origin else {}
+        data.update(
+            type=self.type.value,
+            payload=self.payload,
+            timestamp=self.timestamp,
+            session_id=self.session_id,
+            request_id=self.request_id
+        )
+        return orjson.dumps(data)
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert event to dictionary."""
         return {
             "type": self.type.value,
             "payload": self.payload,
-            "timestamp": self.timestamp.isoformat(),
+            "timestamp": self.timestamp,
             "session_id": self.session_id,
             "request_id": self.request_id
         }
@@ -56,10 +122,15 @@ class Event:
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> 'Event':
         """Create event from dictionary."""
+        timestamp = data["timestamp"]
+        if isinstance(timestamp, str):
+            # ISO strings from processes that predate integer timestamps
+            timestamp = (datetime.fromisoformat(timestamp) - _EPOCH) // timedelta(microseconds=1) * 1000
+        
         return cls(
-            type=EventType(data["type"]),
+            type=_EVENT_TYPES[data["type"]],
             payload=data["payload"],
-            timestamp=datetime.fromisoformat(data["timestamp"]),
+            timestamp=timestamp,
             session_id=data.get("session_id"),
             request_id=data.get("request_id")
         )
@@ -68,43 +139,95 @@ class Event:
 class EventHandler:
     """Handler for specific event types."""
     
+    __slots__ = ("event_type", "callback", "filter_fn", "_is_async", "_id")
+    
     def __init__(self, event_type: EventType, callback: Callable, filter_fn: Optional[Callable] = None):
+        self._id: Optional[int] = None
         self.event_type = event_type
         self.callback = callback
         self.filter_fn = filter_fn
+        # Resolved once here instead of on every event
+        self._is_async = asyncio.iscoroutinefunction(callback)
     
     async def handle(self, event: Event) -> Any:
-        """Handle the event if it matches criteria."""
-        if event.type != self.event_type:
-            return None
+        """Handle the event if it matches criteria.
         
-        if self.filter_fn and not self.filter_fn(event):
-            return None
-        
-        if asyncio.iscoroutinefunction(self.callback):
-            return await self.callback(event)
-        else:
+        The bus only dispatches events from the handler list for their type,
+        so the type is not checked again here. Errors are logged and swallowed
+        so one failing handler never affects the others.
+        """
+        try:
+            if self.filter_fn is not None and not self.filter_fn(event):
+                return None
+            
+            if self._is_async:
+                return await self.callback(event)
             return self.callback(event)
+        except Exception as e:
+            logger.error(f"Event handler for {self.event_type.value} failed: {str(e)}")
+            return None
 
 
 class EventBus:
-    """Central event bus for publish/subscribe communication."""
+    """Central event bus for publish/subscribe communication.
+    
+    Redis traffic uses two connections. Publishes go through the shared
+    RedisAdapter client, where the flusher sends them one pipeline at a time.
+    The listener reads on a single dedicated pub/sub connection.
+    """
     
     def __init__(self, redis_adapter: Optional[RedisAdapter] = None):
-        self.handlers: Dict[EventType, List[EventHandler]] = {}
+        # Handlers keyed by subscription id so unsubscribe is a dict delete
+        self.handlers: Dict[EventType, Dict[int, EventHandler]] = defaultdict(dict)
+        self._handler_ids = itertools.count()
+        # Copy-on-write tuples read by _publish_local, rebuilt on (un)subscribe
+        self._dispatch: Dict[EventType, Tuple[EventHandler, ...]] = {}
+        # One-shot waiters from wait_for_event, resolved inline on publish
+        self._waiters: Dict[EventType, List[Tuple[asyncio.Future, Optional[Callable]]]] = {}
         self.redis_adapter = redis_adapter
         self._local_subscribers: Dict[str, asyncio.Queue] = {}
+        self.session_queue_size = SESSION_QUEUE_SIZE
+        self.dropped_session_events = 0
         self._running = False
         self._tasks: List[asyncio.Task] = []
+        self._publish_queue: Optional[asyncio.Queue] = None
+        self._flusher_task: Optional[asyncio.Task] = None
+        self.redis_batch_size = REDIS_BATCH_SIZE
+        self.redis_linger_ms = REDIS_LINGER_MS
+        # Token coalescing for publish_coalesced, keyed by (session_id, request_id)
+        self.coalesce_tokens = True
+        self.token_coalesce_ms = TOKEN_COALESCE_MS
+        self.token_coalesce_max = TOKEN_COALESCE_MAX
+        self._coalesce_buf: Dict[Tuple[Optional[str], Optional[str]], List[Any]] = {}
+        self._coalesce_started: Dict[Tuple[Optional[str], Optional[str]], int] = {}
+        self._coalesce_timers: Dict[Tuple[Optional[str], Optional[str]], asyncio.TimerHandle] = {}
+        # Publishes and flushes running detached from their caller
+        self._bg_tasks: set = set()
+        # Redis channels this process consumes: only types with local handlers or waiters
+        self._pubsub_reader: Optional[RedisPubSubReader] = None
+        self._subscribed_channels: set = set()
+        self._channels_ready = asyncio.Event()
+        self._channel_tasks: set = set()
     
     async def start(self) -> None:
         """Start the event bus."""
         self._running = True
         
         if self.redis_adapter:
-            # Start Redis pub/sub listener
+            # The listener reads on its own connection, apart from publishes
+            self._pubsub_reader = self.redis_adapter.create_pubsub_reader()
+            
+            # Subscribe to the types that already have handlers, then listen
+            for event_type in list(self.handlers):
+                self._update_redis_channel(event_type)
             task = asyncio.create_task(self._redis_listener())
             self._tasks.append(task)
+            
+            await self.redis_adapter.load_scripts()
+            
+            # Start the pipelined publisher
+            self._publish_queue = asyncio.Queue(maxsize=REDIS_QUEUE_SIZE)
+            self._flusher_task = asyncio.create_task(self._redis_flusher())
         
         logger.info("Event bus started")
     
@@ -112,37 +235,105 @@ class EventBus:
         """Stop the event bus."""
         self._running = False
         
+        # Publish any tokens still waiting for their coalescing window
+        for key in list(self._coalesce_buf):
+            await self._flush_coalesced(key)
+        if self._bg_tasks:
+            await asyncio.gather(*self._bg_tasks, return_exceptions=True)
+        
+        # Let the flusher publish whatever is still buffered
+        if self._flusher_task:
+            await self._publish_queue.put(None)
+            await asyncio.gather(self._flusher_task, return_exceptions=True)
+            self._flusher_task = None
+            self._publish_queue = None
+        
         # Cancel all tasks
         for task in self._tasks:
             task.cancel()
         
         # Wait for tasks to complete
-        await asyncio.gather(*self._tasks, return_exceptions=True)
+        await asyncio.gather(*self._tasks, *self._channel_tasks, return_exceptions=True)
         
         self._tasks.clear()
+        if self._pubsub_reader:
+            await self._pubsub_reader.close()
+            self._pubsub_reader = None
+        self._subscribed_channels.clear()
+        self._channels_ready.clear()
         logger.info("Event bus stopped")
     
     def subscribe(self, event_type: EventType, callback: Callable, filter_fn: Optional[Callable] = None) -> EventHandler:
         """Subscribe to an event type."""
         handler = EventHandler(event_type, callback, filter_fn)
+        handler._id = next(self._handler_ids)
         
-        if event_type not in self.handlers:
-            self.handlers[event_type] = []
-        
-        self.handlers[event_type].append(handler)
-        logger.debug(f"Subscribed to {event_type.value}")
+        self.handlers[event_type][handler._id] = handler
+        self._dispatch[event_type] = tuple(self.handlers[event_type].values())
+        self._update_redis_channel(event_type)
+        if _std_logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Subscribed to %s", event_type.value)
         
         return handler
     
     def unsubscribe(self, handler: EventHandler) -> None:
         """Unsubscribe a handler."""
-        if handler.event_type in self.handlers:
-            self.handlers[handler.event_type].remove(handler)
-            logger.debug(f"Unsubscribed from {handler.event_type.value}")
+        handlers = self.handlers.get(handler.event_type)
+        if handlers and handlers.pop(handler._id, None) is not None:
+            self._dispatch[handler.event_type] = tuple(handlers.values())
+            self._update_redis_channel(handler.event_type)
+            if _std_logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Unsubscribed from %s", handler.event_type.value)
+    
+    def _update_redis_channel(self, event_type: EventType) -> None:
+        """Subscribe to or drop an event type's Redis channel to match local interest."""
+        if not self._running or not self._pubsub_reader:
+            return
+        
+        channel = _CHANNELS[event_type]
+        wanted = bool(self.handlers.get(event_type) or self._waiters.get(event_type))
+        if wanted == (channel in self._subscribed_channels):
+            return
+        
+        if wanted:
+            self._subscribed_channels.add(channel)
+            coro = self._subscribe_redis_channel(channel)
+        else:
+            self._subscribed_channels.discard(channel)
+            coro = self._pubsub_reader.remove_subscriptions(channel)
+        
+        # Tasks run in creation order, so a subscribe and unsubscribe of one channel stay ordered
+        task = asyncio.create_task(coro)
+        self._channel_tasks.add(task)
+        task.add_done_callback(self._channel_tasks.discard)
     
-    async def publish(self, event: Event) -> None:
-        """Publish an event to all subscribers."""
-        logger.debug(f"Publishing event: {event.type.value}")
+    async def _subscribe_redis_channel(self, channel: str) -> None:
+        """Subscribe to a channel and wake the listener."""
+        if await self._pubsub_reader.add_subscriptions(channel):
+            self._channels_ready.set()
+    
+    async def publish(self, event: Event, *, wait: bool = True) -> None:
+        """Publish an event to all subscribers.
+        
+        With ``wait=False`` the publish runs as a background task and the
+        caller does not wait for local handlers or the Redis enqueue.
+        """
+        if not wait:
+            self._spawn(self._publish_now(event))
+            return
+        
+        await self._publish_now(event)
+    
+    def _spawn(self, coro) -> None:
+        """Run a coroutine as a tracked background task."""
+        task = asyncio.create_task(coro)
+        self._bg_tasks.add(task)
+        task.add_done_callback(self._bg_tasks.discard)
+    
+    async def _publish_now(self, event: Event) -> None:
+        """Deliver an event locally and to Redis."""
+        if _std_logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Publishing event: %s", event.type.value)
         
         # Publish to local handlers
         await self._publish_local(event)
@@ -151,54 +342,261 @@ class EventBus:
         if self.redis_adapter:
             await self._publish_redis(event)
     
+    async def publish_with_history(self, event: Event, max_len: int = SESSION_HISTORY_LEN) -> None:
+        """Publish a session event and keep it for reconnect replay.
+        
+        The Redis PUBLISH and the capped history write run as one Lua script,
+        so both cost a single round trip.
+        """
+        if not event.session_id:
+            raise ValueError("publish_with_history requires a session_id")
+        
+        await self._publish_local(event)
+        
+        if self.redis_adapter:
+            await self.redis_adapter.publish_with_history(
+                _CHANNELS[event.type],
+                f"events:history:{event.session_id}",
+                event.to_json(_BUS_ID),
+                max_len,
+                SESSION_HISTORY_TTL_SEC
+            )
+    
+    async def get_session_history(self, session_id: str, limit: int = SESSION_HISTORY_LEN) -> List[Event]:
+        """Return a session's retained events, oldest first."""
+        if not self.redis_adapter:
+            return []
+        
+        messages = await self.redis_adapter.lrange(f"events:history:{session_id}", 0, limit - 1)
+        return [Event.from_dict(orjson.loads(message)) for message in reversed(messages)]
+    
+    async def publish_coalesced(self, event: Event, *, wait: bool = True) -> None:
+        """Publish an event, buffering TOKEN_GENERATED events into batches.
+        
+        Tokens for the same session and request are held for up to
+        token_coalesce_ms or token_coalesce_max tokens, then published as one
+        TOKEN_GENERATED event with a ``tokens`` list payload. Every other event
+        type, or every event when coalesce_tokens is off, is published at once.
+        ``wait`` is passed through to publish.
+        """
+        if not self.coalesce_tokens or event.type is not EventType.TOKEN_GENERATED:
+            await self.publish(event, wait=wait)
+            return
+        
+        await self._buffer_token(event.session_id, event.request_id, event.payload.get("token"), event.timestamp, wait)
+    
+    async def publish_token(
+        self,
+        session_id: Optional[str],
+        request_id: Optional[str],
+        token: Any,
+        *,
+        wait: bool = True
+    ) -> None:
+        """Publish one streamed token.
+        
+        With coalescing on, only the token itself is buffered; no Event or
+        payload dict is built until the batch is flushed.
+        """
+        if not self.coalesce_tokens:
+            await self.publish(Event(
+                type=EventType.TOKEN_GENERATED,
+                payload={"token": token},
+                session_id=session_id,
+                request_id=request_id
+            ), wait=wait)
+            return
+        
+        await self._buffer_token(session_id, request_id, token, None, wait)
+    
+    async def _buffer_token(
+        self,
+        session_id: Optional[str],
+        request_id: Optional[str],
+        token: Any,
+        timestamp: Optional[int],
+        wait: bool
+    ) -> None:
+        """Add a token to its stream's batch, flushing when the batch is full."""
+        key = (session_id, request_id)
+        buffer = self._coalesce_buf.get(key)
+        if buffer is None:
+            buffer = self._coalesce_buf[key] = []
+            self._coalesce_started[key] = timestamp or time.time_ns()
+        buffer.append(token)
+        
+        if len(buffer) >= self.token_coalesce_max:
+            await self._flush_coalesced(key, wait=wait)
+        elif key not in self._coalesce_timers:
+            loop = asyncio.get_running_loop()
+            self._coalesce_timers[key] = loop.call_later(
+                self.token_coalesce_ms / 1000, self._schedule_coalesced_flush, key
+            )
+    
+    async def flush_coalesced(self, session_id: Optional[str], request_id: Optional[str], *, wait: bool = True) -> None:
+        """Publish buffered tokens for a stream right away, e.g. when it ends."""
+        await self._flush_coalesced((session_id, request_id), wait=wait)
+    
+    def _schedule_coalesced_flush(self, key: Tuple[Optional[str], Optional[str]]) -> None:
+        """Timer callback: run the flush as a task."""
+        self._coalesce_timers.pop(key, None)
+        self._spawn(self._flush_coalesced(key))
+    
+    async def _flush_coalesced(self, key: Tuple[Optional[str], Optional[str]], *, wait: bool = True) -> None:
+        """Publish the buffered tokens for a key as a single event."""
+        timer = self._coalesce_timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        
+        tokens = self._coalesce_buf.pop(key, None)
+        started = self._coalesce_started.pop(key, None)
+        if not tokens:
+            return
+        
+        session_id, request_id = key
+        await self.publish(Event(
+            type=EventType.TOKEN_GENERATED,
+            payload={"tokens": tokens},
+            timestamp=started,
+            session_id=session_id,
+            request_id=request_id
+        ), wait=wait)
+    
     async def _publish_local(self, event: Event) -> None:
         """Publish event to local handlers."""
-        handlers = self.handlers.get(event.type, [])
+        waiters = self._waiters.get(event.type)
+        if waiters:
+            self._resolve_waiters(event, waiters)
         
-        # Execute handlers concurrently
-        tasks = [handler.handle(event) for handler in handlers]
-        if tasks:
-            await asyncio.gather(*tasks, return_exceptions=True)
+        handlers = self._dispatch.get(event.type)
+        
+        if handlers:
+            # Handlers contain their own errors, so results need no collecting
+            if len(handlers) == 1:
+                # Skip gather's task machinery for the common single-handler case
+                await handlers[0].handle(event)
+            else:
+                # Execute handlers concurrently
+                await asyncio.gather(*(handler.handle(event) for handler in handlers))
         
         # Also publish to session-specific queues if applicable
-        if event.session_id and event.session_id in self._local_subscribers:
-            queue = self._local_subscribers[event.session_id]
-            await queue.put(event)
+        if event.session_id:
+            queue = self._local_subscribers.get(event.session_id)
+            if queue is not None:
+                self._offer_session_event(queue, event)
+    
+    def _offer_session_event(self, queue: asyncio.Queue, event: Event) -> None:
+        """Queue an event for a session without blocking, evicting the oldest if full."""
+        try:
+            queue.put_nowait(event)
+        except asyncio.QueueFull:
+            try:
+                queue.get_nowait()
+            except asyncio.QueueEmpty:
+                pass
+            queue.put_nowait(event)
+            self.dropped_session_events += 1
+    
+    @staticmethod
+    def _resolve_waiters(event: Event, waiters: List[Tuple[asyncio.Future, Optional[Callable]]]) -> None:
+        """Complete the waiters this event satisfies and keep the rest."""
+        pending = []
+        for future, filter_fn in waiters:
+            if future.done():
+                continue
+            try:
+                matched = filter_fn is None or filter_fn(event)
+            except Exception:
+                matched = False
+            if matched:
+                future.set_result(event)
+            else:
+                pending.append((future, filter_fn))
+        waiters[:] = pending
     
     async def _publish_redis(self, event: Event) -> None:
         """Publish event to Redis pub/sub."""
-        channel = f"events:{event.type.value}"
-        if event.session_id:
-            channel = f"{channel}:{event.session_id}"
+        # One channel per type; the session id travels in the payload
+        channel = _CHANNELS[event.type]
         
-        try:
-            await self.redis_adapter.publish(channel, json.dumps(event.to_dict()))
-        except Exception as e:
-            logger.error(f"Failed to publish to Redis: {str(e)}")
+        message = event.to_json(_BUS_ID)
+        
+        # Not started yet: nothing is draining the queue, publish directly
+        if self._flusher_task is None:
+            try:
+                await self.redis_adapter.publish(channel, message)
+            except Exception as e:
+                logger.error(f"Failed to publish to Redis: {str(e)}")
+            return
+        
+        await self._publish_queue.put((channel, message))
+    
+    async def _redis_flusher(self) -> None:
+        """Drain queued publishes and send them to Redis in pipelined batches."""
+        loop = asyncio.get_running_loop()
+        queue = self._publish_queue
+        stopping = False
+        
+        while not stopping:
+            item = await queue.get()
+            if item is None:
+                break
+            
+            batch: List[Tuple[str, bytes]] = [item]
+            deadline = loop.time() + self.redis_linger_ms / 1000
+            
+            # Keep collecting until the batch is full or the linger time is up
+            while len(batch) < self.redis_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            
+            try:
+                await self.redis_adapter.publish_batch(batch)
+            except Exception as e:
+                logger.error(f"Failed to publish {len(batch)} events to Redis: {str(e)}")
     
     async def _redis_listener(self) -> None:
         """Listen for events from Redis pub/sub."""
         if not self.redis_adapter:
             return
         
-        # Subscribe to all event types
-        channels = [f"events:{event_type.value}:*" for event_type in EventType]
-        
         try:
-            async for message in self.redis_adapter.subscribe_pattern(channels):
-                if not self._running:
-                    break
+            while self._running:
+                # Wait until at least one channel is subscribed
+                await self._channels_ready.wait()
                 
-                try:
-                    event_data = json.loads(message['data'])
-                    event = Event.from_dict(event_data)
+                async for message in self._pubsub_reader.listen():
+                    if not self._running:
+                        break
+                    
+                    # Our own publishes were already delivered to local handlers
+                    if message['data'].startswith(_ORIGIN_PREFIX):
+                        continue
+                    
+                    # Route on the channel name so messages nobody here consumes
+                    # (e.g. still in flight after an unsubscribe) are never decoded
+                    event_type = _TYPES_BY_CHANNEL.get(message['channel'])
+                    if event_type is None or not (self._dispatch.get(event_type) or self._waiters.get(event_type)):
+                        continue
                     
-                    # Only process if we have local handlers
-                    if event.type in self.handlers:
-                        await self._publish_local(event)
+                    try:
+                        event_data = orjson.loads(message['data'])
+                        await self._publish_local(Event.from_dict(event_data))
+                    
+                    except Exception as e:
+                        logger.error(f"Failed to process Redis message: {str(e)}")
                 
-                except Exception as e:
-                    logger.error(f"Failed to process Redis message: {str(e)}")
+                # Every channel was dropped; sleep until one is subscribed again
+                self._channels_ready.clear()
         
         except Exception as e:
             logger.error(f"Redis listener error: {str(e)}")
@@ -206,7 +604,7 @@ class EventBus:
     def create_session_queue(self, session_id: str) -> asyncio.Queue:
         """Create a queue for session-specific events."""
         if session_id not in self._local_subscribers:
-            self._local_subscribers[session_id] = asyncio.Queue()
+            self._local_subscribers[session_id] = asyncio.Queue(maxsize=self.session_queue_size)
         return self._local_subscribers[session_id]
     
     def remove_session_queue(self, session_id: str) -> None:
@@ -220,20 +618,52 @@ class EventBus:
         filter_fn: Optional[Callable] = None
     ) -> Optional[Event]:
         """Wait for a specific event type."""
-        future = asyncio.Future()
-        
-        def callback(event: Event):
-            if not future.done():
-                future.set_result(event)
-        
-        handler = self.subscribe(event_type, callback, filter_fn)
+        future = asyncio.get_running_loop().create_future()
+        waiter = (future, filter_fn)
+        waiters = self._waiters.setdefault(event_type, [])
+        waiters.append(waiter)
+        self._update_redis_channel(event_type)
         
         try:
             return await asyncio.wait_for(future, timeout)
         except asyncio.TimeoutError:
             return None
         finally:
-            self.unsubscribe(handler)
+            # Resolved waiters are already gone; only unresolved ones are removed here
+            if not future.done() or future.cancelled():
+                try:
+                    waiters.remove(waiter)
+                except ValueError:
+                    pass
+            self._update_redis_channel(event_type)
+
+
+def _result_size(result: Any) -> Optional[int]:
+    """Cheap size of an agent result, without building its str() repr."""
+    if isinstance(result, (str, bytes)):
+        return len(result)
+    
+    # Agent responses carry the generated text in ``content``
+    content = getattr(result, "content", None)
+    if isinstance(content, str):
+        return len(content)
+    
+    try:
+        return len(result)
+    except TypeError:
+        return None
+
+
+@contextmanager
+def event_context(request_id: Optional[str], session_id: Optional[str]):
+    """Bind request and session ids for events created inside the block."""
+    request_token = request_id_var.set(request_id)
+    session_token = session_id_var.set(session_id)
+    try:
+        yield
+    finally:
+        session_id_var.reset(session_token)
+        request_id_var.reset(request_token)
 
 
 class Mediator:
@@ -255,37 +685,35 @@ class Mediator:
         
         workflow = self._workflows[name]
         
-        # Publish workflow start event
-        await self.event_bus.publish(Event(
-            type=EventType.AGENT_STARTED,
-            payload={"workflow": name, "context": context},
-            request_id=context.get("request_id")
-        ))
-        
-        try:
-            # Execute workflow
-            if asyncio.iscoroutinefunction(workflow):
-                result = await workflow(context, self)
-            else:
-                result = workflow(context, self)
-            
-            # Publish workflow completion event
+        with event_context(context.get("request_id"), context.get("session_id")):
+            # Publish workflow start event
             await self.event_bus.publish(Event(
-                type=EventType.AGENT_COMPLETED,
-                payload={"workflow": name, "result": result},
-                request_id=context.get("request_id")
+                type=EventType.AGENT_STARTED,
+                payload={"workflow": name, "context": context}
             ))
             
-            return result
-            
-        except Exception as e:
-            # Publish workflow failure event
-            await self.event_bus.publish(Event(
-                type=EventType.AGENT_FAILED,
-                payload={"workflow": name, "error": str(e)},
-                request_id=context.get("request_id")
-            ))
-            raise
+            try:
+                # Execute workflow
+                if asyncio.iscoroutinefunction(workflow):
+                    result = await workflow(context, self)
+                else:
+                    result = workflow(context, self)
+                
+                # Publish workflow completion event
+                await self.event_bus.publish(Event(
+                    type=EventType.AGENT_COMPLETED,
+                    payload={"workflow": name, "result": result}
+                ))
+                
+                return result
+                
+            except Exception as e:
+                # Publish workflow failure event
+                await self.event_bus.publish(Event(
+                    type=EventType.AGENT_FAILED,
+                    payload={"workflow": name, "error": str(e)}
+                ))
+                raise
     
     async def coordinate_agent_execution(
         self,
@@ -294,40 +722,32 @@ class Mediator:
         callback: Callable
     ) -> Any:
         """Coordinate agent execution with event publishing."""
-        request_id = context.get("request_id")
-        session_id = context.get("session_id")
-        
-        # Publish start event
-        await self.event_bus.publish(Event(
-            type=EventType.AGENT_STARTED,
-            payload={"agent_id": agent_id},
-            request_id=request_id,
-            session_id=session_id
-        ))
-        
-        try:
-            # Execute agent callback
-            result = await callback()
-            
-            # Publish completion event
+        with event_context(context.get("request_id"), context.get("session_id")):
+            # Publish start event
             await self.event_bus.publish(Event(
-                type=EventType.AGENT_COMPLETED,
-                payload={"agent_id": agent_id, "result_size": len(str(result))},
-                request_id=request_id,
-                session_id=session_id
+                type=EventType.AGENT_STARTED,
+                payload={"agent_id": agent_id}
             ))
             
-            return result
-            
-        except Exception as e:
-            # Publish failure event
-            await self.event_bus.publish(Event(
-                type=EventType.AGENT_FAILED,
-                payload={"agent_id": agent_id, "error": str(e)},
-                request_id=request_id,
-                session_id=session_id
-            ))
-            raise
+            try:
+                # Execute agent callback
+                result = await callback()
+                
+                # Publish completion event
+                await self.event_bus.publish(Event(
+                    type=EventType.AGENT_COMPLETED,
+                    payload={"agent_id": agent_id, "result_size": _result_size(result)}
+                ))
+                
+                return result
+                
+            except Exception as e:
+                # Publish failure event
+                await self.event_bus.publish(Event(
+                    type=EventType.AGENT_FAILED,
+                    payload={"agent_id": agent_id, "error": str(e)}
+                ))
+                raise
 
 
 # Global event bus instance
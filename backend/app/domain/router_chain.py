@@ -5,14 +5,23 @@ This module implements the routing chain with multiple handlers for different ro
 """
 
 from abc import ABC, abstractmethod
-from typing import Optional, Dict, Any, List, TYPE_CHECKING, Union
+from typing import Optional, Dict, Any, List, TYPE_CHECKING, Union, FrozenSet, Set
 import re
+from re import _parser as sre_parse
+import functools
+import itertools
 import json
+import logging
+import os
+from collections import OrderedDict, deque
 from dataclasses import dataclass
 import asyncio
-import uuid
 import time
 from datetime import datetime
+from hashlib import blake2b
+
+import orjson
+from cachetools import TTLCache
 
 from ..core.observability import get_logger, with_tracing, agent_selection_counter
 from ..core.router_cache import cache_routing_decision
@@ -25,9 +34,114 @@ if TYPE_CHECKING:
     from .context_aware_router import ContextAwareRouter
 
 logger = get_logger(__name__)
+# structlog filters on the stdlib logger's level; checking it first skips
+# building verbose debug events on the routing path when DEBUG is off
+_std_logger = logging.getLogger(__name__)
+
+# Router trace events are emitted off the request path in small batches
+TRACE_BATCH_SIZE = 64
+TRACE_LINGER_MS = 50
+
+# Per-node LRU of regex match outcomes, keyed on a digest of the lowercased prompt
+REGEX_MATCH_CACHE_SIZE = 4096
+
+# RouterChain.route caches confident decisions per (normalized prompt, user)
+DECISION_CACHE_SIZE = 10000
+DECISION_CACHE_TTL_SEC = 300
+DECISION_CACHE_MIN_CONFIDENCE = 0.8
+
+# Escapes and group-name syntax are kept verbatim when lowercasing a pattern
+_PATTERN_TOKEN = re.compile(r"\\.|\(\?P<[^>]*>|\(\?P=[^)]*\)|.", re.DOTALL)
+
+# Tiebreaker keywords for _select_best_match, matched as plain substrings
+_TECH_INDICATORS = re.compile(r"system|bug|broken|technical|login|platform")
+_LEASE_OR_RENT = re.compile(r"to (?:lease|rent)")
+
+
+# Bound agent_selection_counter children per (agent, method); a series is only
+# created the first time that pair is selected
+_selection_counters: Dict[tuple, Any] = {}
+
+
+def _selection_counter(agent_type: AgentType, method: RoutingMethod):
+    """Return the agent_selection_counter child for an agent and routing method."""
+    counter = _selection_counters.get((agent_type, method))
+    if counter is None:
+        counter = _selection_counters[(agent_type, method)] = agent_selection_counter.labels(
+            agent_type=agent_type.value,
+            selection_method=method.value
+        )
+    return counter
+
+
+def _lowercase_pattern(pattern: str) -> str:
+    """Lowercase a regex's literals so it can match pre-lowercased text without IGNORECASE."""
+    return _PATTERN_TOKEN.sub(lambda m: m.group() if len(m.group()) > 1 else m.group().lower(), pattern)
+
+
+@functools.lru_cache(maxsize=2048)
+def _compile_rule_pattern(pattern: str) -> re.Pattern:
+    """Compile a rule's lowercased pattern once per process, shared by every RegexNode."""
+    return re.compile(_lowercase_pattern(pattern))
+
+
+def _required_literals(pattern: str) -> Optional[FrozenSet[str]]:
+    """Literal strings of which at least one occurs in any text the pattern matches.
+    
+    Used as a cheap substring test before running the regex. Returns None when
+    no selective set can be derived, in which case the rule is always scanned.
+    """
+    try:
+        literals = _sequence_literals(sre_parse.parse(pattern))
+    except Exception:
+        # The parser is private to the re module and its node layout can change
+        # between releases; without literals the rule is simply always scanned
+        return None
+    if not literals or min(map(len, literals)) < 2:
+        return None
+    return frozenset(literals)
+
+
+def _sequence_literals(items) -> Optional[Set[str]]:
+    """Pick the most selective required literal set from a parsed sequence."""
+    best: Optional[Set[str]] = None
+    run: List[str] = []
+    
+    def consider(candidate: Optional[Set[str]]) -> None:
+        nonlocal best
+        if candidate and (best is None or min(map(len, candidate)) > min(map(len, best))):
+            best = candidate
+    
+    for op, av in items:
+        name = str(op)
+        if name == "LITERAL":
+            run.append(chr(av))
+            continue
+        if name == "AT":
+            # Zero-width anchors such as \b do not split a literal run
+            continue
+        
+        if run:
+            consider({"".join(run)})
+            run = []
+        
+        if name == "SUBPATTERN":
+            consider(_sequence_literals(av[-1]))
+        elif name == "BRANCH":
+            branches = [_sequence_literals(branch) for branch in av[1]]
+            if all(branches):
+                consider(set().union(*branches))
+        elif name in ("MAX_REPEAT", "MIN_REPEAT", "POSSESSIVE_REPEAT") and av[0] >= 1:
+            consider(_sequence_literals(av[2]))
+        elif name == "ATOMIC_GROUP":
+            consider(_sequence_literals(av))
+    
+    if run:
+        consider({"".join(run)})
+    return best
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class RoutingRule:
     """Routing rule configuration."""
     pattern: str
@@ -36,12 +150,48 @@ class RoutingRule:
     priority: int = 0
 
 
+class _TraceBuffer:
+    """Runs trace emitter calls in order from a background task, off the request path.
+    
+    Calls are kept in a deque rather than an asyncio.Queue so the buffer is
+    not bound to one event loop; the drain task exits once it is empty.
+    """
+    
+    def __init__(self):
+        self._calls: deque = deque()
+        self._task: Optional[asyncio.Task] = None
+    
+    def submit(self, emit, fields: Dict[str, Any]) -> None:
+        """Queue emit(**fields) and make sure a drain task is running."""
+        self._calls.append((emit, fields))
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._drain())
+    
+    async def _drain(self) -> None:
+        """Emit queued calls in batches, exiting once the queue is empty."""
+        calls = self._calls
+        while calls:
+            # Give concurrent requests a moment to add their calls to this batch
+            await asyncio.sleep(TRACE_LINGER_MS / 1000)
+            batch = [calls.popleft() for _ in range(min(len(calls), TRACE_BATCH_SIZE))]
+            for emit, fields in batch:
+                try:
+                    await emit(**fields)
+                except Exception as e:
+                    logger.debug(f"Failed to emit router trace: {e}")
+
+
 class RouterNode(ABC):
     """Abstract base class for router nodes in the chain."""
     
+    # Nodes whose handle() already returns None when they do not apply set this,
+    # so process() skips the separate can_handle() pass
+    handles_own_misses = False
+    
     def __init__(self, trace_emitter=None):
         self.next_handler: Optional[RouterNode] = None
         self.trace_emitter = trace_emitter
+        self._trace_buffer = _TraceBuffer()
     
     def set_next(self, handler: 'RouterNode') -> 'RouterNode':
         """Set the next handler in the chain."""
@@ -60,7 +210,7 @@ class RouterNode(ABC):
     
     async def process(self, context: RequestContext) -> Optional[IntentResult]:
         """Process the request through the chain."""
-        if await self.can_handle(context):
+        if self.handles_own_misses or await self.can_handle(context):
             result = await self.handle(context)
             if result:
                 return result
@@ -69,6 +219,10 @@ class RouterNode(ABC):
             return await self.next_handler.process(context)
         
         return None
+    
+    def _emit_router_step(self, **step: Any) -> None:
+        """Queue a trace step; a background task hands it to the trace emitter."""
+        self._trace_buffer.submit(self.trace_emitter.emit_router_step, step)
 
 
 class RegexNode(RouterNode):
@@ -77,22 +231,90 @@ class RegexNode(RouterNode):
     def __init__(self, rules: List[RoutingRule], trace_emitter=None):
         super().__init__(trace_emitter)
         self.rules = sorted(rules, key=lambda r: r.priority, reverse=True)
+        # Patterns are lowercased up front and run against the lowercased prompt,
+        # which is cheaper than case folding inside the engine with IGNORECASE
         self.compiled_rules = [
-            (re.compile(rule.pattern, re.IGNORECASE), rule) 
+            (_compile_rule_pattern(rule.pattern), rule) 
             for rule in self.rules
         ]
+        self._prefilter = self._compile_prefilter(self.rules)
+        # Substrings each rule needs; rules whose literals are all absent skip the regex
+        self._rule_literals = [_required_literals(pattern.pattern) for pattern, _ in self.compiled_rules]
+        # Flat (bound search, rule, literals) rows for the scan loop
+        self._searches = [
+            (pattern.search, rule, literals)
+            for (pattern, rule), literals in zip(self.compiled_rules, self._rule_literals)
+        ]
+        # digest -> (selected rule, total matches, lowercased entities) or None for no match
+        self._match_cache: OrderedDict = OrderedDict()
+    
+    @staticmethod
+    def _compile_prefilter(rules: List[RoutingRule]) -> Optional[re.Pattern]:
+        """Union every rule into one pattern that tells in a single scan whether any rule matches.
+        
+        Rules with backreferences or inline flags cannot be combined safely;
+        for those rule sets this returns None and callers scan rule by rule.
+        """
+        if not rules or any(re.search(r"\\[1-9]|\(\?P=|\(\?[aiLmsux]+\)", rule.pattern) for rule in rules):
+            return None
+        try:
+            return re.compile("|".join(f"(?:{_lowercase_pattern(rule.pattern)})" for rule in rules))
+        except re.error:
+            # e.g. two rules reuse a named group
+            return None
+    
+    def _any_rule_matches(self, prompt_lower: str) -> bool:
+        """Check whether at least one rule matches the lowercased prompt."""
+        if self._prefilter is not None:
+            return self._prefilter.search(prompt_lower) is not None
+        return any(search(prompt_lower) for search, _, _ in self._searches)
+    
+    def _match_rules(self, prompt_lower: str) -> Optional[tuple]:
+        """Scan the rules once and return the selected rule, match count and named groups."""
+        # Find all matching rules, skipping the per-rule scan when nothing matches at all
+        matches = []
+        if self._any_rule_matches(prompt_lower):
+            for search, rule, literals in self._searches:
+                if literals is not None and not any(literal in prompt_lower for literal in literals):
+                    continue
+                if match := search(prompt_lower):
+                    matches.append((match, rule))
+        
+        if not matches:
+            return None
+        
+        # Select the best match based on priority and context
+        selected_match, selected_rule = self._select_best_match(matches, prompt_lower)
+        groups = selected_match.groupdict() if selected_match.re.groupindex else None
+        return selected_rule, len(matches), groups
+    
+    def _cached_match(self, prompt_lower: str) -> Optional[tuple]:
+        """Look up the match outcome for a prompt, scanning the rules on a miss."""
+        key = blake2b(prompt_lower.encode(), digest_size=16).digest()
+        cache = self._match_cache
+        if key in cache:
+            cache.move_to_end(key)
+            return cache[key]
+        
+        outcome = cache[key] = self._match_rules(prompt_lower)
+        if len(cache) > REGEX_MATCH_CACHE_SIZE:
+            cache.popitem(last=False)
+        return outcome
     
     @with_tracing("regex_routing")
     async def can_handle(self, context: RequestContext) -> bool:
-        """Check if any regex pattern matches."""
-        prompt_text = context.prompt.prompt.lower()
-        return any(pattern.search(prompt_text) for pattern, _ in self.compiled_rules)
+        """Check if any regex pattern matches.
+        
+        The outcome is cached, so a matching prompt is not scanned again in
+        handle() and a miss never reaches the routing-decision cache.
+        """
+        return self._cached_match(context.prompt.prompt.lower()) is not None
     
     @with_tracing("regex_routing_handle")
     @cache_routing_decision(ttl=600)  # Cache regex decisions for 10 minutes (very stable)
     async def handle(self, context: RequestContext) -> Optional[IntentResult]:
         # Start detailed debug logging for regex routing
-        step_id = str(uuid.uuid4())
+        step_id = os.urandom(8).hex()  # random trace id without building a UUID object
         logger.info(
             "🔍 Regex Routing Starting",
             prompt=context.prompt.prompt,
@@ -100,20 +322,13 @@ class RegexNode(RouterNode):
             step_id=step_id
         )
         start_time = time.time()
-        prompt_text = context.prompt.prompt
-        step_id = step_id
+        outcome = self._cached_match(context.prompt.prompt.lower())
         
-        # Find all matching rules
-        matches = []
-        for pattern, rule in self.compiled_rules:
-            if match := pattern.search(prompt_text):
-                matches.append((match, rule))
-        
-        if not matches:
+        if outcome is None:
             # Emit trace step for failed regex matching
             if self.trace_emitter and context.prompt.session_id:
                 latency_ms = (time.time() - start_time) * 1000
-                await self.trace_emitter.emit_router_step(
+                self._emit_router_step(
                     session_id=context.prompt.session_id,
                     step_id=step_id,
                     step_name="regex_pattern_matching",
@@ -126,13 +341,12 @@ class RegexNode(RouterNode):
                 )
             return None
         
-        # Select the best match based on priority and context
-        selected_match, selected_rule = self._select_best_match(matches, prompt_text)
+        selected_rule, total_matches, groups = outcome
         latency_ms = (time.time() - start_time) * 1000
         
         # Emit trace step for successful regex matching
         if self.trace_emitter and context.prompt.session_id:
-            await self.trace_emitter.emit_router_step(
+            self._emit_router_step(
                 session_id=context.prompt.session_id,
                 step_id=step_id,
                 step_name="regex_pattern_matching",
@@ -144,7 +358,7 @@ class RegexNode(RouterNode):
                 metadata={
                     "matched_pattern": selected_rule.pattern,
                     "patterns_checked": len(self.compiled_rules),
-                    "total_matches": len(matches)
+                    "total_matches": total_matches
                 }
             )
         
@@ -155,13 +369,14 @@ class RegexNode(RouterNode):
             intent=selected_rule.intent
         )
         
-        # Extract entities from named groups
-        entities = selected_match.groupdict() if hasattr(selected_match, 'groupdict') else {}
+        # Extract entities from named groups, re-matching the original text so
+        # captured values keep their case
+        entities = {}
+        if groups is not None:
+            original_match = re.search(selected_rule.pattern, context.prompt.prompt, re.IGNORECASE)
+            entities = original_match.groupdict() if original_match else dict(groups)
         
-        agent_selection_counter.labels(
-            agent_type=selected_rule.agent_type.value,
-            selection_method=RoutingMethod.REGEX.value
-        ).inc()
+        _selection_counter(selected_rule.agent_type, RoutingMethod.REGEX).inc()
         
         return IntentResult(
             intent=selected_rule.intent,
@@ -174,36 +389,34 @@ class RegexNode(RouterNode):
             }
         )
     
-    def _select_best_match(self, matches, prompt_text: str) -> tuple:
+    def _select_best_match(self, matches, prompt_lower: str) -> tuple:
         """Select the best match from multiple regex matches."""
         if len(matches) == 1:
             return matches[0]
         
-        # Sort by priority first (highest priority wins)
-        matches.sort(key=lambda x: x[1].priority, reverse=True)
-        
-        # If multiple matches have same priority, use contextual logic
+        # Matches come from the priority-sorted rules, so the leading run holds
+        # the highest priority; if it has several, use contextual logic
         highest_priority = matches[0][1].priority
-        top_matches = [m for m in matches if m[1].priority == highest_priority]
+        top_matches = list(itertools.takewhile(lambda m: m[1].priority == highest_priority, matches))
         
         if len(top_matches) == 1:
             return top_matches[0]
         
-        # Apply contextual heuristics for tied priorities
-        prompt_lower = prompt_text.lower()
-        
+        # Apply contextual heuristics for tied priorities, scanning the prompt once
         # Handle multi-keyword scenarios
+        buy_to_lease = (
+            "buy" in prompt_lower and "property" in prompt_lower
+            and _LEASE_OR_RENT.search(prompt_lower) is not None
+        )
+        tech_issue = _TECH_INDICATORS.search(prompt_lower) is not None
         for match, rule in top_matches:
             # Prioritize sales for "buy property to lease" patterns
-            if rule.agent_type == AgentType.SALES and "buy" in prompt_lower and "property" in prompt_lower:
-                if "to lease" in prompt_lower or "to rent" in prompt_lower:
-                    return match, rule
+            if rule.agent_type == AgentType.SALES and buy_to_lease:
+                return match, rule
             
             # Prioritize support for technical issues even with lease/rent keywords
-            if rule.agent_type == AgentType.SUPPORT:
-                tech_indicators = ["system", "bug", "broken", "application system", "technical", "login", "platform"]
-                if any(indicator in prompt_lower for indicator in tech_indicators):
-                    return match, rule
+            if rule.agent_type == AgentType.SUPPORT and tech_issue:
+                return match, rule
         
         # Default to first (highest priority) match
         return top_matches[0]
@@ -218,7 +431,6 @@ class MLClassifierNode(RouterNode):
         self.classifier_model = classifier_model
         # TODO: Load pre-trained classifier model
     
-    @with_tracing("ml_classifier_routing")
     async def can_handle(self, context: RequestContext) -> bool:
         """ML classifier can potentially handle any request."""
         # Skip if no model is loaded
@@ -248,19 +460,10 @@ class MLClassifierNode(RouterNode):
             return None
 
 
-class LLMIntentClassifierNode(RouterNode):
-    """LLM-based intent classification using prompt templates and few-shot examples."""
-    
-    def __init__(self, llm_adapter: OpenAIAdapter, agent_descriptions: Dict[AgentType, str], trace_emitter=None):
-        super().__init__(trace_emitter)
-        self.llm_adapter = llm_adapter
-        self.agent_descriptions = agent_descriptions
-        self.classification_prompt = self._build_classification_prompt()
-        self.min_confidence_threshold = 0.8  # Only use LLM routing for high-confidence decisions
-    
-    def _build_classification_prompt(self) -> str:
-        """Build the classification prompt with few-shot examples."""
-        return """You are an expert intent classifier for an enterprise employee copilot platform. Your task is to analyze user queries and classify them into one of the available agent types with high accuracy.
+# Static classification prompt with few-shot examples. It is sent as the system
+# prompt, an identical prefix on every call that the provider can cache, while
+# the user prompt carries only the query.
+_CLASSIFICATION_PROMPT = """You are an expert intent classifier for an enterprise employee copilot platform. Your task is to analyze user queries and classify them into one of the available agent types with high accuracy.
 
 ## Agent Types and Responsibilities:
 
@@ -349,8 +552,43 @@ Respond with ONLY a JSON object:
     "confidence": 0.0-1.0,
     "reasoning": "concise explanation for classification"
 }"""
+_CLASSIFIER_SYSTEM_PROMPT = (
+    _CLASSIFICATION_PROMPT
+    + "\n\nYou are a precise intent classifier. Always respond with valid JSON in the specified format."
+)
+_PROMPT_PREFIX = 'Query: "'
+_PROMPT_SUFFIX = '"\nRespond with JSON.'
+_PROMPT_TEMPLATE_TOKENS = sum(len(part.split()) for part in (_CLASSIFIER_SYSTEM_PROMPT, _PROMPT_PREFIX, _PROMPT_SUFFIX))
+
+# Concurrent classifications are coalesced into one LLM call per batch window
+CLASSIFY_BATCH_SIZE = 16
+CLASSIFY_BATCH_WINDOW_MS = 10
+_BATCH_PROMPT_PREFIX = "Queries:\n"
+_BATCH_PROMPT_SUFFIX = (
+    "\nClassify each query independently. Respond with ONLY a JSON object of the form "
+    '{"classifications": [...]} holding one classification object, in the output format above, '
+    "per query and in the same order as the queries."
+)
+
+# Direct value lookup so an unknown agent type from the LLM is a miss, not an exception
+_AGENT_TYPES_BY_VALUE = {agent_type.value: agent_type for agent_type in AgentType}
+
+
+class LLMIntentClassifierNode(RouterNode):
+    """LLM-based intent classification using prompt templates and few-shot examples."""
+    
+    handles_own_misses = True
+    
+    def __init__(self, llm_adapter: OpenAIAdapter, agent_descriptions: Dict[AgentType, str], trace_emitter=None):
+        super().__init__(trace_emitter)
+        self.llm_adapter = llm_adapter
+        self.agent_descriptions = agent_descriptions
+        self.classification_prompt = _CLASSIFICATION_PROMPT
+        self.min_confidence_threshold = 0.8  # Only use LLM routing for high-confidence decisions
+        # Queries waiting for the next batched classification call
+        self._pending: List[tuple] = []
+        self._flush_task: Optional[asyncio.Task] = None
 
-    @with_tracing("llm_intent_classifier_can_handle")
     async def can_handle(self, context: RequestContext) -> bool:
         """LLM classifier can handle any request."""
         return True
@@ -359,62 +597,20 @@ Respond with ONLY a JSON object:
     async def handle(self, context: RequestContext) -> Optional[IntentResult]:
         """Use LLM with prompt templates for intent classification."""
         start_time = time.time()
-        step_id = str(uuid.uuid4())
+        step_id = os.urandom(8).hex()
         
-        logger.info(
-            "🔍 LLM Intent Classification Starting",
-            query=context.prompt.prompt,
-            query_length=len(context.prompt.prompt),
-            session_id=context.prompt.session_id,
-            step_id=step_id
-        )
-        
-        try:
-            # Build the full prompt with the user query
-            full_prompt = f"""{self.classification_prompt}
-
-## User Query to Classify:
-"{context.prompt.prompt}"
-
-Analyze this query and provide your classification:"""
-
+        if _std_logger.isEnabledFor(logging.DEBUG):
             logger.debug(
-                "📝 LLM Classification Prompt Built",
-                prompt_length=len(full_prompt),
-                temperature=0.1,
-                step_id=step_id
-            )
-
-            response = await self.llm_adapter.complete(
-                prompt=full_prompt,
-                system_prompt="You are a precise intent classifier. Always respond with valid JSON in the specified format.",
-                temperature=0.1,  # Very low temperature for consistent classification
-                response_format="json"
-            )
-            
-            logger.info(
-                "🤖 LLM Response Received",
-                response_content=response.content[:200] + "..." if len(response.content) > 200 else response.content,
-                response_length=len(response.content),
+                "🔍 LLM Intent Classification Starting",
+                query=context.prompt.prompt,
+                query_length=len(context.prompt.prompt),
+                session_id=context.prompt.session_id,
                 step_id=step_id
             )
-            
-            # Parse LLM response
-            try:
-                classification = json.loads(response.content)
-                logger.info(
-                    "✅ LLM Classification Parsed Successfully",
-                    classification=classification,
-                    step_id=step_id
-                )
-            except json.JSONDecodeError as parse_error:
-                logger.error(
-                    "❌ LLM Classification JSON Parse Failed", 
-                    raw_response=response.content,
-                    parse_error=str(parse_error),
-                    step_id=step_id
-                )
-                raise parse_error
+        
+        try:
+            # Concurrent queries are classified together in one LLM call
+            classification = await self._classify(context.prompt.prompt, step_id)
             
             # Validate and extract fields
             agent_type_str = classification.get("agent_type", "").upper()
@@ -422,28 +618,12 @@ Analyze this query and provide your classification:"""
             intent = classification.get("intent", "unknown")
             reasoning = classification.get("reasoning", "")
             
-            logger.info(
-                "🎯 LLM Classification Results Extracted",
-                agent_type_str=agent_type_str,
-                confidence=confidence,
-                intent=intent,
-                reasoning=reasoning,
-                step_id=step_id
-            )
-            
             # Validate agent type
-            try:
-                agent_type = AgentType(agent_type_str.lower())
-                logger.info(
-                    "✅ Agent Type Validation Successful",
-                    agent_type=agent_type.value,
-                    step_id=step_id
-                )
-            except ValueError as validation_error:
+            agent_type = _AGENT_TYPES_BY_VALUE.get(agent_type_str.lower())
+            if agent_type is None:
                 logger.warning(
                     "⚠️ Invalid Agent Type from LLM - Using Fallback", 
                     invalid_agent_type=agent_type_str,
-                    validation_error=str(validation_error),
                     fallback_agent="general",
                     step_id=step_id
                 )
@@ -454,7 +634,7 @@ Analyze this query and provide your classification:"""
             
             # Emit trace step for successful LLM classification
             if self.trace_emitter and context.prompt.session_id:
-                await self.trace_emitter.emit_router_step(
+                self._emit_router_step(
                     session_id=context.prompt.session_id,
                     step_id=step_id,
                     step_name="llm_intent_classification",
@@ -466,7 +646,7 @@ Analyze this query and provide your classification:"""
                     metadata={
                         "reasoning": reasoning,
                         "raw_response": classification,
-                        "prompt_tokens": len(full_prompt.split()),
+                        "prompt_tokens": _PROMPT_TEMPLATE_TOKENS + len(context.prompt.prompt.split()),
                         "classification_confidence": confidence
                     }
                 )
@@ -477,26 +657,21 @@ Analyze this query and provide your classification:"""
                     "🚨 LLM Classification Confidence Below Threshold - Passing to Next Handler",
                     confidence=confidence,
                     threshold=self.min_confidence_threshold,
-                    query=context.prompt.prompt[:100] + "..." if len(context.prompt.prompt) > 100 else context.prompt.prompt,
                     agent_type=agent_type.value,
                     step_id=step_id
                 )
                 return None  # Pass to next handler
             
             logger.info(
-                "🎉 LLM Intent Classification Completed Successfully",
-                final_agent=agent_type.value,
-                final_confidence=confidence,
-                final_intent=intent,
-                routing_method="llm_classifier",
-                query=context.prompt.prompt[:50] + "..." if len(context.prompt.prompt) > 50 else context.prompt.prompt,
+                "llm_classification_done",
+                agent=agent_type.value,
+                confidence=confidence,
+                intent=intent,
+                latency_ms=latency_ms,
                 step_id=step_id
             )
             
-            agent_selection_counter.labels(
-                agent_type=agent_type.value,
-                selection_method=RoutingMethod.LLM_ROUTER.value
-            ).inc()
+            _selection_counter(agent_type, RoutingMethod.LLM_ROUTER).inc()
             
             return IntentResult(
                 intent=intent,
@@ -516,7 +691,7 @@ Analyze this query and provide your classification:"""
             
             # Emit trace step for failed parsing
             if self.trace_emitter and context.prompt.session_id:
-                await self.trace_emitter.emit_router_step(
+                self._emit_router_step(
                     session_id=context.prompt.session_id,
                     step_id=step_id,
                     step_name="llm_intent_classification",
@@ -534,7 +709,7 @@ Analyze this query and provide your classification:"""
             
             # Emit trace step for general failure
             if self.trace_emitter and context.prompt.session_id:
-                await self.trace_emitter.emit_router_step(
+                self._emit_router_step(
                     session_id=context.prompt.session_id,
                     step_id=step_id,
                     step_name="llm_intent_classification",
@@ -547,10 +722,123 @@ Analyze this query and provide your classification:"""
                 )
             return None
 
+    
+    async def _classify(self, prompt: str, step_id: str) -> Dict[str, Any]:
+        """Queue a query for the next batched classification call and wait for its result."""
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((prompt, step_id, future))
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_pending())
+        return await future
+    
+    async def _flush_pending(self) -> None:
+        """Collect queries for a batch window and classify them, until none are waiting."""
+        # Queries queued while a batch is in flight are picked up by the next pass
+        while self._pending:
+            await asyncio.sleep(CLASSIFY_BATCH_WINDOW_MS / 1000)
+            pending, self._pending = self._pending, []
+            await asyncio.gather(*(
+                self._run_batch(pending[i:i + CLASSIFY_BATCH_SIZE])
+                for i in range(0, len(pending), CLASSIFY_BATCH_SIZE)
+            ))
+    
+    async def _run_batch(self, batch: List[tuple]) -> None:
+        """Classify a batch of queries and resolve each caller's future."""
+        prompts = [prompt for prompt, _, _ in batch]
+        step_ids = [step_id for _, step_id, _ in batch]
+        try:
+            if len(batch) == 1:
+                results = [await self._complete_one(prompts[0], step_ids[0])]
+            else:
+                try:
+                    results = await self._complete_batch(prompts, step_ids)
+                except ValueError as e:
+                    logger.warning(
+                        "Batched LLM classification unusable, classifying individually",
+                        error=str(e),
+                        step_ids=step_ids
+                    )
+                    results = await asyncio.gather(
+                        *(self._complete_one(prompt, step_id) for prompt, step_id in zip(prompts, step_ids)),
+                        return_exceptions=True
+                    )
+        except Exception as e:
+            results = [e] * len(batch)
+        
+        for (_, _, future), result in zip(batch, results):
+            if future.done():
+                continue  # caller went away
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+    
+    async def _complete_one(self, prompt: str, step_id: str) -> Dict[str, Any]:
+        """Classify a single query."""
+        response = await self.llm_adapter.complete(
+            prompt=_PROMPT_PREFIX + prompt + _PROMPT_SUFFIX,
+            system_prompt=_CLASSIFIER_SYSTEM_PROMPT,
+            temperature=0.1,  # Very low temperature for consistent classification
+            response_format="json"
+        )
+        
+        if _std_logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "🤖 LLM Response Received",
+                response_content=response.content,
+                response_length=len(response.content),
+                step_id=step_id
+            )
+        
+        # Parse LLM response (orjson.JSONDecodeError subclasses json.JSONDecodeError)
+        try:
+            return orjson.loads(response.content)
+        except json.JSONDecodeError as parse_error:
+            logger.error(
+                "❌ LLM Classification JSON Parse Failed", 
+                raw_response=response.content,
+                parse_error=str(parse_error),
+                step_id=step_id
+            )
+            raise
+    
+    async def _complete_batch(self, prompts: List[str], step_ids: List[str]) -> List[Dict[str, Any]]:
+        """Classify several queries with one LLM call.
+        
+        Raises ValueError when the response is not one classification per query.
+        """
+        queries = "\n".join(f'{i}. "{prompt}"' for i, prompt in enumerate(prompts, 1))
+        response = await self.llm_adapter.complete(
+            prompt=_BATCH_PROMPT_PREFIX + queries + _BATCH_PROMPT_SUFFIX,
+            system_prompt=_CLASSIFIER_SYSTEM_PROMPT,
+            temperature=0.1,
+            response_format="json"
+        )
+        
+        if _std_logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "🤖 Batched LLM Response Received",
+                response_content=response.content,
+                response_length=len(response.content),
+                step_ids=step_ids
+            )
+        
+        parsed = orjson.loads(response.content)
+        classifications = parsed.get("classifications") if isinstance(parsed, dict) else parsed
+        if (
+            not isinstance(classifications, list)
+            or len(classifications) != len(prompts)
+            or not all(isinstance(item, dict) for item in classifications)
+        ):
+            raise ValueError(f"expected {len(prompts)} classifications in batched response")
+        return classifications
+
 
 class LLMRouterNode(RouterNode):
     """Simplified LLM-based routing for fallback cases."""
     
+    handles_own_misses = True
+    
     def __init__(self, llm_adapter: OpenAIAdapter, agent_descriptions: Dict[AgentType, str], trace_emitter=None):
         super().__init__(trace_emitter)
         self.llm_adapter = llm_adapter
@@ -592,7 +880,6 @@ Analyze the user's request and respond with ONLY a JSON object in this format:
 
 Choose the most appropriate agent based on the request content and context."""
     
-    @with_tracing("llm_router_can_handle")
     async def can_handle(self, context: RequestContext) -> bool:
         """LLM router can handle any request as a fallback."""
         return True
@@ -610,7 +897,7 @@ Choose the most appropriate agent based on the request content and context."""
             )
             
             # Parse LLM response
-            routing_decision = json.loads(response.content)
+            routing_decision = orjson.loads(response.content)
             
             # Validate agent type
             agent_type = AgentType(routing_decision.get("agent_type", "general"))
@@ -623,10 +910,7 @@ Choose the most appropriate agent based on the request content and context."""
                 reasoning=routing_decision.get("reasoning")
             )
             
-            agent_selection_counter.labels(
-                agent_type=agent_type.value,
-                selection_method=RoutingMethod.LLM_ROUTER.value
-            ).inc()
+            _selection_counter(agent_type, RoutingMethod.LLM_ROUTER).inc()
             
             return IntentResult(
                 intent=routing_decision.get("intent", "general_query"),
@@ -647,6 +931,8 @@ Choose the most appropriate agent based on the request content and context."""
 class FallbackNode(RouterNode):
     """Fallback handler when no other node can handle the request."""
     
+    handles_own_misses = True
+    
     def __init__(self, default_agent: AgentType = AgentType.GENERAL, trace_emitter=None):
         super().__init__(trace_emitter)
         self.default_agent = default_agent
@@ -664,10 +950,7 @@ class FallbackNode(RouterNode):
             default_agent=self.default_agent.value
         )
         
-        agent_selection_counter.labels(
-            agent_type=self.default_agent.value,
-            selection_method=RoutingMethod.FALLBACK.value
-        ).inc()
+        _selection_counter(self.default_agent, RoutingMethod.FALLBACK).inc()
         
         return IntentResult(
             intent="general_query",
@@ -678,6 +961,21 @@ class FallbackNode(RouterNode):
         )
 
 
+@functools.lru_cache(maxsize=None)
+def _enhanced_router_classes() -> Optional[tuple]:
+    """Import the learning and context-aware router classes once.
+    
+    They import this module, so they are loaded lazily; returns None when
+    the enhanced routing components are unavailable.
+    """
+    try:
+        from .learning_router import LearningRouterNode
+        from .context_aware_router import ContextAwareRouter
+    except ImportError:
+        return None
+    return LearningRouterNode, ContextAwareRouter
+
+
 class RouterChain:
     """Main router chain orchestrator."""
     
@@ -685,6 +983,13 @@ class RouterChain:
         self.head: Optional[RouterNode] = None
         self.strategy_selector = StrategySelector()
         self.trace_emitter = trace_emitter
+        self._trace_buffer = _TraceBuffer()
+        # Set by build_enhanced_chain when those layers head the chain
+        self._learning_router: Optional['LearningRouterNode'] = None
+        self._context_router: Optional['ContextAwareRouter'] = None
+        # Only chains made of stateless nodes cache decisions; the learning and
+        # context-aware routers must see every request
+        self._decision_cache: Optional[TTLCache] = None
     
     def build_default_chain(
         self,
@@ -718,6 +1023,9 @@ class RouterChain:
             regex_node.set_next(ml_node).set_next(llm_node).set_next(fallback_node)
             self.head = regex_node
         
+        self._decision_cache = TTLCache(maxsize=DECISION_CACHE_SIZE, ttl=DECISION_CACHE_TTL_SEC)
+        self._learning_router = None
+        self._context_router = None
         return self
     
     def build_enhanced_chain(
@@ -737,12 +1045,11 @@ class RouterChain:
         - Context-aware router for conversation memory
         - Traditional routing fallbacks
         """
-        try:
-            from .learning_router import LearningRouterNode
-            from .context_aware_router import ContextAwareRouter
-        except ImportError:
+        classes = _enhanced_router_classes()
+        if classes is None:
             logger.warning("Enhanced routing components not available, falling back to default chain")
             return self.build_default_chain(regex_rules, llm_adapter, agent_descriptions, use_llm_primary)
+        LearningRouterNode, ContextAwareRouter = classes
         
         # First build the base chain
         base_chain = RouterChain(self.trace_emitter)
@@ -753,6 +1060,8 @@ class RouterChain:
             use_llm_primary=use_llm_primary
         )
         
+        self._learning_router = None
+        self._context_router = None
         if enable_learning:
             # Wrap base chain with learning capabilities
             learning_router = LearningRouterNode(
@@ -768,8 +1077,10 @@ class RouterChain:
                     trace_emitter=self.trace_emitter
                 )
                 self.head = context_router
+                self._context_router = context_router
             else:
                 self.head = learning_router
+            self._learning_router = learning_router
         elif enable_context_awareness:
             # Only context awareness without learning - use base chain directly
             logger.info("Context awareness enabled without learning - using base chain")
@@ -778,36 +1089,16 @@ class RouterChain:
             # Use base chain as-is
             self.head = base_chain.head
         
+        self._decision_cache = None if enable_learning else base_chain._decision_cache
         return self
 
     def get_learning_router(self) -> Optional['LearningRouterNode']:
         """Get the learning router node if available."""
-        try:
-            from .learning_router import LearningRouterNode
-            from .context_aware_router import ContextAwareRouter
-            
-            if isinstance(self.head, ContextAwareRouter):
-                learning_router = self.head.learning_router
-                if isinstance(learning_router, LearningRouterNode):
-                    return learning_router
-            elif isinstance(self.head, LearningRouterNode):
-                return self.head
-        except ImportError:
-            pass
-        
-        return None
+        return self._learning_router
 
     def get_context_router(self) -> Optional['ContextAwareRouter']:
         """Get the context-aware router if available."""
-        try:
-            from .context_aware_router import ContextAwareRouter
-            
-            if isinstance(self.head, ContextAwareRouter):
-                return self.head
-        except ImportError:
-            pass
-        
-        return None
+        return self._context_router
 
     async def record_feedback(self, decision_id: str, feedback_type: str, feedback_value: Any):
         """Record feedback for learning purposes."""
@@ -853,12 +1144,13 @@ class RouterChain:
         if not self.head:
             raise RuntimeError("Router chain not initialized")
         
-        start_time = asyncio.get_event_loop().time()
-        trace_id = str(uuid.uuid4())
+        start_ns = time.perf_counter_ns()
+        tracing = bool(self.trace_emitter and context.prompt.session_id)
+        trace_id = os.urandom(12).hex() if tracing else ""
         
         # Emit trace start event
-        if self.trace_emitter and context.prompt.session_id:
-            await self.trace_emitter.emit_router_trace(
+        if tracing:
+            self._trace_buffer.submit(self.trace_emitter.emit_router_trace, dict(
                 session_id=context.prompt.session_id,
                 trace_id=trace_id,
                 query=context.prompt.prompt,
@@ -868,24 +1160,37 @@ class RouterChain:
                 final_agent=AgentType.GENERAL,  # Will be updated
                 total_latency_ms=0.0,  # Will be updated
                 metadata={"request_id": context.request_id}
-            )
+            ))
         
-        result = await self.head.process(context)
+        cache_key = None
+        result = None
+        if self._decision_cache is not None:
+            cache_key = (" ".join(context.prompt.prompt.lower().split()), context.user_id)
+            cached = self._decision_cache.get(cache_key)
+            if cached is not None:
+                result = cached.model_copy(deep=True)
         
-        if not result:
-            # This should not happen with fallback node
-            raise RuntimeError("No routing decision made")
+        if result is None:
+            result = await self.head.process(context)
+            
+            if not result:
+                # This should not happen with fallback node
+                raise RuntimeError("No routing decision made")
+            
+            if cache_key is not None and self._is_cacheable(result):
+                self._decision_cache[cache_key] = result.model_copy(deep=True)
         
         # Apply strategy selection if we have a routing result
         agent_type = await self.strategy_selector.select(result, context)
         result.metadata["selected_agent"] = agent_type.value
         
-        elapsed_ms = (asyncio.get_event_loop().time() - start_time) * 1000
+        elapsed_ms = (time.perf_counter_ns() - start_ns) / 1e6
         result.metadata["routing_latency_ms"] = elapsed_ms
         
         # Emit final trace event with complete routing decision
-        if self.trace_emitter and context.prompt.session_id:
-            await self.trace_emitter.emit_router_decision(
+        if tracing:
+            # Copy metadata; callers may add to the result before the trace is sent
+            self._trace_buffer.submit(self.trace_emitter.emit_router_decision, dict(
                 session_id=context.prompt.session_id,
                 trace_id=trace_id,
                 final_agent=agent_type,
@@ -893,8 +1198,8 @@ class RouterChain:
                 intent=result.intent,
                 method=result.routing_method.value,
                 total_latency_ms=elapsed_ms,
-                metadata=result.metadata
-            )
+                metadata=dict(result.metadata)
+            ))
         
         logger.info(
             "Routing completed",
@@ -906,6 +1211,19 @@ class RouterChain:
         )
         
         return result
+    
+    @staticmethod
+    def _is_cacheable(result: IntentResult) -> bool:
+        """Regex hits and confident LLM decisions are stable enough to reuse.
+        
+        Fallback answers may stem from a transient LLM failure, and entities
+        keep the original prompt's case, so neither is cached.
+        """
+        if result.entities:
+            return False
+        if result.routing_method == RoutingMethod.REGEX:
+            return True
+        return result.routing_method == RoutingMethod.LLM_ROUTER and result.confidence > DECISION_CACHE_MIN_CONFIDENCE
 
 
 class StrategySelector:
@@ -5,12 +5,13 @@ This module defines configurations for connecting to various enterprise
 systems through MCP servers.
 """
 
-from typing import Dict, List
+from types import MappingProxyType
+from typing import List, Mapping
 from .mcp_client import MCPServerConfig, MCPTransport
 
 
 # IT Systems MCP Servers
-IT_MCP_SERVERS: Dict[str, MCPServerConfig] = {
+IT_MCP_SERVERS: Mapping[str, MCPServerConfig] = MappingProxyType({
     "active_directory": MCPServerConfig(
         name="active_directory",
         transport=MCPTransport.HTTP,
@@ -35,10 +36,10 @@ IT_MCP_SERVERS: Dict[str, MCPServerConfig] = {
         endpoint="http://localhost:3004/mcp", 
         timeout=30
     )
-}
+})
 
 # Finance Systems MCP Servers  
-FINANCE_MCP_SERVERS: Dict[str, MCPServerConfig] = {
+FINANCE_MCP_SERVERS: Mapping[str, MCPServerConfig] = MappingProxyType({
     "sap_erp": MCPServerConfig(
         name="sap_erp",
         transport=MCPTransport.HTTP,
@@ -69,10 +70,10 @@ FINANCE_MCP_SERVERS: Dict[str, MCPServerConfig] = {
         endpoint="http://localhost:3014/mcp",
         timeout=30
     )
-}
+})
 
 # HR Systems MCP Servers
-HR_MCP_SERVERS: Dict[str, MCPServerConfig] = {
+HR_MCP_SERVERS: Mapping[str, MCPServerConfig] = MappingProxyType({
     "workday_hris": MCPServerConfig(
         name="workday_hris",
         transport=MCPTransport.HTTP,
@@ -97,10 +98,10 @@ HR_MCP_SERVERS: Dict[str, MCPServerConfig] = {
         endpoint="http://localhost:3023/mcp",
         timeout=30
     )
-}
+})
 
 # Productivity Tools MCP Servers
-PRODUCTIVITY_MCP_SERVERS: Dict[str, MCPServerConfig] = {
+PRODUCTIVITY_MCP_SERVERS: Mapping[str, MCPServerConfig] = MappingProxyType({
     "microsoft_365": MCPServerConfig(
         name="microsoft_365",
         transport=MCPTransport.HTTP,
@@ -131,15 +132,15 @@ PRODUCTIVITY_MCP_SERVERS: Dict[str, MCPServerConfig] = {
         endpoint="http://localhost:3034/mcp",
         timeout=30
     )
-}
+})
 
-# Combine all servers by agent type
-AGENT_MCP_MAPPING: Dict[str, Dict[str, MCPServerConfig]] = {
+# Combine all servers by agent type; every mapping here is read-only
+AGENT_MCP_MAPPING: Mapping[str, Mapping[str, MCPServerConfig]] = MappingProxyType({
     "it": IT_MCP_SERVERS,
     "finance": FINANCE_MCP_SERVERS,
     "hr": HR_MCP_SERVERS,
     "productivity": PRODUCTIVITY_MCP_SERVERS
-}
+})
 
 # Example tool definitions for each system
 EXPECTED_TOOLS = {
@@ -11,6 +11,7 @@ from fastapi.middleware.gzip import GZipMiddleware
 from app.core.middleware.error_wrapper import ErrorWrapperMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
 from fastapi.responses import JSONResponse
+import sys
 import time
 from datetime import datetime
 from pathlib import Path
@@ -101,6 +102,11 @@ async def lifespan(app: FastAPI):
     # Disconnect from Redis
     await redis_adapter.disconnect()
     
+    # Close the RAG system's pooled connections, if it was loaded
+    rag_module = sys.modules.get("app.domain.llamaindex_rag_system")
+    if rag_module is not None:
+        await rag_module.shutdown_rag_system()
+    
     # Cleanup agents
     for agent_id in list(agent_registry._agents.keys()):
         await agent_registry.unload_agent(agent_id)
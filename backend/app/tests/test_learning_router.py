@@ -0,0 +1,285 @@
+"""Tests for the adaptive learning router bookkeeping."""
+
+import asyncio
+from collections import deque
+
+import pytest
+
+from app.domain import learning_router
+from app.domain.learning_router import FeedbackType, LearningRouterNode, _tokenize
+from app.domain.schemas import AgentType, IntentResult, PromptIn, RequestContext, RoutingMethod
+
+
+def _make_context(prompt: str, request_id: str) -> RequestContext:
+    return RequestContext(prompt=PromptIn(prompt=prompt, session_id="session1"), request_id=request_id)
+
+
+def _make_result(agent: AgentType) -> IntentResult:
+    return IntentResult(
+        intent="test_intent",
+        confidence=0.9,
+        entities={},
+        routing_method=RoutingMethod.REGEX,
+        metadata={"selected_agent": agent.value},
+    )
+
+
+async def _record(router: LearningRouterNode, prompt: str, request_id: str, agent: AgentType = AgentType.HR):
+    start_time = asyncio.get_event_loop().time()
+    await router._record_routing_decision(_make_context(prompt, request_id), _make_result(agent), start_time)
+
+
+@pytest.mark.asyncio
+async def test_find_similar_decisions_uses_token_overlap():
+    router = LearningRouterNode(base_router_chain=None)
+
+    await _record(router, "how many vacation days do I have", "r1")
+    await _record(router, "How many vacation days do I have", "r2")
+    await _record(router, "reset my laptop password", "r3", AgentType.SUPPORT)
+
+    similar = router._find_similar_decisions(_tokenize("how many vacation days do i have"))
+    assert [d.request_id for d in similar] == ["r1", "r2"]
+    assert router._find_similar_decisions(_tokenize("completely unrelated words")) == []
+
+
+@pytest.mark.asyncio
+async def test_evicted_decisions_leave_the_token_index():
+    router = LearningRouterNode(base_router_chain=None)
+    router.decision_history = deque(maxlen=2)
+
+    await _record(router, "payroll question about bonus", "r1")
+    await _record(router, "reset my laptop password", "r2")
+    await _record(router, "printer is jammed again", "r3")
+
+    assert [d.request_id for d in router.decision_history] == ["r2", "r3"]
+    assert "payroll" not in router._token_index
+    assert router._find_similar_decisions(_tokenize("payroll question about bonus")) == []
+    assert [d.request_id for d in router._find_similar_decisions(_tokenize("reset my laptop password"))] == ["r2"]
+
+
+@pytest.mark.asyncio
+async def test_record_feedback_finds_decision_by_id():
+    router = LearningRouterNode(base_router_chain=None)
+    router.decision_history = deque(maxlen=1)
+
+    await _record(router, "payroll question about bonus", "r1")
+    decision_id = router.decision_history[0].decision_id
+    await router.record_feedback(decision_id, FeedbackType.USER_SATISFACTION, 4)
+    assert router.decision_history[0].user_satisfaction == 4.0
+
+    await _record(router, "reset my laptop password", "r2")
+    assert decision_id not in router._decision_index
+    await router.record_feedback(decision_id, FeedbackType.USER_SATISFACTION, 1)
+
+
+@pytest.mark.asyncio
+async def test_learning_optimization_reads_background_snapshot():
+    router = LearningRouterNode(base_router_chain=None)
+    prompt = "how many vacation days do I have"
+
+    for i in range(3):
+        await _record(router, prompt, f"r{i}", AgentType.SUPPORT)
+        decision_id = router.decision_history[-1].decision_id
+        await router.record_feedback(decision_id, FeedbackType.AGENT_SUCCESS, True)
+        await router.record_feedback(decision_id, FeedbackType.USER_SATISFACTION, 5)
+
+    context = _make_context(prompt, "r-new")
+    base_result = _make_result(AgentType.HR)
+
+    # First sighting only queues the query for the background rebuild
+    assert await router._apply_learning_optimization(context, base_result) is None
+    await router._snapshot_task
+
+    optimized = await router._apply_learning_optimization(context, base_result)
+    assert optimized is not None
+    assert optimized.metadata["selected_agent"] == AgentType.SUPPORT.value
+    assert optimized.metadata["original_agent"] == AgentType.HR.value
+
+
+@pytest.mark.asyncio
+async def test_agent_performance_running_aggregates_replace_feedback():
+    router = LearningRouterNode(base_router_chain=None)
+
+    await _record(router, "payroll question about bonus", "r1")
+    await _record(router, "payroll question about taxes", "r2")
+    first_id = router.decision_history[0].decision_id
+
+    await router.record_feedback(first_id, FeedbackType.USER_SATISFACTION, 2)
+    await router.record_feedback(first_id, FeedbackType.USER_SATISFACTION, 4)
+    await router.record_feedback(first_id, FeedbackType.AGENT_SUCCESS, True)
+    await router.record_feedback(first_id, FeedbackType.AGENT_SUCCESS, True)
+
+    stats = router.agent_performance[AgentType.HR]
+    assert stats.total_requests == 2
+    assert stats.successful_requests == 1
+    assert stats.satisfaction_count == 1
+    assert stats.avg_satisfaction == 4.0
+
+
+@pytest.mark.asyncio
+async def test_decisions_outside_learning_window_are_skipped():
+    router = LearningRouterNode(base_router_chain=None)
+
+    await _record(router, "payroll question about bonus", "r1")
+    await _record(router, "payroll question about bonus", "r2")
+    router.decision_history[0].timestamp -= router.learning_window_hours * 3600 + 1
+
+    similar = router._find_similar_decisions(_tokenize("payroll question about bonus"))
+    assert [d.request_id for d in similar] == ["r2"]
+
+
+@pytest.mark.asyncio
+async def test_learning_metrics_follow_feedback_and_eviction():
+    router = LearningRouterNode(base_router_chain=None)
+    router.decision_history = deque(maxlen=2)
+    get_metrics = LearningRouterNode.get_learning_metrics.__wrapped__
+
+    await _record(router, "payroll question about bonus", "r1")
+    await router.record_feedback(router.decision_history[0].decision_id, FeedbackType.AGENT_SUCCESS, True)
+    await _record(router, "reset my laptop password", "r2", AgentType.SUPPORT)
+    await router.record_feedback(router.decision_history[1].decision_id, FeedbackType.USER_SATISFACTION, 3)
+
+    metrics = get_metrics(router)
+    assert metrics['recent_decisions'] == 2
+    assert metrics['success_rate'] == 0.5
+    assert metrics['avg_satisfaction'] == 3.0
+    assert metrics['agent_distribution'] == {"hr": 1, "support": 1}
+
+    await _record(router, "printer is jammed again", "r3", AgentType.SUPPORT)
+
+    metrics = get_metrics(router)
+    assert metrics['recent_decisions'] == 2
+    assert metrics['success_rate'] == 0.0
+    assert metrics['agent_distribution'] == {"support": 2}
+
+
+@pytest.mark.asyncio
+async def test_single_word_queries_are_not_compared():
+    router = LearningRouterNode(base_router_chain=None)
+
+    await _record(router, "payroll", "r1")
+    await _record(router, "payroll", "r2")
+
+    assert router._find_similar_decisions(_tokenize("payroll")) == []
+    assert await router._apply_learning_optimization(_make_context("payroll", "r3"), _make_result(AgentType.HR)) is None
+    assert router._snapshot_task is None
+
+
+@pytest.mark.asyncio
+async def test_low_success_queries_skip_performance_scoring():
+    router = LearningRouterNode(base_router_chain=None)
+    prompt = "how many vacation days do I have"
+
+    for i in range(4):
+        await _record(router, prompt, f"r{i}", AgentType.SUPPORT)
+        await router.record_feedback(router.decision_history[-1].decision_id, FeedbackType.AGENT_SUCCESS, i == 0)
+
+    # One success in four caps the composite score at exactly 0.7
+    assert router._analyze_agent_performance_for_query(_tokenize(prompt)) != {}
+
+    router.confidence_threshold = 0.75
+    assert router._analyze_agent_performance_for_query(_tokenize(prompt)) == {}
+
+
+@pytest.mark.asyncio
+async def test_unknown_selected_agent_is_recorded_as_general():
+    router = LearningRouterNode(base_router_chain=None)
+    result = _make_result(AgentType.HR)
+    result.metadata["selected_agent"] = "not-an-agent"
+
+    await router._record_routing_decision(_make_context("payroll question", "r1"), result, 0.0)
+
+    assert router.decision_history[0].selected_agent == AgentType.GENERAL
+
+
+class _CountingChain:
+    def __init__(self):
+        self.calls = 0
+
+    async def route(self, context):
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        return _make_result(AgentType.HR)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_requests_share_one_base_route():
+    chain = _CountingChain()
+    router = LearningRouterNode(base_router_chain=chain)
+
+    results = await asyncio.gather(*(
+        router.handle(_make_context("payroll question about bonus", f"r{i}")) for i in range(3)
+    ))
+
+    assert chain.calls == 1
+    assert all(r.metadata["selected_agent"] == AgentType.HR.value for r in results)
+    assert len({id(r) for r in results}) == 3
+    assert len(router.decision_history) == 3
+
+
+@pytest.mark.asyncio
+async def test_vectorized_agent_stats_match_python_loop():
+    router = LearningRouterNode(base_router_chain=None)
+
+    for i in range(12):
+        agent = AgentType.SUPPORT if i % 3 else AgentType.HR
+        await _record(router, "how many vacation days do I have", f"r{i}", agent)
+        decision_id = router.decision_history[-1].decision_id
+        await router.record_feedback(decision_id, FeedbackType.AGENT_SUCCESS, i % 2 == 0)
+        if i % 4:
+            await router.record_feedback(decision_id, FeedbackType.USER_SATISFACTION, i % 5 + 1)
+        if i % 5:
+            await router.record_feedback(decision_id, FeedbackType.RESOLUTION_TIME, 60 * i)
+
+    similar = router._find_similar_decisions(_tokenize("how many vacation days do i have"))
+    expected = router._collect_agent_stats(similar)
+    vectorized = router._collect_agent_stats_vectorized(similar)
+
+    assert vectorized.keys() == expected.keys()
+    for agent, stats in expected.items():
+        assert vectorized[agent] == pytest.approx(stats)
+
+
+@pytest.mark.asyncio
+async def test_vectorized_path_follows_similar_decision_count(monkeypatch):
+    router = LearningRouterNode(base_router_chain=None)
+    router.vectorize_min_candidates = 3
+
+    await _record(router, "how many vacation days do I have", "r1")
+    for i in range(4):
+        await _record(router, f"vacation rental listing number {i}", f"v{i}")
+
+    monkeypatch.setattr(router, "_collect_agent_stats_vectorized", lambda decisions: pytest.fail("vectorized"))
+    router._analyze_agent_performance_for_query(_tokenize("how many vacation days do i have"))
+
+
+@pytest.mark.asyncio
+async def test_router_metrics_are_recorded_in_batches(monkeypatch):
+    batches = []
+    monkeypatch.setattr(learning_router.metrics_collector, "record_router_requests_batch", batches.append)
+    router = LearningRouterNode(base_router_chain=_CountingChain())
+
+    await asyncio.gather(*(
+        router.handle(_make_context(f"payroll question number {i}", f"r{i}")) for i in range(3)
+    ))
+    await router._metrics_task
+
+    assert sum(len(batch) for batch in batches) == 3
+    assert all(event["agent_type"] == AgentType.HR.value for batch in batches for event in batch)
+
+
+@pytest.mark.asyncio
+async def test_iter_decisions_survives_recording_mid_export():
+    router = LearningRouterNode(base_router_chain=None)
+    router.decision_history = deque(maxlen=2)
+
+    await _record(router, "payroll question about bonus", "r1")
+    await _record(router, "reset my laptop password", "r2")
+
+    exported = router.iter_decisions()
+    first = next(exported)
+    await _record(router, "printer is jammed again", "r3")
+
+    assert first["session_id"] == "session1"
+    assert [d["user_query"] for d in exported] == ["reset my laptop password"]
+    assert len(router.export_learning_data()["decision_history"]) == 2
@@ -0,0 +1,74 @@
+"""Tests for LLM adapter and availability caching in the LLM factory."""
+
+import pytest
+
+from app.domain import llm_factory
+
+
+class _CountingAdapter:
+    created = 0
+
+    def __init__(self):
+        type(self).created += 1
+
+
+class _FakeResponse:
+    status_code = 200
+
+
+class _FakeProbeClient:
+    def __init__(self):
+        self.calls = 0
+
+    async def get(self, url):
+        self.calls += 1
+        return _FakeResponse()
+
+
+def test_adapters_are_reused_until_ttl_expires(monkeypatch):
+    monkeypatch.setattr(llm_factory, "_adapter_cache", {})
+    _CountingAdapter.created = 0
+
+    first = llm_factory._get_adapter(_CountingAdapter)
+    assert llm_factory._get_adapter(_CountingAdapter) is first
+    assert _CountingAdapter.created == 1
+
+    monkeypatch.setattr(llm_factory, "ADAPTER_TTL_SEC", 0.0)
+    assert llm_factory._get_adapter(_CountingAdapter) is not first
+    assert _CountingAdapter.created == 2
+
+
+@pytest.mark.asyncio
+async def test_ollama_probe_result_is_reused(monkeypatch):
+    client = _FakeProbeClient()
+    monkeypatch.setattr(llm_factory, "_get_probe_client", lambda: client)
+    monkeypatch.setattr(llm_factory, "_ollama_probe_cache", None)
+
+    assert await llm_factory.check_ollama_availability() is True
+    assert await llm_factory.check_ollama_availability() is True
+    assert client.calls == 1
+
+    monkeypatch.setattr(llm_factory, "OLLAMA_PROBE_TTL_SEC", 0.0)
+    await llm_factory.check_ollama_availability()
+    assert client.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_async_factory_falls_back_when_ollama_is_down(monkeypatch):
+    async def ollama_down():
+        return False
+
+    monkeypatch.setattr(llm_factory.settings, "LLM_PROVIDER", "ollama")
+    monkeypatch.setattr(llm_factory, "check_ollama_availability", ollama_down)
+    monkeypatch.setattr(llm_factory, "_get_adapter", lambda adapter_cls: adapter_cls)
+    monkeypatch.setitem(
+        llm_factory._PROVIDER_CANDIDATES, "openai", ("openai", lambda: True, llm_factory.OpenAIAdapter)
+    )
+
+    assert await llm_factory.create_llm_adapter_async() is llm_factory.OpenAIAdapter
+
+    monkeypatch.setitem(
+        llm_factory._PROVIDER_CANDIDATES, "openai", ("openai", lambda: False, llm_factory.OpenAIAdapter)
+    )
+    with pytest.raises(ValueError):
+        await llm_factory.create_llm_adapter_async()
@@ -0,0 +1,364 @@
+"""Tests for the event bus."""
+
+import asyncio
+import json
+
+import pytest
+from redis import asyncio as aioredis
+
+from app.adapters.queue_redis import RedisPubSubReader
+from app.domain.mediator import Event, EventBus, EventType, Mediator, _result_size
+
+
+class _FakeReader:
+    def __init__(self):
+        self.channels = set()
+        self.inbox = asyncio.Queue()
+        self.closed = False
+
+    async def add_subscriptions(self, *channels):
+        self.channels.update(channels)
+        return True
+
+    async def remove_subscriptions(self, *channels):
+        self.channels.difference_update(channels)
+
+    async def listen(self):
+        while self.channels:
+            message = await self.inbox.get()
+            if message["channel"].decode() in self.channels:
+                yield message
+
+    async def close(self):
+        self.closed = True
+
+
+class _FakeRedis:
+    def __init__(self):
+        self.published = []
+        self.batches = []
+        self.reader = _FakeReader()
+        self.history = {}
+
+    async def publish(self, channel, message):
+        self.published.append((channel, message))
+        return 1
+
+    async def publish_batch(self, messages):
+        self.batches.append(list(messages))
+        return len(messages)
+
+    def create_pubsub_reader(self):
+        return self.reader
+
+    async def load_scripts(self):
+        pass
+
+    async def publish_with_history(self, channel, history_key, message, max_len, ttl):
+        history = self.history.setdefault(history_key, [])
+        history.insert(0, message)
+        del history[max_len:]
+        return True
+
+    async def lrange(self, key, start, stop):
+        return self.history.get(key, [])[start:stop + 1]
+
+
+@pytest.mark.asyncio
+async def test_redis_publishes_are_pipelined_in_batches():
+    redis = _FakeRedis()
+    bus = EventBus(redis_adapter=redis)
+    bus.redis_batch_size = 3
+    await bus.start()
+
+    for i in range(7):
+        await bus.publish(Event(type=EventType.TOKEN_GENERATED, payload={"i": i}, session_id="s1"))
+    await bus.stop()
+
+    assert redis.published == []
+    assert [len(batch) for batch in redis.batches] == [3, 3, 1]
+    assert all(channel == "events:token.generated" for batch in redis.batches for channel, _ in batch)
+
+
+@pytest.mark.asyncio
+async def test_redis_publish_before_start_goes_direct():
+    redis = _FakeRedis()
+    bus = EventBus(redis_adapter=redis)
+
+    await bus.publish(Event(type=EventType.SESSION_CREATED, payload={}))
+
+    assert [channel for channel, _ in redis.published] == ["events:session.created"]
+    assert redis.batches == []
+
+
+@pytest.mark.asyncio
+async def test_local_handlers_are_dispatched_and_errors_contained():
+    bus = EventBus()
+    seen = []
+
+    async def failing(event):
+        raise RuntimeError("boom")
+
+    bus.subscribe(EventType.TOKEN_GENERATED, failing)
+    await bus.publish(Event(type=EventType.TOKEN_GENERATED, payload={"token": "a"}))
+
+    bus.subscribe(EventType.TOKEN_GENERATED, lambda event: seen.append(event.payload["token"]))
+    bus.subscribe(EventType.TOKEN_GENERATED, seen.append, filter_fn=lambda event: False)
+    await bus.publish(Event(type=EventType.TOKEN_GENERATED, payload={"token": "b"}))
+
+    assert seen == ["b"]
+
+
+def test_event_json_round_trips_through_from_dict():
+    event = Event(type=EventType.ROUTING_COMPLETED, payload={"agent": "hr"}, session_id="s1", request_id="r1")
+
+    restored = Event.from_dict(json.loads(event.to_json()))
+
+    assert restored == event
+    assert json.loads(event.to_json()) == event.to_dict()
+
+
+@pytest.mark.asyncio
+async def test_wait_for_event_resolves_matching_waiter_only():
+    bus = EventBus()
+
+    waiter = asyncio.create_task(bus.wait_for_event(
+        EventType.AGENT_COMPLETED, timeout=1, filter_fn=lambda event: event.request_id == "r2"
+    ))
+    await asyncio.sleep(0)
+    await bus.publish(Event(type=EventType.AGENT_COMPLETED, payload={}, request_id="r1"))
+    await bus.publish(Event(type=EventType.AGENT_COMPLETED, payload={}, request_id="r2"))
+
+    assert (await waiter).request_id == "r2"
+    assert bus._waiters[EventType.AGENT_COMPLETED] == []
+    assert await bus.wait_for_event(EventType.AGENT_COMPLETED, timeout=0.01) is None
+    assert bus._waiters[EventType.AGENT_COMPLETED] == []
+
+
+@pytest.mark.asyncio
+async def test_unsubscribe_removes_only_that_handler():
+    bus = EventBus()
+    seen = []
+    first = bus.subscribe(EventType.TOKEN_GENERATED, lambda event: seen.append("first"))
+    bus.subscribe(EventType.TOKEN_GENERATED, lambda event: seen.append("second"))
+
+    bus.unsubscribe(first)
+    bus.unsubscribe(first)
+    await bus.publish(Event(type=EventType.TOKEN_GENERATED, payload={}))
+
+    assert seen == ["second"]
+
+
+@pytest.mark.asyncio
+async def test_tokens_are_coalesced_per_stream():
+    bus = EventBus()
+    bus.token_coalesce_max = 3
+    batches = []
+    bus.subscribe(EventType.TOKEN_GENERATED, lambda event: batches.append(event.payload["tokens"]))
+
+    for token in "abcd":
+        await bus.publish_coalesced(Event(type=EventType.TOKEN_GENERATED, payload={"token": token}, request_id="m1"))
+    assert batches == [["a", "b", "c"]]
+
+    await asyncio.sleep(bus.token_coalesce_ms / 1000 * 2)
+    assert batches == [["a", "b", "c"], ["d"]]
+
+    await bus.publish_coalesced(Event(type=EventType.TOKEN_GENERATED, payload={"token": "e"}, request_id="m1"))
+    await bus.flush_coalesced(None, "m1")
+    assert batches[-1] == ["e"]
+    assert bus._coalesce_timers == {}
+
+
+@pytest.mark.asyncio
+async def test_other_events_skip_coalescing():
+    bus = EventBus()
+    seen = []
+    bus.subscribe(EventType.ROUTING_COMPLETED, seen.append)
+
+    await bus.publish_coalesced(Event(type=EventType.ROUTING_COMPLETED, payload={}))
+
+    assert len(seen) == 1
+
+
+@pytest.mark.asyncio
+async def test_redis_channels_follow_local_handlers():
+    redis = _FakeRedis()
+    bus = EventBus(redis_adapter=redis)
+    seen = []
+    bus.subscribe(EventType.AGENT_COMPLETED, seen.append)
+    await bus.start()
+    await asyncio.sleep(0)
+
+    assert redis.reader.channels == {"events:agent.completed"}
+
+    handler = bus.subscribe(EventType.AGENT_FAILED, seen.append)
+    await asyncio.sleep(0)
+    assert redis.reader.channels == {"events:agent.completed", "events:agent.failed"}
+
+    remote = Event(type=EventType.AGENT_COMPLETED, payload={}, session_id="s9")
+    await redis.reader.inbox.put({"channel": b"events:agent.completed", "data": remote.to_json()})
+    await asyncio.sleep(0.01)
+    assert [event.session_id for event in seen] == ["s9"]
+
+    bus.unsubscribe(handler)
+    await asyncio.sleep(0)
+    assert redis.reader.channels == {"events:agent.completed"}
+
+    await bus.stop()
+    assert redis.reader.closed
+
+
+class _LoopbackRedis(_FakeRedis):
+    """Delivers every publish back to this process's reader, as Redis would."""
+
+    async def publish(self, channel, message):
+        await self.reader.inbox.put({"channel": channel.encode(), "data": message})
+        return await super().publish(channel, message)
+
+    async def publish_batch(self, messages):
+        for channel, message in messages:
+            await self.reader.inbox.put({"channel": channel.encode(), "data": message})
+        return await super().publish_batch(messages)
+
+
+@pytest.mark.asyncio
+async def test_own_redis_publishes_are_not_dispatched_twice():
+    redis = _LoopbackRedis()
+    bus = EventBus(redis_adapter=redis)
+    seen = []
+    bus.subscribe(EventType.AGENT_COMPLETED, seen.append)
+    await bus.start()
+    await asyncio.sleep(0)
+
+    await bus.publish(Event(type=EventType.AGENT_COMPLETED, payload={}, session_id="local"))
+    remote = Event(type=EventType.AGENT_COMPLETED, payload={}, session_id="remote")
+    await redis.reader.inbox.put({"channel": b"events:agent.completed", "data": remote.to_json("other-process")})
+    await asyncio.sleep(0.05)
+    await bus.stop()
+
+    assert [event.session_id for event in seen] == ["local", "remote"]
+    assert len(redis.batches) == 1
+
+
+@pytest.mark.asyncio
+async def test_pubsub_reader_yields_parsed_messages():
+    reader = RedisPubSubReader("redis://localhost:6379/0")
+    reader.pubsub = aioredis.Redis(decode_responses=False).pubsub()
+    reader.pubsub.channels = {b"events:agent.completed": None}
+    responses = [
+        [b"subscribe", b"events:agent.completed", 1],
+        [b"message", b"events:agent.completed", b"payload"],
+    ]
+
+    async def get_message(ignore_subscribe_messages=False, timeout=0.0):
+        if not responses:
+            reader.pubsub.channels = {}
+            return None
+        return await reader.pubsub.handle_message(responses.pop(0), ignore_subscribe_messages)
+
+    reader.pubsub.get_message = get_message
+
+    messages = [message async for message in reader.listen()]
+
+    assert [(message["channel"], message["data"]) for message in messages] == [
+        (b"events:agent.completed", b"payload")
+    ]
+
+
+def test_from_dict_accepts_iso_timestamps():
+    event = Event.from_dict({"type": "session.created", "payload": {}, "timestamp": "2024-01-02T03:04:05.000006"})
+
+    assert event.timestamp == 1704164645000006000
+    assert event.iso_timestamp == "2024-01-02T03:04:05.000006"
+
+
+@pytest.mark.asyncio
+async def test_full_session_queue_drops_oldest_event():
+    bus = EventBus()
+    bus.session_queue_size = 2
+    queue = bus.create_session_queue("s1")
+
+    for i in range(3):
+        await bus.publish(Event(type=EventType.SESSION_UPDATED, payload={"i": i}, session_id="s1"))
+
+    assert [queue.get_nowait().payload["i"] for _ in range(queue.qsize())] == [1, 2]
+    assert bus.dropped_session_events == 1
+
+
+@pytest.mark.asyncio
+async def test_publish_without_wait_runs_in_background():
+    bus = EventBus()
+    release = asyncio.Event()
+    seen = []
+
+    async def slow(event):
+        await release.wait()
+        seen.append(event.payload)
+
+    bus.subscribe(EventType.METRICS_RECORDED, slow)
+    await bus.publish(Event(type=EventType.METRICS_RECORDED, payload={"n": 1}), wait=False)
+    assert seen == [] and len(bus._bg_tasks) == 1
+
+    release.set()
+    await bus.stop()
+    assert seen == [{"n": 1}]
+
+
+@pytest.mark.asyncio
+async def test_publish_token_buffers_raw_tokens():
+    bus = EventBus()
+    batches = []
+    bus.subscribe(EventType.TOKEN_GENERATED, batches.append)
+
+    await bus.publish_token("s1", "m1", "a")
+    await bus.publish_token("s1", "m1", "b")
+    assert bus._coalesce_buf[("s1", "m1")] == ["a", "b"]
+
+    await bus.flush_coalesced("s1", "m1")
+    assert [(e.session_id, e.request_id, e.payload) for e in batches] == [("s1", "m1", {"tokens": ["a", "b"]})]
+
+    bus.coalesce_tokens = False
+    await bus.publish_token("s1", "m1", "c")
+    assert batches[-1].payload == {"token": "c"}
+
+
+def test_result_size_avoids_stringifying_results():
+    class _Response:
+        content = "hello"
+
+    assert _result_size("abc") == 3
+    assert _result_size(_Response()) == 5
+    assert _result_size({"a": 1, "b": 2}) == 2
+    assert _result_size(object()) is None
+
+
+@pytest.mark.asyncio
+async def test_coordinated_events_take_ids_from_context():
+    bus = EventBus()
+    mediator = Mediator(bus)
+    seen = []
+    bus.subscribe(EventType.AGENT_STARTED, seen.append)
+    bus.subscribe(EventType.AGENT_COMPLETED, seen.append)
+
+    async def run():
+        assert Event(type=EventType.METRICS_RECORDED, payload={}).request_id == "r1"
+        return "done"
+
+    await mediator.coordinate_agent_execution("a1", {"request_id": "r1", "session_id": "s1"}, run)
+
+    assert [(e.request_id, e.session_id) for e in seen] == [("r1", "s1"), ("r1", "s1")]
+    assert Event(type=EventType.METRICS_RECORDED, payload={}).request_id is None
+
+
+@pytest.mark.asyncio
+async def test_session_history_is_capped_and_replayed_in_order():
+    redis = _FakeRedis()
+    bus = EventBus(redis_adapter=redis)
+
+    for i in range(3):
+        await bus.publish_with_history(Event(type=EventType.SESSION_UPDATED, payload={"i": i}, session_id="s1"), max_len=2)
+
+    replay = await bus.get_session_history("s1")
+    assert [event.payload["i"] for event in replay] == [1, 2]
+    with pytest.raises(ValueError):
+        await bus.publish_with_history(Event(type=EventType.SESSION_UPDATED, payload={}))
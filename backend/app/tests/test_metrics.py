@@ -0,0 +1,36 @@
+"""Tests for the Prometheus metrics collector."""
+
+from app.core import metrics
+from app.core.metrics import MetricsCollector
+
+
+def _sample(metric, name: str, **labels) -> float:
+    for family in metric.collect():
+        for sample in family.samples:
+            if sample.name == name and sample.labels == labels:
+                return sample.value
+    return 0.0
+
+
+def test_router_request_batch_aggregates_per_label_set():
+    collector = MetricsCollector()
+    collector.enabled = True
+    labels = {"method": "regex", "agent_type": "hr", "status": "success"}
+    before = _sample(metrics.router_requests_total, "router_requests_total", **labels)
+    before_count = _sample(
+        metrics.router_request_duration_seconds, "router_request_duration_seconds_count",
+        method="regex", agent_type="hr"
+    )
+
+    collector.record_router_requests_batch([
+        {"method": "regex", "agent_type": "hr", "duration": 0.01, "confidence": 1.0, "routing_method": "regex"},
+        {"method": "regex", "agent_type": "hr", "duration": 0.02, "confidence": 1.0, "routing_method": "regex"},
+        {"method": "regex", "agent_type": "hr", "duration": 0.03, "confidence": 0.9,
+         "routing_method": "regex", "status": "error"},
+    ])
+
+    assert _sample(metrics.router_requests_total, "router_requests_total", **labels) == before + 2
+    assert _sample(
+        metrics.router_request_duration_seconds, "router_request_duration_seconds_count",
+        method="regex", agent_type="hr"
+    ) == before_count + 3
@@ -0,0 +1,225 @@
+"""
+Tests for the LlamaIndex RAG system helpers.
+
+These cover the pieces that run without a database or OpenAI access.
+"""
+
+from unittest.mock import AsyncMock, Mock, patch
+
+import httpx
+import openai
+import pytest
+
+pytest.importorskip("llama_index.core")
+
+from llama_index.core import Document
+
+from app.domain.llamaindex_rag_system import (
+    EnterpriseRAGSystem, SemanticQueryCache, _compact_for_synthesis, _looks_decomposable,
+    configure_hnsw_params
+)
+
+
+_REQUEST = httpx.Request("POST", "https://api.openai.com/v1/embeddings")
+
+
+def _status_error(error_cls, status_code: int) -> openai.APIStatusError:
+    return error_cls("error", response=httpx.Response(status_code, request=_REQUEST), body=None)
+
+
+def _bare_rag_system() -> EnterpriseRAGSystem:
+    """An EnterpriseRAGSystem with no clients or index attached."""
+    rag = EnterpriseRAGSystem.__new__(EnterpriseRAGSystem)
+    rag.ingest_concurrency = 2
+    rag.bulk_ingest_threshold = 500
+    rag.query_cache = SemanticQueryCache(dim=3)
+    rag.index = Mock()
+    return rag
+
+
+class TestConfigureHnswParams:
+    """Test cases for HNSW parameter sizing."""
+    
+    @pytest.mark.parametrize("vector_count, expected", [
+        (0, (16, 64, 40)),
+        (99_999, (16, 64, 40)),
+        (100_000, (24, 100, 100)),
+        (999_999, (24, 100, 100)),
+        (1_000_000, (32, 128, 200)),
+        (50_000_000, (32, 128, 200)),
+    ])
+    def test_tiers_by_corpus_size(self, vector_count, expected):
+        """Test each corpus size lands in the right tier, boundaries included."""
+        params = configure_hnsw_params(vector_count)
+        
+        assert (params["hnsw_m"], params["hnsw_ef_construction"], params["hnsw_ef_search"]) == expected
+
+
+class TestCompactForSynthesis:
+    """Test cases for the synthesis prompt projection."""
+    
+    def test_keeps_answers_and_trimmed_top_sources(self):
+        """Test sources are capped and snippets truncated."""
+        sub_results = [{
+            "sub_query": "What is the PTO policy?",
+            "result": {
+                "response": "20 days a year.",
+                "source_nodes": [{"content": f"source {i} " + "x" * 50, "score": 0.9} for i in range(5)]
+            }
+        }]
+        
+        compact = _compact_for_synthesis(sub_results, max_sources=2, max_snippet_chars=10)
+        
+        assert compact == [{
+            "q": "What is the PTO policy?",
+            "a": "20 days a year.",
+            "ctx": ["source 0 x", "source 1 x"]
+        }]
+    
+    def test_skips_failed_sub_queries(self):
+        """Test sub-queries without a result are left out."""
+        sub_results = [
+            {"sub_query": "failed", "error": "timeout"},
+            {"sub_query": "ok", "result": {"response": "yes", "source_nodes": []}},
+        ]
+        
+        assert _compact_for_synthesis(sub_results) == [{"q": "ok", "a": "yes", "ctx": []}]
+
+
+class TestLooksDecomposable:
+    """Test cases for the decomposition pre-check."""
+    
+    @pytest.mark.parametrize("query, expected", [
+        ("What is the PTO policy?", False),
+        ("Where is the brand guide?", False),
+        ("Compare PTO vs sick leave", True),
+        ("PTO policy and parental leave", True),
+        ("How many vacation days do new employees get in their first year here", True),
+    ])
+    def test_short_single_part_queries_are_not_split(self, query, expected):
+        """Test long queries and multi-part markers trigger decomposition."""
+        assert _looks_decomposable(query, min_words=12) is expected
+
+
+class TestSemanticQueryCache:
+    """Test cases for SemanticQueryCache."""
+    
+    def test_similar_query_hits(self):
+        """Test a near-identical embedding returns the stored result."""
+        cache = SemanticQueryCache(dim=3, similarity_threshold=0.95)
+        cache.add([1.0, 0.0, 0.0], {"response": "cached"}, key=5)
+        
+        assert cache.lookup([0.99, 0.01, 0.0], key=5) == {"response": "cached"}
+        assert cache.stats()["hits"] == 1
+    
+    def test_different_key_misses(self):
+        """Test a matching embedding under another key is not returned."""
+        cache = SemanticQueryCache(dim=3)
+        cache.add([1.0, 0.0, 0.0], {"response": "cached"}, key=5)
+        
+        assert cache.lookup([1.0, 0.0, 0.0], key=10) is None
+        assert cache.stats()["misses"] == 1
+    
+    def test_similarity_below_threshold_misses(self):
+        """Test an embedding under the similarity threshold is a miss."""
+        cache = SemanticQueryCache(dim=3, similarity_threshold=0.95)
+        cache.add([1.0, 0.0, 0.0], {"response": "cached"})
+        
+        assert cache.lookup([0.7, 0.7, 0.0]) is None
+    
+    def test_expired_entry_misses(self):
+        """Test entries are not served past their TTL."""
+        cache = SemanticQueryCache(dim=3, ttl_seconds=10)
+        with patch("app.domain.llamaindex_rag_system.time.time", return_value=1000.0):
+            cache.add([1.0, 0.0, 0.0], {"response": "cached"})
+        
+        with patch("app.domain.llamaindex_rag_system.time.time", return_value=1011.0):
+            assert cache.lookup([1.0, 0.0, 0.0]) is None
+            assert cache.stats()["entries"] == 0
+    
+    def test_full_cache_overwrites_oldest(self):
+        """Test the oldest entry is replaced once the cache is full."""
+        cache = SemanticQueryCache(dim=3, max_entries=2)
+        cache.add([1.0, 0.0, 0.0], {"response": "x"})
+        cache.add([0.0, 1.0, 0.0], {"response": "y"})
+        cache.add([0.0, 0.0, 1.0], {"response": "z"})
+        
+        assert cache.lookup([1.0, 0.0, 0.0]) is None
+        assert cache.lookup([0.0, 0.0, 1.0]) == {"response": "z"}
+    
+    def test_clear_drops_entries(self):
+        """Test clear() empties the cache."""
+        cache = SemanticQueryCache(dim=3)
+        cache.add([1.0, 0.0, 0.0], {"response": "cached"})
+        cache.clear()
+        
+        assert cache.lookup([1.0, 0.0, 0.0]) is None
+        assert cache.stats()["entries"] == 0
+    
+    @pytest.mark.asyncio
+    async def test_ingest_clears_cached_answers(self):
+        """Test ingesting documents invalidates the query cache."""
+        rag = _bare_rag_system()
+        rag._parse_documents = AsyncMock(return_value=[Mock()])
+        rag._insert_in_batches = AsyncMock()
+        rag.query_cache.add([1.0, 0.0, 0.0], {"response": "stale"})
+        
+        await rag.ingest_documents([Document(text="new policy")])
+        
+        assert rag.query_cache.lookup([1.0, 0.0, 0.0]) is None
+
+
+class TestIngestion:
+    """Test cases for document ingestion."""
+    
+    @pytest.mark.asyncio
+    async def test_large_ingest_embeds_interactively_by_default(self):
+        """Test the Batch API path is only taken when bulk is requested."""
+        rag = _bare_rag_system()
+        rag.bulk_ingest_threshold = 1
+        rag._parse_documents = AsyncMock(return_value=[Mock(), Mock()])
+        rag._insert_in_batches = AsyncMock()
+        rag._insert_nodes_bulk = AsyncMock()
+        
+        await rag.ingest_documents([Document(text="handbook")])
+        rag._insert_nodes_bulk.assert_not_called()
+        
+        await rag.ingest_documents([Document(text="handbook")], bulk=True)
+        rag._insert_nodes_bulk.assert_awaited_once()
+
+
+class TestRetry:
+    """Test cases for transient-error retries."""
+    
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("error", [
+        _status_error(openai.RateLimitError, 429),
+        _status_error(openai.InternalServerError, 503),
+        openai.APIConnectionError(request=_REQUEST),
+        openai.APITimeoutError(request=_REQUEST),
+        httpx.ConnectError("reset"),
+    ])
+    async def test_transient_errors_are_retried(self, error):
+        """Test rate limits, 5xx and connection failures are retried."""
+        rag = _bare_rag_system()
+        fn = AsyncMock(side_effect=[error, "ok"])
+        stats = {}
+        
+        assert await rag._retry(fn, base=0, stats=stats) == "ok"
+        assert fn.await_count == 2
+        assert stats["retried"] == 1
+    
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("error", [
+        _status_error(openai.BadRequestError, 400),
+        _status_error(openai.AuthenticationError, 401),
+        ValueError("bad input"),
+    ])
+    async def test_permanent_errors_fail_fast(self, error):
+        """Test client errors are raised on the first attempt."""
+        rag = _bare_rag_system()
+        fn = AsyncMock(side_effect=error)
+        
+        with pytest.raises(type(error)):
+            await rag._retry(fn, base=0)
+        assert fn.await_count == 1
@@ -4,11 +4,13 @@ Tests for the router chain implementation.
 This module tests the Chain of Responsibility routing logic.
 """
 
+import asyncio
+
 import pytest
 from unittest.mock import Mock, AsyncMock, patch
 from app.domain.router_chain import (
-    RouterChain, RegexNode, LLMRouterNode, FallbackNode,
-    RoutingRule, DEFAULT_ROUTING_RULES, DEFAULT_AGENT_DESCRIPTIONS
+    RouterChain, RegexNode, LLMRouterNode, LLMIntentClassifierNode, FallbackNode,
+    RoutingRule, DEFAULT_ROUTING_RULES, DEFAULT_AGENT_DESCRIPTIONS, SIMPLIFIED_ROUTING_RULES
 )
 from app.domain.schemas import RequestContext, PromptIn, AgentType, RoutingMethod
 from app.adapters.llm_openai import OpenAIAdapter, CompletionResponse
@@ -98,6 +100,126 @@ class TestRegexNode:
         
         result = await node.handle(context)
         assert result.intent == "hr_help"  # Higher priority rule wins
+    
+    @pytest.mark.parametrize("prompt", [
+        "I forgot my password again",
+        "Can I buy a house to lease out?",
+        "What's the weather like?",
+        "Submit my TRAVEL EXPENSE report",
+        "",
+    ])
+    def test_prefilter_agrees_with_rule_scan(self, prompt):
+        """Test the combined prefilter finds a match exactly when some rule does."""
+        for rules in (DEFAULT_ROUTING_RULES, SIMPLIFIED_ROUTING_RULES):
+            node = RegexNode(rules)
+            assert node._prefilter is not None
+            expected = any(pattern.search(prompt) for pattern, _ in node.compiled_rules)
+            assert node._any_rule_matches(prompt) == expected
+    
+    @pytest.mark.asyncio
+    async def test_uppercase_patterns_match_and_entities_keep_case(self):
+        """Test lowercased patterns still match mixed case and named groups keep the original text."""
+        node = RegexNode([
+            RoutingRule(pattern=r"\bPTO\b for (?P<Month>[A-Z][a-z]+)", agent_type=AgentType.HR, intent="pto_request"),
+        ])
+        context = RequestContext(prompt=PromptIn(prompt="Can I take pto for March?", session_id="test"))
+        
+        result = await node.handle(context)
+        assert result.intent == "pto_request"
+        assert result.entities == {"Month": "March"}
+    
+    @pytest.mark.asyncio
+    async def test_process_scans_rules_once(self):
+        """Test handle() reuses the match can_handle() found instead of scanning again."""
+        node = RegexNode(DEFAULT_ROUTING_RULES)
+        context = RequestContext(prompt=PromptIn(prompt="I forgot my password", session_id="test"))
+        
+        with patch.object(node, "_match_rules", wraps=node._match_rules) as match_rules:
+            result = await node.process(context)
+        
+        assert result.intent == "password_reset_request"
+        match_rules.assert_called_once()
+    
+    @pytest.mark.asyncio
+    async def test_miss_skips_routing_decision_cache(self, monkeypatch):
+        """Test a prompt no rule matches never reaches the Redis-backed decision cache."""
+        # The decorator bypasses the cache under pytest; lift that for this test
+        monkeypatch.delenv("PYTEST_CURRENT_TEST", raising=False)
+        node = RegexNode(DEFAULT_ROUTING_RULES)
+        context = RequestContext(prompt=PromptIn(prompt="What's the weather like?", session_id="test"))
+        
+        with patch("app.core.router_cache.router_cache.get_routing_result", new_callable=AsyncMock) as get:
+            assert await node.process(context) is None
+        
+        get.assert_not_called()
+    
+    @pytest.mark.parametrize("prompt", [
+        "i forgot my password again",
+        "can i buy a house to lease out? need help with the apartment",
+        "my computer is so slow today",
+        "the rental application system is broken",
+        "good morning, how are you",
+        "what's the weather like?",
+    ])
+    def test_required_literals_never_skip_a_matching_rule(self, prompt):
+        """Test every rule that matches a prompt contains one of its required literals."""
+        for rules in (DEFAULT_ROUTING_RULES, SIMPLIFIED_ROUTING_RULES):
+            node = RegexNode(rules)
+            for (pattern, _), literals in zip(node.compiled_rules, node._rule_literals):
+                if pattern.search(prompt) and literals is not None:
+                    assert any(literal in prompt for literal in literals)
+    
+    def test_required_literals_tolerate_parser_changes(self):
+        """Test rules are still scanned when the regex parser output cannot be walked."""
+        with patch("app.domain.router_chain.sre_parse.parse", side_effect=AttributeError("changed")):
+            node = RegexNode(DEFAULT_ROUTING_RULES)
+        
+        assert all(literals is None for literals in node._rule_literals)
+        assert node._cached_match("i forgot my password") is not None
+    
+    def test_prefilter_skipped_for_backreferences(self):
+        """Test rules with backreferences fall back to the per-rule scan."""
+        node = RegexNode([
+            RoutingRule(pattern=r"(\w+) \1", agent_type=AgentType.GENERAL, intent="echo"),
+            RoutingRule(pattern=r"hello", agent_type=AgentType.GENERAL, intent="greeting"),
+        ])
+        
+        assert node._prefilter is None
+        assert node._any_rule_matches("hello hello")
+
+    @pytest.mark.asyncio
+    async def test_repeat_prompts_reuse_cached_match(self, request_context):
+        """Test prompts differing only in case are matched once and share the outcome."""
+        node = RegexNode(DEFAULT_ROUTING_RULES)
+
+        request_context.prompt.prompt = "I have a question about my employee benefits"
+        first = await node.handle(request_context)
+
+        with patch.object(node, "_match_rules", side_effect=AssertionError("rules rescanned")):
+            request_context.prompt.prompt = "I HAVE A QUESTION ABOUT MY EMPLOYEE BENEFITS"
+            second = await node.handle(request_context)
+
+        assert second.intent == first.intent
+        assert second.metadata == first.metadata
+        assert len(node._match_cache) == 1
+
+    @pytest.mark.asyncio
+    async def test_trace_steps_emitted_off_the_request_path(self, request_context):
+        """Test trace steps are queued and emitted in order by a background task."""
+        emitter = Mock()
+        emitter.emit_router_step = AsyncMock()
+        node = RegexNode(DEFAULT_ROUTING_RULES, trace_emitter=emitter)
+
+        request_context.prompt.prompt = "I have a question about my employee benefits"
+        assert await node.handle(request_context) is not None
+        request_context.prompt.prompt = "What's the weather like?"
+        assert await node.handle(request_context) is None
+        emitter.emit_router_step.assert_not_called()
+
+        await node._trace_buffer._task
+        intents = [call.kwargs["intent"] for call in emitter.emit_router_step.await_args_list]
+        assert len(intents) == 2
+        assert intents[1] == "no_match"
 
 
 class TestLLMRouterNode:
@@ -140,6 +262,76 @@ class TestLLMRouterNode:
         assert result is None  # Should return None on error
 
 
+class TestLLMIntentClassifierNode:
+    """Test LLM intent classification node."""
+    
+    @staticmethod
+    def _context(prompt: str) -> RequestContext:
+        return RequestContext(prompt=PromptIn(prompt=prompt, session_id="test-session"), request_id="test-request")
+    
+    @pytest.mark.asyncio
+    async def test_concurrent_queries_share_one_llm_call(self, mock_llm_adapter):
+        """Test queries arriving together are classified with a single batched call."""
+        mock_llm_adapter.complete.return_value = CompletionResponse(
+            content='{"classifications": ['
+                    '{"agent_type": "HR", "intent": "pto", "confidence": 0.9, "reasoning": ""},'
+                    '{"agent_type": "IT", "intent": "password", "confidence": 0.95, "reasoning": ""}]}',
+            model="gpt-4"
+        )
+        node = LLMIntentClassifierNode(mock_llm_adapter, DEFAULT_AGENT_DESCRIPTIONS)
+        
+        hr, it = await asyncio.gather(
+            node.handle(self._context("How much PTO do I have?")),
+            node.handle(self._context("Reset my password")),
+        )
+        
+        assert mock_llm_adapter.complete.await_count == 1
+        assert (hr.metadata["agent_type"], it.metadata["agent_type"]) == ("hr", "it")
+    
+    @pytest.mark.asyncio
+    async def test_query_queued_during_a_batch_is_classified(self, mock_llm_adapter):
+        """Test a query arriving while a batch is in flight is picked up by the next pass."""
+        node = LLMIntentClassifierNode(mock_llm_adapter, DEFAULT_AGENT_DESCRIPTIONS)
+        late = []
+
+        async def complete(**kwargs):
+            if not late:
+                late.append(asyncio.create_task(node.handle(self._context("Reset my password"))))
+                await asyncio.sleep(0)
+            return CompletionResponse(
+                content='{"agent_type": "IT", "intent": "password", "confidence": 0.95, "reasoning": ""}',
+                model="gpt-4"
+            )
+
+        mock_llm_adapter.complete.side_effect = complete
+
+        first = await node.handle(self._context("My laptop is broken"))
+        second = await asyncio.wait_for(late[0], timeout=1)
+
+        assert first.metadata["agent_type"] == second.metadata["agent_type"] == "it"
+        assert mock_llm_adapter.complete.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_mismatched_batch_falls_back_to_single_calls(self, mock_llm_adapter):
+        """Test a batched response with the wrong shape is retried query by query."""
+        single = CompletionResponse(
+            content='{"agent_type": "HR", "intent": "pto", "confidence": 0.9, "reasoning": ""}',
+            model="gpt-4"
+        )
+        mock_llm_adapter.complete.side_effect = [
+            CompletionResponse(content='{"classifications": []}', model="gpt-4"), single, single
+        ]
+        node = LLMIntentClassifierNode(mock_llm_adapter, DEFAULT_AGENT_DESCRIPTIONS)
+        
+        results = await asyncio.gather(
+            node.handle(self._context("How much PTO do I have?")),
+            node.handle(self._context("When is my PTO approved?")),
+        )
+        
+        assert mock_llm_adapter.complete.await_count == 3
+        assert all(result.metadata["agent_type"] == "hr" for result in results)
+
+
 class TestFallbackNode:
     """Test fallback routing node."""
     
@@ -218,4 +410,89 @@ class TestRouterChain:
         result = await chain.route(request_context)
         
         assert result.routing_method == RoutingMethod.FALLBACK
-        assert result.metadata["agent_type"] == AgentType.GENERAL.value
\ No newline at end of file
+        assert result.metadata["agent_type"] == AgentType.GENERAL.value    
+    @pytest.mark.asyncio
+    async def test_confident_decisions_are_reused_for_normalized_prompts(self, request_context, mock_llm_adapter):
+        """Test repeat prompts differing in case and spacing skip the chain."""
+        mock_llm_adapter.complete.return_value = CompletionResponse(
+            content='{"agent_type": "hr", "intent": "hr_inquiry", "confidence": 0.95, "reasoning": ""}',
+            model="gpt-4"
+        )
+        chain = RouterChain()
+        chain.build_default_chain(
+            regex_rules=DEFAULT_ROUTING_RULES,
+            llm_adapter=mock_llm_adapter,
+            agent_descriptions=DEFAULT_AGENT_DESCRIPTIONS
+        )
+        
+        request_context.prompt.prompt = "Who approves my leave?"
+        first = await chain.route(request_context)
+        request_context.prompt.prompt = "  who approves   my LEAVE? "
+        second = await chain.route(request_context)
+        
+        assert mock_llm_adapter.complete.await_count == 1
+        assert second.metadata["selected_agent"] == first.metadata["selected_agent"] == AgentType.HR.value
+        assert second is not first
+    
+    @pytest.mark.asyncio
+    async def test_fallback_decisions_are_not_cached(self, request_context, mock_llm_adapter):
+        """Test a fallback caused by an LLM failure is retried on the next request."""
+        mock_llm_adapter.complete.side_effect = Exception("LLM error")
+        chain = RouterChain()
+        chain.build_default_chain(
+            regex_rules=[],
+            llm_adapter=mock_llm_adapter,
+            agent_descriptions=DEFAULT_AGENT_DESCRIPTIONS
+        )
+        
+        request_context.prompt.prompt = "What is the meaning of life?"
+        await chain.route(request_context)
+        await chain.route(request_context)
+        
+        assert len(chain._decision_cache) == 0
+    
+    @pytest.mark.asyncio
+    async def test_route_traces_are_sent_in_the_background(self, request_context, mock_llm_adapter):
+        """Test route() queues its start and decision traces instead of awaiting them."""
+        emitter = Mock()
+        emitter.emit_router_trace = AsyncMock()
+        emitter.emit_router_decision = AsyncMock()
+        emitter.emit_router_step = AsyncMock()
+        chain = RouterChain(trace_emitter=emitter)
+        chain.build_default_chain(
+            regex_rules=DEFAULT_ROUTING_RULES,
+            llm_adapter=mock_llm_adapter,
+            agent_descriptions=DEFAULT_AGENT_DESCRIPTIONS,
+            use_llm_primary=False
+        )
+        
+        request_context.prompt.prompt = "I need help with my employee benefits"
+        result = await chain.route(request_context)
+        emitter.emit_router_decision.assert_not_called()
+        result.metadata["added_later"] = True
+        
+        await chain._trace_buffer._task
+        trace_id = emitter.emit_router_trace.await_args.kwargs["trace_id"]
+        decision = emitter.emit_router_decision.await_args.kwargs
+        assert decision["trace_id"] == trace_id
+        assert "added_later" not in decision["metadata"]
+    
+    def test_enhanced_layers_are_exposed_directly(self, mock_llm_adapter):
+        """Test the learning and context routers are tracked when the enhanced chain is built."""
+        chain = RouterChain()
+        chain.build_enhanced_chain(
+            regex_rules=DEFAULT_ROUTING_RULES,
+            llm_adapter=mock_llm_adapter,
+            agent_descriptions=DEFAULT_AGENT_DESCRIPTIONS
+        )
+        
+        assert chain.get_context_router() is chain.head
+        assert chain.get_learning_router() is chain.head.learning_router
+        
+        chain.build_default_chain(
+            regex_rules=DEFAULT_ROUTING_RULES,
+            llm_adapter=mock_llm_adapter,
+            agent_descriptions=DEFAULT_AGENT_DESCRIPTIONS
+        )
+        assert chain.get_learning_router() is None
+        assert chain.get_context_router() is None